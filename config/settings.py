@@ -15,9 +15,13 @@ SRC_DIR = PROJECT_ROOT / "src"
 CONFIG_DIR = PROJECT_ROOT / "config"
 ASSETS_DIR = PROJECT_ROOT / "assets"
 LOGS_DIR = PROJECT_ROOT / "logs"
+CACHE_DIR = PROJECT_ROOT / "cache"
+DATA_DIR = PROJECT_ROOT / "data"
 
 # Crear directorios si no existen
 LOGS_DIR.mkdir(exist_ok=True)
+CACHE_DIR.mkdir(exist_ok=True)
+DATA_DIR.mkdir(exist_ok=True)
 ASSETS_DIR.mkdir(exist_ok=True)
 
 # ============== CONFIGURACIÓN DE IA ==============
@@ -48,6 +52,39 @@ LISTEN_TIMEOUT = 5
 PHRASE_TIME_LIMIT = 10
 AMBIENT_NOISE_DURATION = 1
 
+# Fuente de audio: vacío = micrófono; un WAV/FLAC o un directorio de
+# grabaciones actúan como micrófono virtual (pruebas sin hardware)
+AUDIO_FUENTE = os.getenv("AUDIO_FUENTE", "")
+AUDIO_FUENTE_VELOCIDAD = float(os.getenv("AUDIO_FUENTE_VELOCIDAD", "1.0"))  # 0 = sin esperas
+
+# Preprocesado (requiere NumPy): DC, compuerta de ruido, AGC y remuestreo a
+# 16 kHz mono; la frase se codifica a FLAC mientras se habla
+AUDIO_PREPROCESADO = os.getenv("AUDIO_PREPROCESADO", "true").lower() == "true"
+AUDIO_FRECUENCIA_RECONOCIMIENTO = 16000
+AUDIO_AGC_RMS_OBJETIVO = 6000         # Nivel de voz tras el AGC (unidades int16)
+AUDIO_COMPUERTA_NIVEL_MIN = 150       # RMS mínimo para abrir la compuerta de ruido
+
+# ============== CONFIGURACIÓN DEL PIPELINE DE VOZ ==============
+PIPELINE_COLA_MAX = 4                 # Elementos máximos por cola entre etapas
+PIPELINE_INTERVALO_METRICAS = 1.0     # Segundos entre publicaciones de métricas
+# Sin cancelación de eco el micrófono capta la propia voz de Aurora,
+# por eso la captura se pausa durante la reproducción salvo que se indique
+PIPELINE_ESCUCHA_DURANTE_REPRODUCCION = (
+    os.getenv("PIPELINE_ESCUCHA_DURANTE_REPRODUCCION", "false").lower() == "true"
+)
+
+# Procesamiento especulativo sobre transcripciones parciales
+# (cada parcial es una petición extra al reconocedor y cada fallo una consulta
+# a la IA descartada, por eso viene desactivado)
+ESPECULACION_ACTIVA = os.getenv("ESPECULACION_ACTIVA", "false").lower() == "true"
+ESPECULACION_ESTABILIDAD_MS = int(os.getenv("ESPECULACION_ESTABILIDAD_MS", "300"))
+ESPECULACION_INTERVALO_PARCIAL = 0.6  # Segundos de audio nuevo entre parciales
+
+# Barge-in: micrófono abierto mientras Aurora habla, con supresión de eco
+BARGE_IN_ACTIVO = os.getenv("BARGE_IN_ACTIVO", "false").lower() == "true"
+BARGE_IN_UMBRAL = float(os.getenv("BARGE_IN_UMBRAL", str(ENERGY_THRESHOLD)))
+BARGE_IN_BLOQUES_ACTIVACION = 3  # Bloques de 20 ms con voz antes de cortar
+
 # ============== CONFIGURACIÓN DE AUDIO ==============
 TEMP_AUDIO_FILE = "temp_audio.mp3"
 AUDIO_PLAYERS = {
@@ -84,6 +121,7 @@ PROGRAMAS_CONFIG = {
         "terminal": "open -a Terminal",
         "finder": "open -a Finder",
         "vscode": "open -a 'Visual Studio Code'",
+        "visual studio code": "open -a 'Visual Studio Code'",
     },
     "Linux": {
         "navegador": "firefox",
@@ -95,10 +133,30 @@ PROGRAMAS_CONFIG = {
         "gedit": "gedit",
         "nautilus": "nautilus",
         "vscode": "code",
+        "visual studio code": "code",
         "code": "code",
     }
 }
 
+# Los programas se abren desde un proceso auxiliar pequeño (posix_spawn) en
+# lugar de hacer fork del proceso de la interfaz
+LANZADOR_SERVICIO = os.getenv("LANZADOR_SERVICIO", "true").lower() == "true"
+
+# Segundos mínimos entre revisiones de los directorios del PATH (la
+# disponibilidad de ejecutables se guarda en caché entre revisiones)
+RESOLUTOR_INTERVALO_REVALIDACION = float(os.getenv("RESOLUTOR_INTERVALO_REVALIDACION", "2"))
+
+# Aplicaciones instaladas (.desktop, solo Linux): caché en CACHE_DIR que se
+# revisa como mucho cada tantos segundos
+APLICACIONES_INTERVALO_REVALIDACION = float(os.getenv("APLICACIONES_INTERVALO_REVALIDACION", "30"))
+
+# Índice de archivos para "busca el archivo ...": carpetas separadas por
+# os.pathsep (la carpeta personal por defecto) y carpetas que no se recorren
+ARCHIVOS_RAICES = os.getenv("ARCHIVOS_RAICES", str(Path.home())).split(os.pathsep)
+ARCHIVOS_EXCLUIR = ["node_modules", "__pycache__", "venv", "site-packages", "snap"]
+ARCHIVOS_INTERVALO_ACTUALIZACION = float(os.getenv("ARCHIVOS_INTERVALO_ACTUALIZACION", "300"))
+ARCHIVOS_RESULTADOS = 3               # Coincidencias que se leen en voz alta
+
 # ============== CONFIGURACIÓN WEB ==============
 WEB_SHORTCUTS = {
     "youtube": "https://www.youtube.com",
@@ -117,8 +175,23 @@ WEB_SHORTCUTS = {
     "mercadolibre": "https://www.mercadolibre.com",
 }
 
+# Palabras clave que convierten un comando en búsqueda y muletillas que se
+# quitan del término
+PALABRAS_BUSQUEDA = ["busca", "buscar", "búsqueda", "googlea", "buscar en google"]
+PALABRAS_REMOVER_BUSQUEDA = ["en google", "por favor", "para mí"]
+PALABRAS_YOUTUBE = ["busca en youtube", "pon en youtube", "reproduce en youtube", "ver en youtube"]
+CLIMA_LUGAR_POR_DEFECTO = os.getenv("CLIMA_LUGAR_POR_DEFECTO", "El Salvador")
+
+# Alias aproximados ("fire fox", "you tube"): solo tras un verbo de apertura
+# y con una similitud (0-1) de al menos ALIAS_DIFUSO_UMBRAL
+ALIAS_DIFUSO_UMBRAL = float(os.getenv("ALIAS_DIFUSO_UMBRAL", "0.8"))
+VERBOS_APERTURA = ["abre", "abrir", "ábreme", "ejecuta", "inicia", "lanza", "entra a", "ve a", "ir a"]
+
 FIREFOX_PROFILE_PATH = os.getenv("FIREFOX_PROFILE_PATH", "")
 USE_SELENIUM = os.getenv("USE_SELENIUM", "false").lower() == "true"
+GECKODRIVER_PATH = os.getenv("GECKODRIVER_PATH", "")   # Vacío = PATH, caché o descarga
+SELENIUM_POOL_TAMANO = int(os.getenv("SELENIUM_POOL_TAMANO", "1"))
+SELENIUM_CHEQUEO_INACTIVO = 30.0       # Segundos sin uso tras los que se comprueba el driver
 
 # ============== COMANDOS DE SALIDA ==============
 EXIT_COMMANDS = [
@@ -128,6 +201,24 @@ EXIT_COMMANDS = [
     "salir", "exit", "quit", "eso es todo"
 ]
 
+# ============== COMANDOS CON VARIAS INTENCIONES ==============
+# "abre youtube y sube el volumen": acciones independientes en paralelo
+MULTI_INTENCION_HILOS = int(os.getenv("MULTI_INTENCION_HILOS", "4"))
+
+# ============== CLASIFICADOR LOCAL DE INTENCIONES ==============
+# Peticiones habituales sin disparador exacto ("súbele al volumen") se
+# atienden localmente si la confianza supera el umbral; el resto va a la IA
+CLASIFICADOR_ACTIVO = os.getenv("CLASIFICADOR_ACTIVO", "true").lower() == "true"
+CLASIFICADOR_EJEMPLOS = CONFIG_DIR / "intenciones.yaml"
+# (similitud con el ejemplo más parecido de cada intención)
+CLASIFICADOR_UMBRAL = float(os.getenv("CLASIFICADOR_UMBRAL", "0.45"))
+CLASIFICADOR_MARGEN = 0.1             # Ventaja mínima sobre la segunda intención
+# Las intenciones que actúan sobre el sistema (volumen, silencio) exigen más
+# margen: ante la duda es mejor preguntar a la IA que tocar el volumen. La
+# dirección no depende del umbral, la eligen las palabras de sus variantes
+CLASIFICADOR_UMBRAL_SISTEMA = float(os.getenv("CLASIFICADOR_UMBRAL_SISTEMA", "0.5"))
+CLASIFICADOR_MARGEN_SISTEMA = 0.15
+
 # ============== CONFIGURACIÓN DE INTERFAZ ==============
 WINDOW_TITLE = f"{ASSISTANT_NAME} - Asistente IA"
 WINDOW_WIDTH = 1100
@@ -135,6 +226,27 @@ WINDOW_HEIGHT = 700
 WINDOW_MIN_WIDTH = 800
 WINDOW_MIN_HEIGHT = 600
 
+# Reloj único de animaciones: se pausa con la ventana oculta o minimizada y
+# reduce los FPS (hasta 1/ANIMACION_DIVISOR_MAXIMO) con carga o en batería
+ANIMACION_AHORRO_BATERIA = os.getenv("ANIMACION_AHORRO_BATERIA", "true").lower() == "true"
+ANIMACION_DIVISOR_MAXIMO = 4
+
+# Pool de tareas de la interfaz: hilos máximos por carril (la IA espera a la
+# red; el micrófono y la voz van de uno en uno; cálculo local)
+POOL_HILOS_RED = int(os.getenv("POOL_HILOS_RED", "4"))
+POOL_HILOS_AUDIO = int(os.getenv("POOL_HILOS_AUDIO", "1"))
+POOL_HILOS_CPU = int(os.getenv("POOL_HILOS_CPU", str(max(1, (os.cpu_count() or 2) // 2))))
+
+# Historial del chat en SQLite: se escribe por lotes en segundo plano y la
+# vista solo guarda en memoria una ventana de mensajes (al subir se leen
+# páginas anteriores)
+HISTORIAL_DB = os.getenv("HISTORIAL_DB", str(DATA_DIR / "historial.db"))
+HISTORIAL_LOTE = 32                   # Mensajes pendientes que fuerzan una escritura
+HISTORIAL_INTERVALO_ESCRITURA = 1.0   # Segundos máximos antes de escribir
+HISTORIAL_PAGINA = int(os.getenv("HISTORIAL_PAGINA", "50"))
+HISTORIAL_VENTANA = int(os.getenv("HISTORIAL_VENTANA", "300"))   # Mensajes máximos en la vista
+HISTORIAL_RESULTADOS = 50             # Resultados del buscador del chat
+
 THEME_COLORS = {
     "background_gradient_start": "#1e1b4b",
     "background_gradient_end": "#312e81",
@@ -7,6 +7,7 @@ Uso:
     python run.py              # Inicia la interfaz gráfica
     python run.py --terminal   # Modo terminal/consola
     python run.py --test       # Ejecuta tests del sistema
+    python run.py --profile-ui # Interfaz midiendo cuadros y pintado
     python run.py --help       # Muestra ayuda
 """
 
@@ -106,12 +107,12 @@ def verificar_configuracion():
     return True
 
 
-def modo_interfaz():
+def modo_interfaz(perfil_ui=False, capa_perfil=False):
     """Inicia la interfaz gráfica"""
     logger.info("Iniciando interfaz gráfica")
     print("🖥️  Iniciando interfaz gráfica...")
     from src.interfaz import main
-    main()
+    main(perfil_ui=perfil_ui, capa_perfil=capa_perfil)
 
 
 def modo_terminal():
@@ -140,6 +141,10 @@ Ejemplos de uso:
   python run.py              Inicia la interfaz gráfica
   python run.py --terminal   Modo terminal/consola
   python run.py --test       Ejecuta tests del sistema
+  python run.py --test --fuente grabaciones/ --velocidad 0
+                             Tests con un micrófono virtual
+  python run.py --profile-ui --profile-overlay
+                             Interfaz con FPS y tiempos por cuadro en pantalla
   python run.py --version    Muestra la versión
         """
     )
@@ -156,6 +161,31 @@ Ejemplos de uso:
         help="Ejecutar tests del sistema"
     )
     
+    parser.add_argument(
+        "--fuente",
+        metavar="RUTA",
+        help="Usar un WAV/FLAC o un directorio de grabaciones como micrófono virtual"
+    )
+    
+    parser.add_argument(
+        "--velocidad",
+        type=float,
+        default=1.0,
+        help="Ritmo del micrófono virtual: 1 = tiempo real, 0 = sin esperas"
+    )
+    
+    parser.add_argument(
+        "--profile-ui",
+        action="store_true",
+        help="Medir tiempo por cuadro, pintado por widget y retraso del bucle de eventos (resumen en el log)"
+    )
+    
+    parser.add_argument(
+        "--profile-overlay",
+        action="store_true",
+        help="Mostrar las métricas de --profile-ui sobre la ventana"
+    )
+    
     parser.add_argument(
         "--version",
         action="store_true",
@@ -172,6 +202,11 @@ Ejemplos de uso:
     
     mostrar_banner()
     
+    # El servicio de lanzamiento se arranca ahora, con el proceso todavía pequeño
+    if not args.version:
+        from src.lanzador import iniciar_lanzador
+        iniciar_lanzador()
+    
     # Mostrar versión
     if args.version:
         print("Versión: 3.0.0 (OpenRouter Edition)")
@@ -192,6 +227,11 @@ Ejemplos de uso:
         
         print("✅ Configuración OK\n")
     
+    if args.fuente:
+        from src.fuentes_audio import crear_fuente, configurar_fuente_por_defecto
+        configurar_fuente_por_defecto(crear_fuente(args.fuente, velocidad=args.velocidad))
+        logger.info(f"Micrófono virtual: {args.fuente} (velocidad {args.velocidad})")
+    
     # Ejecutar modo seleccionado
     try:
         if args.test:
@@ -199,7 +239,7 @@ Ejemplos de uso:
         elif args.terminal:
             modo_terminal()
         else:
-            modo_interfaz()
+            modo_interfaz(perfil_ui=args.profile_ui, capa_perfil=args.profile_overlay)
     except KeyboardInterrupt:
         logger.info("Programa interrumpido por el usuario")
         print("\n\n👋 Programa interrumpido por el usuario")
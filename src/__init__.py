@@ -1,27 +1,39 @@
 """
 Paquete principal de Aura - Asistente de IA
+
+Los símbolos se importan al primer acceso, así importar un submódulo (o el
+registro de habilidades) no carga todas las habilidades.
 """
-from .cerebro_ia import generar_respuesta, verificar_conexion, obtener_info_api
-from .habilidades_sistema import abrir_programa, listar_programas_disponibles
-from .habilidades_web import abrir_pagina_web, buscar_en_google, listar_atajos_web
-from .main import hablar, escuchar, procesar_comando, modo_terminal, test_sistema
+import importlib
 
-__all__ = [
+_EXPORTACIONES = {
     # Cerebro IA
-    "generar_respuesta",
-    "verificar_conexion",
-    "obtener_info_api",
+    "generar_respuesta": ".cerebro_ia",
+    "verificar_conexion": ".cerebro_ia",
+    "obtener_info_api": ".cerebro_ia",
     # Habilidades Sistema
-    "abrir_programa",
-    "listar_programas_disponibles",
+    "abrir_programa": ".habilidades_sistema",
+    "listar_programas_disponibles": ".habilidades_sistema",
     # Habilidades Web
-    "abrir_pagina_web",
-    "buscar_en_google",
-    "listar_atajos_web",
+    "abrir_pagina_web": ".habilidades_web",
+    "buscar_en_google": ".habilidades_web",
+    "listar_atajos_web": ".habilidades_web",
+    # Registro de habilidades
+    "registro": ".registro_habilidades",
+    "registrar_habilidad": ".registro_habilidades",
+    "detectar_intencion": ".registro_habilidades",
     # Main
-    "hablar",
-    "escuchar",
-    "procesar_comando",
-    "modo_terminal",
-    "test_sistema",
-]
\ No newline at end of file
+    "hablar": ".main",
+    "escuchar": ".main",
+    "procesar_comando": ".main",
+    "modo_terminal": ".main",
+    "test_sistema": ".main",
+}
+
+__all__ = list(_EXPORTACIONES)
+
+
+def __getattr__(nombre):
+    if nombre in _EXPORTACIONES:
+        return getattr(importlib.import_module(_EXPORTACIONES[nombre], __name__), nombre)
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
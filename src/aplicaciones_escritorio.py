@@ -0,0 +1,377 @@
+"""
+Aplicaciones de escritorio - Índice de archivos .desktop (XDG, Linux)
+
+Recorre los directorios "applications" de XDG_DATA_HOME y XDG_DATA_DIRS y
+extrae de cada archivo .desktop el nombre (y su traducción), GenericName,
+Keywords y Exec. El resultado se guarda en un caché JSON compacto; en el
+siguiente arranque solo se vuelven a leer los directorios cuyo mtime cambió
+(instalar o desinstalar un programa modifica el directorio).
+
+Las consultas nunca esperan a esa revisión: alias() devuelve la última
+versión y, si toca revisar, lo hace en un hilo aparte.
+"""
+import os
+import re
+import json
+import time
+import shlex
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import (
+    CURRENT_OS, CACHE_DIR, APLICACIONES_INTERVALO_REVALIDACION
+)
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE = 3
+ARCHIVO_CACHE = CACHE_DIR / "aplicaciones.json"
+_CODIGOS_EXEC = re.compile(r"%[fFuUdDnNickvm]")
+# Programas que solo lanzan a otro: su nombre no identifica a la aplicación
+_LANZADORES = {"env", "flatpak", "snap", "sh", "bash", "python", "python3", "java", "wine", "gtk-launch"}
+
+
+def directorios_aplicaciones() -> List[str]:
+    """Directorios XDG "applications" en orden de precedencia"""
+    inicio = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    datos = os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share"
+    bases = [inicio] + datos.split(":") + [
+        os.path.expanduser("~/.local/share/flatpak/exports/share"),
+        "/var/lib/flatpak/exports/share",
+    ]
+    return list(dict.fromkeys(os.path.join(b, "applications") for b in bases if b))
+
+
+def idiomas_preferidos() -> List[str]:
+    """Claves de traducción a buscar: es_SV.UTF-8 → ["es_SV", "es"]"""
+    idioma = os.environ.get("LC_MESSAGES") or os.environ.get("LANG") or "es"
+    idioma = idioma.split(".")[0].split("@")[0]
+    return list(dict.fromkeys([idioma, idioma.split("_")[0]]))
+
+
+def programa_exec(exec_: str) -> Optional[str]:
+    """
+    Nombre del programa de una línea Exec, saltando los envoltorios:
+    'env LANG=C "/opt/Mi App/app" --x' → "app",
+    'flatpak run --command=gimp org.gimp.GIMP' → "gimp"
+
+    Returns:
+        str: Nombre del programa o None si no hay uno útil como alias
+    """
+    try:
+        partes = shlex.split(exec_)
+    except ValueError:
+        return None
+    if partes and os.path.basename(partes[0]) == "env":
+        partes = partes[1:]
+        while partes and (partes[0].startswith("-") or "=" in partes[0]):
+            partes.pop(0)
+    if len(partes) > 1 and os.path.basename(partes[0]) == "flatpak" and partes[1] == "run":
+        # El ID de flatpak ("com.spotify.Client") no sirve de alias; solo --command
+        comandos = [p.split("=", 1)[1] for p in partes[2:] if p.startswith("--command=")]
+        partes = comandos[:1]
+    if not partes:
+        return None
+    programa = os.path.basename(partes[0])
+    return None if programa in _LANZADORES else programa
+
+
+def leer_desktop(ruta: str, idiomas: List[str]) -> Optional[Tuple[str, List[str], str]]:
+    """
+    Lee la sección [Desktop Entry] de un archivo .desktop
+
+    Args:
+        ruta: Ruta del archivo
+        idiomas: Traducciones a incluir
+
+    Returns:
+        tuple: (nombre, alias, exec) o None si no es una aplicación visible
+    """
+    campos: Dict[str, str] = {}
+    seccion = False
+    try:
+        with open(ruta, encoding="utf-8", errors="replace") as f:
+            for linea in f:
+                linea = linea.strip()
+                if linea.startswith("["):
+                    if seccion:
+                        break
+                    seccion = linea == "[Desktop Entry]"
+                elif seccion and "=" in linea and not linea.startswith("#"):
+                    clave, valor = linea.split("=", 1)
+                    campos[clave.strip()] = valor.strip()
+    except OSError:
+        return None
+
+    if (campos.get("Type") != "Application" or campos.get("NoDisplay") == "true"
+            or campos.get("Hidden") == "true" or not campos.get("Exec") or not campos.get("Name")):
+        return None
+
+    def traducciones(campo):
+        return [campos[f"{campo}[{i}]"] for i in idiomas if f"{campo}[{i}]" in campos] + (
+            [campos[campo]] if campo in campos else [])
+
+    alias = traducciones("Name") + traducciones("GenericName")
+    for palabras in traducciones("Keywords"):
+        alias.extend(p for p in palabras.split(";") if p)
+    exec_ = _CODIGOS_EXEC.sub("", campos["Exec"]).replace("%%", "%")
+    exec_ = " ".join(exec_.split())
+    programa = programa_exec(exec_)
+    if programa:
+        alias.append(programa)
+    vistos = list(dict.fromkeys(a.strip().lower() for a in alias if a.strip()))
+    return traducciones("Name")[0], vistos, exec_
+
+
+# ============== ÍNDICE ==============
+class IndiceAplicaciones:
+    """Aplicaciones instaladas con caché en disco por directorio"""
+
+    def __init__(self, archivo_cache: Path = ARCHIVO_CACHE,
+                 intervalo: float = APLICACIONES_INTERVALO_REVALIDACION):
+        """
+        Args:
+            archivo_cache: Ruta del caché JSON
+            intervalo: Segundos mínimos entre revisiones de los directorios
+        """
+        self.archivo_cache = Path(archivo_cache)
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        # directorio → {"mtime": float, "archivos": {archivo: [mtime, id, nombre, alias, exec]}}
+        # (solo [mtime] si el archivo no es una aplicación visible)
+        self._directorios: Dict[str, dict] = {}
+        self._alias: Dict[str, str] = {}
+        self._revisado = None
+        self._hilo: Optional[threading.Thread] = None
+        self._lock_hilo = threading.Lock()
+        self.estadisticas = {"archivos_leidos": 0, "directorios_leidos": 0, "ultima_actualizacion_ms": 0.0}
+
+    # ---------- caché en disco ----------
+    def _cargar_cache(self):
+        try:
+            with open(self.archivo_cache, encoding="utf-8") as f:
+                datos = json.load(f)
+        except (OSError, ValueError):
+            return
+        if datos.get("version") == VERSION_CACHE and datos.get("idiomas") == idiomas_preferidos():
+            self._directorios = datos.get("directorios", {})
+
+    def _guardar_cache(self):
+        datos = {"version": VERSION_CACHE, "idiomas": idiomas_preferidos(), "directorios": self._directorios}
+        temporal = self.archivo_cache.with_suffix(".tmp")
+        try:
+            self.archivo_cache.parent.mkdir(parents=True, exist_ok=True)
+            with open(temporal, "w", encoding="utf-8") as f:
+                json.dump(datos, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(temporal, self.archivo_cache)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar el caché de aplicaciones: {e}")
+
+    # ---------- actualización incremental ----------
+    def actualizar(self, forzar: bool = False) -> bool:
+        """
+        Vuelve a leer solo los directorios cuyo mtime cambió
+
+        Args:
+            forzar: Revisar aunque no haya pasado el intervalo
+
+        Returns:
+            bool: True si cambió alguna aplicación
+        """
+        ahora = time.monotonic()
+        if not forzar and self._revisado is not None and ahora - self._revisado < self.intervalo:
+            return False
+        with self._lock:
+            inicio = time.perf_counter()
+            if self._revisado is None and not self._directorios:
+                self._cargar_cache()
+            idiomas = idiomas_preferidos()
+            actuales = {}
+            cambios = False
+            for raiz in directorios_aplicaciones():
+                # Cada subdirectorio tiene su propio mtime (applications/kde4/...)
+                for directorio, _, archivos in os.walk(raiz):
+                    try:
+                        mtime = os.stat(directorio).st_mtime
+                    except OSError:
+                        continue
+                    previo = self._directorios.get(directorio)
+                    if previo and previo["mtime"] == mtime:
+                        actuales[directorio] = previo
+                        continue
+                    # Dentro de un directorio cambiado solo se releen los archivos nuevos o modificados
+                    anteriores = previo["archivos"] if previo else {}
+                    nuevos = {}
+                    for archivo in archivos:
+                        if not archivo.endswith(".desktop"):
+                            continue
+                        ruta = os.path.join(directorio, archivo)
+                        try:
+                            mtime_archivo = os.stat(ruta).st_mtime
+                        except OSError:
+                            continue
+                        guardado = anteriores.get(archivo)
+                        if guardado and guardado[0] == mtime_archivo:
+                            nuevos[archivo] = guardado
+                            continue
+                        leido = leer_desktop(ruta, idiomas)
+                        self.estadisticas["archivos_leidos"] += 1
+                        # ID de escritorio: ruta relativa con "/" → "-"
+                        id_escritorio = os.path.relpath(ruta, raiz).replace(os.sep, "-")
+                        nuevos[archivo] = [mtime_archivo, id_escritorio, *leido] if leido else [mtime_archivo]
+                    actuales[directorio] = {"mtime": mtime, "archivos": nuevos}
+                    self.estadisticas["directorios_leidos"] += 1
+                    cambios = True
+            if set(actuales) != set(self._directorios):
+                cambios = True
+            self._directorios = actuales
+            if cambios or not self._alias:
+                self._alias = self._construir_alias()
+            if cambios:
+                self._guardar_cache()
+            self._revisado = ahora
+            self.estadisticas["ultima_actualizacion_ms"] = (time.perf_counter() - inicio) * 1000
+            return cambios
+
+    def _construir_alias(self) -> Dict[str, str]:
+        # Precedencia XDG: el primer directorio gana para un mismo ID; los
+        # nombres propios ganan a GenericName/Keywords de otras aplicaciones
+        aplicaciones: Dict[str, Tuple[str, List[str], str]] = {}
+        for id_escritorio, entrada in self._entradas():
+            aplicaciones.setdefault(id_escritorio, entrada)
+        alias: Dict[str, str] = {}
+        for nombre, _, exec_ in aplicaciones.values():
+            alias.setdefault(nombre.lower(), exec_)
+        for _, otros, exec_ in aplicaciones.values():
+            for a in otros:
+                alias.setdefault(a, exec_)
+        return alias
+
+    def actualizar_en_segundo_plano(self) -> Optional[threading.Thread]:
+        """
+        Lanza actualizar() en un hilo si pasó el intervalo y no hay otra en curso
+
+        Returns:
+            Thread: Hilo de la actualización o None si no hacía falta
+        """
+        with self._lock_hilo:
+            if self._hilo is not None and self._hilo.is_alive():
+                return self._hilo
+            if self._revisado is not None and time.monotonic() - self._revisado < self.intervalo:
+                return None
+            self._hilo = threading.Thread(target=self.actualizar, daemon=True, name="indice-aplicaciones")
+            self._hilo.start()
+            return self._hilo
+
+    def _arrancar(self):
+        # Primera consulta: basta el caché en disco; solo sin caché se indexa aquí
+        with self._lock:
+            if not self._directorios:
+                self._cargar_cache()
+            if self._directorios and not self._alias:
+                self._alias = self._construir_alias()
+        if not self._alias:
+            self.actualizar(forzar=True)
+
+    # ---------- consultas ----------
+    def alias(self) -> Dict[str, str]:
+        """
+        Alias de la última revisión, sin esperar a los directorios
+
+        Returns:
+            dict: {alias: comando Exec}; el mismo objeto mientras no cambie nada
+                (el índice difuso detecta así que hay una versión nueva)
+        """
+        if self._revisado is None and not self._alias:
+            self._arrancar()
+        self.actualizar_en_segundo_plano()
+        return self._alias
+
+    def aplicaciones(self) -> List[Tuple[str, str]]:
+        """Lista de (nombre, exec) de las aplicaciones indexadas"""
+        if self._revisado is None and not self._alias:
+            self._arrancar()
+        self.actualizar_en_segundo_plano()
+        vistas = {}
+        for id_escritorio, (nombre, _, exec_) in self._entradas():
+            vistas.setdefault(id_escritorio, (nombre, exec_))
+        return sorted(vistas.values())
+
+    def _entradas(self):
+        # (id, (nombre, alias, exec)) en orden de precedencia XDG
+        for datos in self._directorios.values():
+            for guardado in datos["archivos"].values():
+                if len(guardado) > 1:
+                    yield guardado[1], guardado[2:]
+
+
+_indice = None
+
+
+def obtener_indice_aplicaciones() -> IndiceAplicaciones:
+    global _indice
+    if _indice is None:
+        _indice = IndiceAplicaciones()
+    return _indice
+
+
+def alias_aplicaciones() -> Dict[str, str]:
+    """Alias de las aplicaciones instaladas ({} fuera de Linux)"""
+    if CURRENT_OS != "Linux":
+        return {}
+    return obtener_indice_aplicaciones().alias()
+
+
+# ============== BENCHMARK ==============
+if __name__ == "__main__":
+    import tempfile
+
+    print("=" * 60)
+    print("🗂️  ÍNDICE DE APLICACIONES (.desktop)")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as temporal:
+        # Aplicaciones de ejemplo además de las del sistema
+        ejemplo = os.path.join(temporal, "applications")
+        os.makedirs(ejemplo)
+        for i in range(300):
+            with open(os.path.join(ejemplo, f"app{i}.desktop"), "w") as f:
+                f.write(f"[Desktop Entry]\nType=Application\nName=Aplicación {i}\n"
+                        f"Name[es]=Aplicación {i}\nGenericName=Herramienta\nKeywords=prueba;{i};\nExec=app{i} %U\n")
+        os.environ["XDG_DATA_HOME"] = temporal
+        cache = Path(temporal) / "aplicaciones.json"
+
+        indice = IndiceAplicaciones(cache, intervalo=0)
+        inicio = time.perf_counter()
+        indice.actualizar()
+        print(f"\n❄️  Primera indexación: {(time.perf_counter() - inicio) * 1000:.1f} ms, "
+              f"{indice.estadisticas['archivos_leidos']} archivos, {len(indice.alias())} alias")
+        print(f"💾 Caché: {cache.stat().st_size / 1024:.1f} KB")
+
+        indice = IndiceAplicaciones(cache, intervalo=0)
+        inicio = time.perf_counter()
+        indice.actualizar()
+        print(f"♻️  Arranque con caché: {(time.perf_counter() - inicio) * 1000:.1f} ms, "
+              f"{indice.estadisticas['archivos_leidos']} archivos leídos")
+
+        time.sleep(0.01)
+        with open(os.path.join(ejemplo, "spotify.desktop"), "w") as f:
+            f.write("[Desktop Entry]\nType=Application\nName=Spotify\nExec=spotify %U\n")
+        inicio = time.perf_counter()
+        indice.actualizar()
+        print(f"➕ Tras instalar una aplicación: {(time.perf_counter() - inicio) * 1000:.1f} ms, "
+              f"{indice.estadisticas['archivos_leidos']} archivos leídos en total")
+        print(f"   'spotify' → {indice.alias().get('spotify')}")
+
+        inicio = time.perf_counter()
+        indice.alias()
+        print(f"⚡ alias() con revisión pendiente: {(time.perf_counter() - inicio) * 1000:.2f} ms "
+              f"(la revisión sigue en segundo plano)")
+        if indice._hilo:
+            indice._hilo.join()
+
+        for linea in ('env LANG=C "/opt/Mi App/mi-app" --x', "flatpak run --branch=stable com.spotify.Client",
+                      "flatpak run --command=gimp org.gimp.GIMP", "sh -c 'echo hola'"):
+            print(f"   Exec {linea!r} → {programa_exec(linea)}")
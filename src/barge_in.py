@@ -0,0 +1,289 @@
+"""
+Barge-in - Interrumpir a Aurora hablando por encima de ella
+
+Mientras se reproduce una respuesta el micrófono sigue abierto. Como la
+señal reproducida se conoce, se resta del audio capturado con un filtro
+adaptativo NLMS por bloques (vectorizado con NumPy) y una compuerta
+referenciada decide si el residuo es la voz del usuario. Al detectarla se
+corta la reproducción y se graba la frase que la interrumpió.
+"""
+import time
+import shutil
+import logging
+import threading
+import subprocess
+from collections import deque
+from typing import Callable, Optional
+
+import speech_recognition as sr
+
+from config.settings import (
+    BARGE_IN_UMBRAL, BARGE_IN_BLOQUES_ACTIVACION, PHRASE_TIME_LIMIT
+)
+
+logger = logging.getLogger(__name__)
+
+# Importaciones opcionales
+NUMPY_AVAILABLE = False
+try:
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+    NUMPY_AVAILABLE = True
+except ImportError:
+    logger.debug("NumPy no disponible")
+
+PYAUDIO_AVAILABLE = False
+try:
+    import pyaudio
+    PYAUDIO_AVAILABLE = True
+except ImportError:
+    logger.debug("PyAudio no disponible")
+
+FRECUENCIA = 16000        # Hz, mono, 16 bits
+MUESTRAS_BLOQUE = 320     # 20 ms por bloque
+PAUSA_FIN_FRASE = 0.8     # Segundos de silencio que cierran la frase interruptora
+PRERROLL_BLOQUES = 15     # 300 ms de audio previos a la detección
+
+
+def barge_in_disponible() -> bool:
+    """Retorna True si hay NumPy, PyAudio y un decodificador de MP3"""
+    return NUMPY_AVAILABLE and PYAUDIO_AVAILABLE and _comando_decodificador("x") is not None
+
+
+def _comando_decodificador(ruta):
+    if shutil.which("ffmpeg"):
+        return ["ffmpeg", "-loglevel", "quiet", "-i", str(ruta),
+                "-f", "s16le", "-ac", "1", "-ar", str(FRECUENCIA), "-"]
+    if shutil.which("mpg123"):
+        return ["mpg123", "-q", "-m", "-r", str(FRECUENCIA), "-s", str(ruta)]
+    return None
+
+
+def decodificar_audio(ruta):
+    """
+    Decodifica un MP3 a PCM mono de 16 bits a FRECUENCIA Hz
+
+    Args:
+        ruta: Archivo de audio generado por la síntesis
+
+    Returns:
+        np.ndarray: Muestras int16, o None si no hay decodificador
+    """
+    cmd = _comando_decodificador(ruta)
+    if cmd is None or not NUMPY_AVAILABLE:
+        return None
+    try:
+        salida = subprocess.run(cmd, capture_output=True, check=True, timeout=30).stdout
+    except Exception as e:
+        logger.error(f"No se pudo decodificar {ruta}: {e}")
+        return None
+    return np.frombuffer(salida, dtype=np.int16)
+
+
+# ============== SEÑAL DE REFERENCIA ==============
+class ReferenciaReproduccion:
+    """Señal que se está reproduciendo, indexada por el instante de reproducción"""
+
+    def __init__(self, pcm):
+        self.pcm = pcm.astype(np.float32)
+        self.inicio = None
+        self.latencia = 0.0
+
+    def marcar_inicio(self, latencia_salida: float):
+        self.latencia = latencia_salida
+        self.inicio = time.perf_counter()
+
+    def bloque(self, instante: float, n: int):
+        """
+        Muestras que sonaban por el altavoz en `instante` (ceros fuera de rango)
+
+        Args:
+            instante: time.perf_counter() del primer sample capturado
+            n: Cantidad de muestras
+        """
+        salida = np.zeros(n, dtype=np.float32)
+        if self.inicio is None:
+            return salida
+        desde = int((instante - self.inicio - self.latencia) * FRECUENCIA)
+        hasta = desde + n
+        a, b = max(desde, 0), min(hasta, len(self.pcm))
+        if a < b:
+            salida[a - desde:b - desde] = self.pcm[a:b]
+        return salida
+
+
+# ============== CANCELACIÓN DE ECO ==============
+class SupresorEco:
+    """Filtro adaptativo NLMS por bloques: estima el eco y lo resta de la captura"""
+
+    def __init__(self, taps: int = 512, mu: float = 0.3, eps: float = 1e-3):
+        """
+        Args:
+            taps: Longitud del filtro (512 = 32 ms de trayecto de eco)
+            mu: Paso de adaptación (0 < mu < 1)
+            eps: Regularización para referencias casi silenciosas
+        """
+        self.taps = taps
+        self.mu = mu
+        self.eps = eps
+        self.w = np.zeros(taps, dtype=np.float32)
+        self._historial = np.zeros(taps - 1, dtype=np.float32)
+
+    def procesar(self, captura, referencia):
+        """
+        Args:
+            captura: Bloque del micrófono (float32)
+            referencia: Bloque alineado de la señal reproducida (float32)
+
+        Returns:
+            np.ndarray: Residuo = captura - eco estimado
+        """
+        x = np.concatenate([self._historial, referencia])
+        # Fila i = [x[i+taps-1], x[i+taps-2], ..., x[i]]: ventana causal de la referencia
+        X = sliding_window_view(x, self.taps)[:, ::-1]
+        eco = X @ self.w
+        residuo = captura - eco
+        self.w += self.mu * (X.T @ residuo) / (float(np.dot(x, x)) + self.eps)
+        self._historial = x[-(self.taps - 1):]
+        return residuo
+
+
+class CompuertaVoz:
+    """Decide si el residuo contiene voz del usuario comparándolo con la referencia"""
+
+    def __init__(self, umbral: float = BARGE_IN_UMBRAL, factor: float = 3.0,
+                 bloques_activacion: int = BARGE_IN_BLOQUES_ACTIVACION):
+        """
+        Args:
+            umbral: RMS mínimo (unidades int16) para considerar que hay voz
+            factor: Margen sobre el eco residual esperado
+            bloques_activacion: Bloques consecutivos con voz para disparar
+        """
+        self.umbral = umbral
+        self.factor = factor
+        self.bloques_activacion = bloques_activacion
+        self.acoplamiento = 0.5  # RMS residuo / RMS referencia cuando solo habla Aurora
+        self._consecutivos = 0
+
+    def evaluar(self, residuo, referencia) -> bool:
+        rms_residuo = float(np.sqrt(np.mean(residuo * residuo)))
+        rms_referencia = float(np.sqrt(np.mean(referencia * referencia)))
+        limite = max(self.umbral, self.factor * self.acoplamiento * rms_referencia)
+        if rms_residuo > limite:
+            self._consecutivos += 1
+        else:
+            self._consecutivos = 0
+            if rms_referencia > 1.0:
+                ratio = min(rms_residuo / rms_referencia, 2.0)
+                self.acoplamiento = 0.95 * self.acoplamiento + 0.05 * ratio
+        return self._consecutivos >= self.bloques_activacion
+
+
+# ============== REPRODUCCIÓN ==============
+def reproducir_con_referencia(pcm, referencia: ReferenciaReproduccion, detener: threading.Event) -> bool:
+    """
+    Reproduce PCM con PyAudio marcando el instante de inicio en la referencia
+
+    Args:
+        pcm: Muestras int16 a FRECUENCIA Hz
+        referencia: Referencia que usará el monitor
+        detener: Evento que corta la reproducción en el siguiente bloque
+
+    Returns:
+        bool: True si se reprodujo completa
+    """
+    pa = pyaudio.PyAudio()
+    stream = pa.open(format=pyaudio.paInt16, channels=1, rate=FRECUENCIA,
+                     output=True, frames_per_buffer=MUESTRAS_BLOQUE)
+    completa = True
+    try:
+        referencia.marcar_inicio(stream.get_output_latency())
+        for i in range(0, len(pcm), MUESTRAS_BLOQUE):
+            if detener.is_set():
+                completa = False
+                break
+            stream.write(pcm[i:i + MUESTRAS_BLOQUE].tobytes())
+    finally:
+        stream.stop_stream()
+        stream.close()
+        pa.terminate()
+    return completa
+
+
+# ============== MONITOR ==============
+class MonitorBargeIn(threading.Thread):
+    """Escucha durante la reproducción y entrega la frase que la interrumpe"""
+
+    def __init__(self, referencia: ReferenciaReproduccion,
+                 on_interrupcion: Callable[[], None],
+                 on_frase: Callable[[sr.AudioData], None],
+                 umbral: float = BARGE_IN_UMBRAL):
+        """
+        Args:
+            referencia: Señal en reproducción
+            on_interrupcion: Se llama al detectar voz (debe cortar la reproducción)
+            on_frase: Recibe la frase completa del usuario como AudioData
+            umbral: RMS mínimo de voz
+        """
+        super().__init__(name="voz-barge-in", daemon=True)
+        self.referencia = referencia
+        self.on_interrupcion = on_interrupcion
+        self.on_frase = on_frase
+        self.umbral = umbral
+        self.supresor = SupresorEco()
+        self.compuerta = CompuertaVoz(umbral)
+        self.interrumpido = threading.Event()
+        self._detener = threading.Event()
+        self.latencia_deteccion = None
+
+    def detener(self, timeout: float = 0.5):
+        """Termina la escucha si todavía no se detectó voz"""
+        if not self.interrumpido.is_set():
+            self._detener.set()
+            self.join(timeout)
+
+    def run(self):
+        try:
+            pa = pyaudio.PyAudio()
+            stream = pa.open(format=pyaudio.paInt16, channels=1, rate=FRECUENCIA,
+                             input=True, frames_per_buffer=MUESTRAS_BLOQUE)
+        except Exception as e:
+            logger.error(f"Barge-in: no se pudo abrir el micrófono: {e}")
+            return
+        try:
+            latencia_entrada = stream.get_input_latency()
+            bloque_s = MUESTRAS_BLOQUE / FRECUENCIA
+            previos = deque(maxlen=PRERROLL_BLOQUES)
+            while not self._detener.is_set():
+                datos = stream.read(MUESTRAS_BLOQUE, exception_on_overflow=False)
+                instante = time.perf_counter() - latencia_entrada - bloque_s
+                captura = np.frombuffer(datos, dtype=np.int16).astype(np.float32)
+                referencia = self.referencia.bloque(instante, len(captura))
+                residuo = self.supresor.procesar(captura, referencia)
+                previos.append(residuo)
+                if self.compuerta.evaluar(residuo, referencia):
+                    self.latencia_deteccion = self.compuerta.bloques_activacion * bloque_s
+                    self.interrumpido.set()
+                    logger.info("Barge-in: voz detectada, cortando reproducción")
+                    self.on_interrupcion()
+                    self._grabar_frase(stream, list(previos))
+                    return
+        finally:
+            stream.stop_stream()
+            stream.close()
+            pa.terminate()
+
+    def _grabar_frase(self, stream, previos):
+        """Graba hasta PAUSA_FIN_FRASE de silencio; la reproducción ya está cortada"""
+        bloques = previos
+        silencio = 0
+        max_bloques = int(PHRASE_TIME_LIMIT * FRECUENCIA / MUESTRAS_BLOQUE)
+        pausa_bloques = int(PAUSA_FIN_FRASE * FRECUENCIA / MUESTRAS_BLOQUE)
+        while len(bloques) < max_bloques and silencio < pausa_bloques:
+            datos = stream.read(MUESTRAS_BLOQUE, exception_on_overflow=False)
+            captura = np.frombuffer(datos, dtype=np.int16).astype(np.float32)
+            bloques.append(captura)
+            rms = float(np.sqrt(np.mean(captura * captura)))
+            silencio = 0 if rms > self.umbral else silencio + 1
+        pcm = np.clip(np.concatenate(bloques), -32768, 32767).astype(np.int16)
+        self.on_frase(sr.AudioData(pcm.tobytes(), FRECUENCIA, 2))
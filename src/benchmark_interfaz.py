@@ -0,0 +1,203 @@
+"""
+Benchmark de la interfaz sin pantalla - Tiempos por cuadro de cada pantalla
+
+Abre la ventana con QT_QPA_PLATFORM=offscreen, recorre las pantallas y
+deja correr las animaciones mientras PerfilUI cronometra los cuadros:
+
+- selector: pantalla inicial con el fondo animado
+- chat:     N mensajes (con markdown), desplazándose cada 16 ms y con el
+            indicador de "escribiendo" activo
+- voz:      botón líquido animado y estado cambiando
+
+Además informa de lo que tardó cada pantalla en construirse la primera vez
+y de lo que cuesta después cambiar entre ellas (solo voltear la página).
+
+Uso:
+    python -m src.benchmark_interfaz --mensajes 2000 --duracion 3
+    python -m src.benchmark_interfaz --json logs/benchmark_ui.json   # para comparar
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("HISTORIAL_DB", ":memory:")   # Sin tocar el historial real
+
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QApplication
+
+logger = logging.getLogger(__name__)
+
+RESPUESTA_MARKDOWN = (
+    "Claro, estos son los **pasos**:\n\n"
+    "1. Abre `config/settings.py`\n"
+    "2. Cambia el valor y guarda\n\n"
+    "```python\nWINDOW_WIDTH = 1100\n```\n\n"
+    "Después reinicia Aurora."
+)
+
+
+def mensajes_de_prueba(n: int):
+    """Conversación sintética: preguntas cortas y respuestas de varios tamaños"""
+    mensajes = []
+    for i in range(n):
+        if i % 2 == 0:
+            mensajes.append((f"Pregunta número {i}: ¿cómo abro el navegador?", True))
+        elif i % 6 == 1:
+            mensajes.append((RESPUESTA_MARKDOWN, False))
+        else:
+            mensajes.append((f"Respuesta {i}. " + "Texto de la respuesta que ocupa varias líneas. " * (1 + i % 4), False))
+    return mensajes
+
+
+def esperar(app, segundos: float):
+    fin = time.perf_counter() + segundos
+    while time.perf_counter() < fin:
+        app.processEvents()
+        time.sleep(0.001)
+
+
+# ============== ESCENARIOS ==============
+def escenario_selector(app, ventana, duracion):
+    ventana.mostrar_selector_modo()
+    esperar(app, duracion)
+
+
+def escenario_chat(app, ventana, duracion, mensajes):
+    ventana.mostrar_modo_chat()
+    ventana.chat_view.modelo.agregar_varios(mensajes_de_prueba(mensajes))
+    ventana.mostrar_typing_indicator()
+    barra = ventana.chat_view.verticalScrollBar()
+    barra.setValue(barra.maximum())
+
+    def desplazar():
+        # Hacia arriba a ritmo de rueda; al llegar arriba, vuelta al final
+        barra.setValue(barra.value() - 60 if barra.value() > 0 else barra.maximum())
+
+    timer = QTimer()
+    timer.timeout.connect(desplazar)
+    timer.start(16)
+    esperar(app, duracion)
+    timer.stop()
+    ventana.ocultar_typing_indicator()
+
+
+def escenario_voz(app, ventana, duracion):
+    ventana.mostrar_modo_voz()
+    ventana.liquid_button.setText("DETENER")
+    ventana.liquid_button.start_animation()
+    estados = ["🎤 Escuchando...", "🧠 Procesando...", "🔊 Hablando..."]
+    contador = [0]
+
+    def cambiar_estado():
+        contador[0] += 1
+        ventana.actualizar_estado_voz(estados[contador[0] % len(estados)])
+
+    timer = QTimer()
+    timer.timeout.connect(cambiar_estado)
+    timer.start(250)
+    esperar(app, duracion)
+    timer.stop()
+    ventana.liquid_button.stop_animation()
+
+
+def medir_cambios(app, ventana, ciclos: int = 20):
+    """Cambios selector → chat → voz ya construidos, hasta pintar cada página"""
+    cambios = {"selector": [], "chat": [], "voz": []}
+    pantallas = {"selector": ventana.mostrar_selector_modo, "chat": ventana.mostrar_modo_chat,
+                 "voz": ventana.mostrar_modo_voz}
+    for _ in range(ciclos):
+        for nombre, mostrar in pantallas.items():
+            inicio = time.perf_counter()
+            mostrar()
+            ventana.repaint()
+            cambios[nombre].append((time.perf_counter() - inicio) * 1000)
+            app.processEvents()
+    return {nombre: {"p50": sorted(tiempos)[len(tiempos) // 2], "max": max(tiempos)}
+            for nombre, tiempos in cambios.items()}
+
+
+def ejecutar(mensajes: int = 1000, duracion: float = 3.0):
+    """
+    Args:
+        mensajes: Mensajes en la pantalla de chat
+        duracion: Segundos medidos por escenario
+
+    Returns:
+        dict: "escenarios" (escenario → resumen de PerfilUI), "construccion_ms"
+            (pantalla → primera construcción) y "cambio_ms" (pantalla → p50/max)
+    """
+    from src import interfaz
+    from src.perfil_ui import PerfilUI
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    # Sin síntesis de voz (el saludo del modo voz usaría la red y el altavoz)
+    interfaz.hablar_interruptible = lambda texto: None
+
+    ventana = interfaz.AuroraWindow()
+    perfil = PerfilUI(parent=app)
+    perfil.observar(ventana)
+    perfil.iniciar()
+    ventana.show()
+    esperar(app, 0.5)
+
+    escenarios = {
+        "selector": lambda: escenario_selector(app, ventana, duracion),
+        f"chat ({mensajes} mensajes)": lambda: escenario_chat(app, ventana, duracion, mensajes),
+        "voz": lambda: escenario_voz(app, ventana, duracion),
+    }
+    resultados = {}
+    for nombre, escenario in escenarios.items():
+        perfil.limpiar()
+        inicio = time.perf_counter()
+        escenario()
+        transcurrido = time.perf_counter() - inicio
+        resumen = perfil.resumen()
+        resumen["fps"] = perfil.cuadros.total / transcurrido
+        resumen["mas_lentos"] = perfil.widgets_mas_lentos()
+        resultados[nombre] = resumen
+
+    perfil.detener()
+    cambios = medir_cambios(app, ventana)
+    ventana.close()
+    return {"escenarios": resultados, "construccion_ms": dict(ventana.tiempos_paginas), "cambio_ms": cambios}
+
+
+def imprimir(resultados):
+    escenarios = resultados["escenarios"]
+    print("=" * 78)
+    print("⏱️ BENCHMARK DE LA INTERFAZ (offscreen)")
+    print("=" * 78)
+    print(f"\n   {'Escenario':24} {'cuadros':>8} {'FPS':>6} {'p50 ms':>8} {'p99 ms':>8} {'retraso p99':>12}")
+    for nombre, datos in escenarios.items():
+        cuadro = datos["cuadro_ms"]
+        print(f"   {nombre:24} {cuadro['n']:>8} {datos['fps']:>6.0f} {cuadro['p50']:>8.2f} "
+              f"{cuadro['p99']:>8.2f} {datos['retraso_ms']['p99']:>9.1f} ms")
+    print("\n   Pintado más caro (p99):")
+    for nombre, datos in escenarios.items():
+        lentos = ", ".join(f"{clase} {p99:.2f} ms" for clase, p99 in datos["mas_lentos"])
+        print(f"   {nombre:24} {lentos}")
+    print(f"\n   {'Pantalla':24} {'construcción':>13} {'cambio p50':>11} {'cambio máx':>11}")
+    for nombre, construccion in resultados["construccion_ms"].items():
+        cambio = resultados["cambio_ms"][nombre]
+        print(f"   {nombre:24} {construccion:>10.1f} ms {cambio['p50']:>8.2f} ms {cambio['max']:>8.2f} ms")
+
+
+# ============== MAIN ==============
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tiempos por cuadro de las pantallas de Aurora sin pantalla")
+    parser.add_argument("--mensajes", type=int, default=1000, help="Mensajes en la pantalla de chat")
+    parser.add_argument("--duracion", type=float, default=3.0, help="Segundos medidos por escenario")
+    parser.add_argument("--json", metavar="RUTA", help="Guardar los resultados para comparar ejecuciones")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    resultados = ejecutar(args.mensajes, args.duracion)
+    imprimir(resultados)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as archivo:
+            json.dump(resultados, archivo, indent=2, ensure_ascii=False)
+        print(f"\n💾 Resultados en {args.json}")
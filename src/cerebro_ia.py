@@ -2,6 +2,7 @@
 Cerebro de IA - Integración con OpenRouter
 """
 import logging
+from typing import Iterator
 from config.openrouter_client import is_api_configured, get_client
 from config.settings import ASSISTANT_PROMPT
 
@@ -48,6 +49,46 @@ def generar_respuesta(pregunta: str) -> str:
         return f"Lo siento, ocurrió un error al procesar tu solicitud: {str(e)}"
 
 
+def generar_respuesta_stream(pregunta: str) -> Iterator[str]:
+    """
+    Genera la respuesta por fragmentos a medida que llega de OpenRouter
+
+    Args:
+        pregunta: Pregunta o comando del usuario
+
+    Yields:
+        str: Fragmentos de la respuesta (o el mensaje de error completo)
+    """
+    if not is_api_configured():
+        yield generar_respuesta(pregunta)
+        return
+
+    try:
+        logger.info(f"Generando respuesta (streaming) para: {pregunta[:50]}...")
+        messages = [
+            {"role": "system", "content": ASSISTANT_PROMPT},
+            {"role": "user", "content": pregunta},
+        ]
+        recibido = False
+        for chunk in get_client().chat(messages, stream=True):
+            if not chunk.choices:
+                continue
+            fragmento = chunk.choices[0].delta.content
+            if fragmento:
+                recibido = True
+                yield fragmento
+
+        if not recibido:
+            logger.warning("Respuesta vacía recibida")
+            yield "Lo siento, no pude generar una respuesta. ¿Podrías reformular tu pregunta?"
+            return
+        logger.info("Respuesta generada exitosamente")
+
+    except Exception as e:
+        logger.error(f"Error al generar respuesta: {e}")
+        yield f"Lo siento, ocurrió un error al procesar tu solicitud: {str(e)}"
+
+
 def verificar_conexion() -> bool:
     """
     Verifica que la conexión con OpenRouter esté funcionando
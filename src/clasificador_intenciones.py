@@ -0,0 +1,411 @@
+"""
+Clasificador local de intenciones - Evita la IA en peticiones habituales
+
+Cuando ningún disparador exacto coincide, el comando se compara con las
+frases de ejemplo de config/intenciones.yaml usando n-gramas de caracteres
+ponderados (TF-IDF) y similitud coseno con NumPy; la confianza de cada
+intención es la similitud con su ejemplo más parecido. Si supera
+CLASIFICADOR_UMBRAL se ejecuta la habilidad o la respuesta fija asociada;
+si no, la petición sigue a la IA como siempre.
+
+Equivocarse de acción es peor que preguntar a la IA, así que:
+- las intenciones que actúan sobre el sistema ("sistema: true", p. ej. el
+  volumen) exigen CLASIFICADOR_UMBRAL_SISTEMA y CLASIFICADOR_MARGEN_SISTEMA
+- cada intención puede llevar "negativos": frases parecidas que NO son
+  ella; si el comando se parece más a una de ellas que a cualquiera de sus
+  ejemplos, se descarta
+- las intenciones con "variantes" (subir, bajar o silenciar el volumen)
+  eligen sus slots por palabras del comando: frases tan parecidas como
+  "sube" y "baja el volumen" no se separan por similitud; si no aparece
+  ninguna variante, o aparecen varias, decide la IA
+- las respuestas fijas (saludo, gracias...) no se dan a frases bastante más
+  largas que sus ejemplos: "gracias a qué se forma el arcoíris" es una
+  pregunta, no un agradecimiento
+"""
+import re
+import time
+import random
+import logging
+import threading
+from typing import Optional, Dict, Any, List
+
+from config.settings import (
+    ASSISTANT_NAME, CLASIFICADOR_EJEMPLOS, CLASIFICADOR_UMBRAL, CLASIFICADOR_MARGEN,
+    CLASIFICADOR_UMBRAL_SISTEMA, CLASIFICADOR_MARGEN_SISTEMA
+)
+from src.indice_difuso import normalizar
+
+logger = logging.getLogger(__name__)
+
+# Importaciones opcionales
+NUMPY_AVAILABLE = False
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    logger.debug("NumPy no disponible, clasificador local desactivado")
+
+YAML_AVAILABLE = False
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except ImportError:
+    logger.debug("PyYAML no disponible, clasificador local desactivado")
+
+ETIQUETA_IA = "ia"
+TAMANOS_NGRAMA = (2, 3, 4)
+PALABRAS_EXTRA_RESPUESTA = 1   # Palabras de más (sobre el ejemplo más largo) que admite una respuesta fija
+
+
+def ngramas(texto: str) -> List[str]:
+    """N-gramas de caracteres con bordes de palabra marcados por espacios"""
+    texto = f" {normalizar(texto)} "
+    return [texto[i:i + n] for n in TAMANOS_NGRAMA for i in range(len(texto) - n + 1)]
+
+
+# ============== RESULTADO ==============
+class Clasificacion:
+    """Intención predicha con su acción"""
+
+    __slots__ = ("intencion", "confianza", "habilidad", "slots", "respuesta", "duracion_ms")
+
+    def __init__(self, intencion, confianza, habilidad=None, slots=None, respuesta=None, duracion_ms=0.0):
+        self.intencion = intencion
+        self.confianza = confianza
+        self.habilidad = habilidad      # Nombre en el registro de habilidades
+        self.slots = slots or {}
+        self.respuesta = respuesta      # Respuesta fija (si no hay habilidad)
+        self.duracion_ms = duracion_ms
+
+    def __repr__(self):
+        return f"Clasificacion({self.intencion!r}, confianza={self.confianza:.2f})"
+
+
+# ============== CLASIFICADOR ==============
+class ClasificadorIntenciones:
+    """Vecino más cercano entre los ejemplos TF-IDF de n-gramas de caracteres"""
+
+    def __init__(self, intenciones: Dict[str, Dict[str, Any]],
+                 umbral: float = CLASIFICADOR_UMBRAL, margen: float = CLASIFICADOR_MARGEN,
+                 umbral_sistema: float = CLASIFICADOR_UMBRAL_SISTEMA,
+                 margen_sistema: float = CLASIFICADOR_MARGEN_SISTEMA):
+        """
+        Args:
+            intenciones: {nombre: {"ejemplos": [...], "negativos": [...], "sistema": bool,
+                "habilidad"/"slots"/"variantes" o "respuestas"}}
+            umbral: Similitud mínima para actuar sin la IA
+            margen: Ventaja mínima sobre la segunda intención
+            umbral_sistema: Umbral de las intenciones con "sistema: true"
+            margen_sistema: Margen de las intenciones con "sistema: true"
+        """
+        self.umbral = umbral
+        self.margen = margen
+        self.umbral_sistema = umbral_sistema
+        self.margen_sistema = margen_sistema
+        self.intenciones = intenciones
+        self.etiquetas = list(intenciones)
+        self._lock = threading.Lock()
+        self._contadores = {"consultas": 0, "desviadas": 0}
+        self._por_intencion: Dict[str, int] = {}
+        self._tiempo_total = 0.0
+        self._entrenar()
+
+    @classmethod
+    def desde_yaml(cls, ruta, **opciones) -> "ClasificadorIntenciones":
+        with open(ruta, encoding="utf-8") as f:
+            datos = yaml.safe_load(f) or {}
+        return cls(datos.get("intenciones", {}), **opciones)
+
+    def _entrenar(self):
+        inicio = time.perf_counter()
+        ejemplos, clases = [], []
+        for i, etiqueta in enumerate(self.etiquetas):
+            for ejemplo in self.intenciones[etiqueta].get("ejemplos", []):
+                ejemplos.append(ngramas(str(ejemplo)))
+                clases.append(i)
+
+        self.vocabulario: Dict[str, int] = {}
+        for grams in ejemplos:
+            for g in grams:
+                self.vocabulario.setdefault(g, len(self.vocabulario))
+
+        conteos = np.zeros((len(ejemplos), len(self.vocabulario)), dtype=np.float32)
+        for fila, grams in enumerate(ejemplos):
+            for g in grams:
+                conteos[fila, self.vocabulario[g]] += 1
+        # IDF por intención: los n-gramas presentes en muchas intenciones
+        # ("el volumen") pesan menos que los que las distinguen ("sube", "baja")
+        presencia = np.zeros((len(self.etiquetas), len(self.vocabulario)), dtype=bool)
+        np.logical_or.at(presencia, np.asarray(clases), conteos > 0)
+        intenciones = presencia.sum(axis=0)
+        self.idf = (np.log((1 + len(self.etiquetas)) / (1 + intenciones)) + 1).astype(np.float32)
+        # Un vector por ejemplo, agrupados por intención (las clases ya van en orden)
+        self.matriz = self._normalizar_filas(np.log1p(conteos) * self.idf)
+        self.clases = np.asarray(clases)
+        self.inicios = np.searchsorted(self.clases, np.arange(len(self.etiquetas)))
+        self.con_ejemplos = np.bincount(self.clases, minlength=len(self.etiquetas)) > 0
+
+        # Límites por intención: umbral, margen, palabras máximas y negativos
+        self.limites, self.max_palabras, self.negativos = [], [], []
+        for i, etiqueta in enumerate(self.etiquetas):
+            definicion = self.intenciones[etiqueta]
+            if definicion.get("sistema"):
+                self.limites.append((self.umbral_sistema, self.margen_sistema))
+            else:
+                self.limites.append((self.umbral, self.margen))
+            if definicion.get("respuestas"):
+                palabras = max((len(normalizar(str(e)).split()) for e in definicion.get("ejemplos", [])), default=0)
+                self.max_palabras.append(palabras + PALABRAS_EXTRA_RESPUESTA)
+            else:
+                self.max_palabras.append(None)
+            negativos = [self.vectorizar(str(n)) for n in definicion.get("negativos") or []]
+            self.negativos.append(np.stack(negativos) if negativos else None)
+        # Variantes: (patrón de sus palabras, slots) por intención
+        self.variantes = {
+            etiqueta: [
+                (re.compile(r"\b(?:" + "|".join(re.escape(normalizar(str(p))) for p in v["palabras"]) + ")"),
+                 dict(v.get("slots") or {}))
+                for v in self.intenciones[etiqueta]["variantes"]
+            ]
+            for etiqueta in self.etiquetas if self.intenciones[etiqueta].get("variantes")
+        }
+        logger.info(
+            f"🧠 Clasificador local: {len(self.etiquetas)} intenciones, {len(ejemplos)} ejemplos, "
+            f"{len(self.vocabulario)} n-gramas ({(time.perf_counter() - inicio) * 1000:.0f} ms)"
+        )
+
+    @staticmethod
+    def _normalizar_filas(m):
+        normas = np.linalg.norm(m, axis=-1, keepdims=True)
+        return m / np.maximum(normas, 1e-9)
+
+    def vectorizar(self, texto: str):
+        v = np.zeros(len(self.vocabulario), dtype=np.float32)
+        indices = [self.vocabulario[g] for g in ngramas(texto) if g in self.vocabulario]
+        if indices:
+            np.add.at(v, indices, 1.0)
+            v = np.log1p(v) * self.idf
+        return self._normalizar_filas(v)
+
+    def _similitudes(self, vector):
+        """Por intención, la similitud coseno con su ejemplo más parecido (0 sin ejemplos)"""
+        por_ejemplo = self.matriz @ vector
+        if not len(por_ejemplo):
+            return np.zeros(len(self.etiquetas), dtype=np.float32)
+        maximos = np.maximum.reduceat(por_ejemplo, np.minimum(self.inicios, len(por_ejemplo) - 1))
+        return np.where(self.con_ejemplos, maximos, 0.0)
+
+    def puntuar(self, texto: str) -> Dict[str, float]:
+        """Similitud coseno del comando con el ejemplo más parecido de cada intención"""
+        similitudes = self._similitudes(self.vectorizar(texto))
+        return dict(zip(self.etiquetas, similitudes.tolist()))
+
+    def _aceptable(self, indice: int, confianza: float, segunda: float, comando: str, vector) -> bool:
+        if self.etiquetas[indice] == ETIQUETA_IA:
+            return False
+        umbral, margen = self.limites[indice]
+        if confianza < umbral or confianza - segunda < margen:
+            return False
+        maximo = self.max_palabras[indice]
+        if maximo is not None and len(normalizar(comando).split()) > maximo:
+            return False
+        # Descartada si algún negativo se parece tanto como su ejemplo más parecido
+        negativos = self.negativos[indice]
+        return negativos is None or float((negativos @ vector).max()) < confianza
+
+    def _slots(self, etiqueta: str, comando: str) -> Optional[Dict[str, Any]]:
+        """Slots de la intención, o None si sus variantes no deciden una sola"""
+        variantes = self.variantes.get(etiqueta)
+        if not variantes:
+            return dict(self.intenciones[etiqueta].get("slots") or {})
+        texto = normalizar(comando)
+        elegidas = [slots for patron, slots in variantes if patron.search(texto)]
+        return dict(elegidas[0]) if len(elegidas) == 1 else None
+
+    def clasificar(self, comando: str, contar: bool = True) -> Optional[Clasificacion]:
+        """
+        Args:
+            comando: Comando del usuario
+            contar: Registrar la consulta en las métricas de desvío
+
+        Returns:
+            Clasificacion: Intención con su acción, o None si debe atenderlo la IA
+        """
+        inicio = time.perf_counter()
+        vector = self.vectorizar(comando)
+        similitudes = self._similitudes(vector)
+        orden = np.argsort(-similitudes)
+        indice = int(orden[0])
+        etiqueta, confianza = self.etiquetas[indice], float(similitudes[indice])
+        segunda = float(similitudes[orden[1]]) if len(orden) > 1 else 0.0
+        slots = None
+        aceptada = self._aceptable(indice, confianza, segunda, comando, vector)
+        if aceptada:
+            slots = self._slots(etiqueta, comando)
+            aceptada = slots is not None
+        duracion = time.perf_counter() - inicio
+
+        if contar:
+            with self._lock:
+                self._contadores["consultas"] += 1
+                self._tiempo_total += duracion
+                if aceptada:
+                    self._contadores["desviadas"] += 1
+                    self._por_intencion[etiqueta] = self._por_intencion.get(etiqueta, 0) + 1
+        if not aceptada:
+            if contar:
+                logger.debug(f"Clasificador: {etiqueta} ({confianza:.2f}) insuficiente, se usa la IA")
+            return None
+
+        definicion = self.intenciones[etiqueta]
+        respuesta = None
+        if definicion.get("respuestas"):
+            respuesta = random.choice(definicion["respuestas"]).format(nombre=ASSISTANT_NAME)
+        if contar:
+            logger.info(f"🧠 Intención local: {etiqueta} ({confianza:.2f}, {duracion * 1000:.2f} ms)")
+        return Clasificacion(
+            etiqueta, confianza,
+            habilidad=definicion.get("habilidad"),
+            slots=slots,
+            respuesta=respuesta,
+            duracion_ms=duracion * 1000,
+        )
+
+    def metricas(self) -> Dict[str, Any]:
+        """
+        Returns:
+            dict: consultas, desviadas, tasa_desvio (fracción de consultas que
+                no llegaron a la IA), por_intencion y tiempo medio en ms
+        """
+        with self._lock:
+            consultas = self._contadores["consultas"]
+            desviadas = self._contadores["desviadas"]
+            return {
+                "consultas": consultas,
+                "desviadas": desviadas,
+                "tasa_desvio": desviadas / consultas if consultas else 0.0,
+                "por_intencion": dict(self._por_intencion),
+                "tiempo_medio_ms": 1000 * self._tiempo_total / consultas if consultas else 0.0,
+            }
+
+
+# ============== CLASIFICADOR COMPARTIDO ==============
+_clasificador = None
+_clasificador_lock = threading.Lock()
+_clasificador_fallido = False
+
+
+def obtener_clasificador() -> Optional[ClasificadorIntenciones]:
+    """Clasificador entrenado con CLASIFICADOR_EJEMPLOS (se entrena al primer uso)"""
+    global _clasificador, _clasificador_fallido
+    if _clasificador is not None or _clasificador_fallido:
+        return _clasificador
+    with _clasificador_lock:
+        if _clasificador is None and not _clasificador_fallido:
+            if not (NUMPY_AVAILABLE and YAML_AVAILABLE):
+                _clasificador_fallido = True
+                return None
+            try:
+                _clasificador = ClasificadorIntenciones.desde_yaml(CLASIFICADOR_EJEMPLOS)
+            except Exception as e:
+                logger.error(f"No se pudo entrenar el clasificador local: {e}")
+                _clasificador_fallido = True
+    return _clasificador
+
+
+def metricas_clasificador() -> Optional[Dict[str, Any]]:
+    """Métricas del clasificador compartido, o None si todavía no se entrenó"""
+    return _clasificador.metricas() if _clasificador else None
+
+
+def clasificar_comando(comando: str, contar: bool = True) -> Optional[Clasificacion]:
+    """Atajo: None si no hay clasificador o la confianza es baja"""
+    clasificador = obtener_clasificador()
+    return clasificador.clasificar(comando, contar=contar) if clasificador else None
+
+
+# ============== EVALUACIÓN ==============
+def validar_dejando_uno_fuera(intenciones: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Clasifica cada ejemplo con un clasificador entrenado sin él (ni como
+    negativo de otra intención)
+
+    Args:
+        intenciones: Definiciones como en config/intenciones.yaml
+
+    Returns:
+        dict: total, correctos, a_ia y equivocadas [(ejemplo, esperada, predicha)]
+    """
+    resultado = {"total": 0, "correctos": 0, "a_ia": 0, "equivocadas": []}
+    nivel = logger.level
+    logger.setLevel(logging.WARNING)   # Un entrenamiento por ejemplo
+    try:
+        for etiqueta, definicion in intenciones.items():
+            for i, ejemplo in enumerate(definicion.get("ejemplos", [])):
+                fuera = normalizar(str(ejemplo))
+                reducidas = {
+                    e: {
+                        **d,
+                        "ejemplos": [x for j, x in enumerate(d.get("ejemplos", [])) if e != etiqueta or j != i],
+                        "negativos": [x for x in d.get("negativos") or [] if normalizar(str(x)) != fuera],
+                    }
+                    for e, d in intenciones.items()
+                }
+                clasificacion = ClasificadorIntenciones(reducidas).clasificar(str(ejemplo), contar=False)
+                predicha = clasificacion.intencion if clasificacion else ETIQUETA_IA
+                resultado["total"] += 1
+                if predicha == etiqueta:
+                    resultado["correctos"] += 1
+                elif predicha == ETIQUETA_IA:
+                    resultado["a_ia"] += 1
+                else:
+                    resultado["equivocadas"].append((ejemplo, etiqueta, predicha))
+    finally:
+        logger.setLevel(nivel)
+    return resultado
+
+
+if __name__ == "__main__":
+    import sys
+    import statistics
+
+    logging.basicConfig(level=logging.WARNING)
+
+    print("=" * 60)
+    print("🧠 EVALUACIÓN DEL CLASIFICADOR LOCAL")
+    print("=" * 60)
+
+    with open(CLASIFICADOR_EJEMPLOS, encoding="utf-8") as f:
+        intenciones = yaml.safe_load(f)["intenciones"]
+
+    validacion = validar_dejando_uno_fuera(intenciones)
+    print(f"\nDejando uno fuera ({validacion['total']} ejemplos): {validacion['correctos']} correctos, "
+          f"{validacion['a_ia']} enviados a la IA, {len(validacion['equivocadas'])} acciones equivocadas")
+    for ejemplo, esperada, predicha in validacion["equivocadas"]:
+        print(f"   ❌ {ejemplo!r}: {esperada} → {predicha}")
+
+    clasificador = obtener_clasificador()
+    trafico = [
+        "pon el volumen más alto", "quiero ver videos en youtube", "hola aurora",
+        "súbele que no oigo", "muchas gracias", "va a llover mañana",
+        "qué es la teoría de la relatividad", "escribe un cuento corto",
+        "cómo hago una tortilla de patatas", "cuánto mide la torre eiffel",
+        "revisa mi correo por favor", "baja un poco el sonido", "quién eres",
+        "gracias a qué se forma el arcoíris", "cómo se dice gracias en japonés",
+        "cómo estará el tiempo mañana", "aumenta el sonido", "más volumen",
+    ]
+    tiempos = []
+    print()
+    for comando in trafico:
+        inicio = time.perf_counter()
+        resultado = clasificador.clasificar(comando)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        destino = f"{resultado.intencion} ({resultado.confianza:.2f})" if resultado else "IA"
+        print(f"   {comando:40s} → {destino}")
+
+    metricas = clasificador.metricas()
+    print(f"\n📊 Tráfico desviado de la IA: {metricas['tasa_desvio']:.0%} "
+          f"({metricas['desviadas']}/{metricas['consultas']})")
+    print(f"📊 Latencia: p50 {statistics.median(tiempos):.3f} ms · máx {max(tiempos):.3f} ms")
+    # Sale con error si alguna frase de ejemplo dispararía otra acción
+    sys.exit(1 if validacion["equivocadas"] else 0)
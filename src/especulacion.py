@@ -0,0 +1,236 @@
+"""
+Procesamiento especulativo sobre transcripciones parciales
+
+Mientras el usuario habla se reconoce el audio acumulado. Cuando una
+hipótesis parcial se mantiene estable durante ESPECULACION_ESTABILIDAD_MS
+se enruta y, si va a la IA, se lanza la consulta por adelantado. Si la
+transcripción final coincide se usa ese resultado; si no, se descarta.
+
+Las habilidades con efectos (abrir programas, páginas o búsquedas) y la
+despedida nunca se ejecutan especulativamente: solo se enrutan.
+"""
+import re
+import time
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Any, Optional
+
+from config.settings import ESPECULACION_ESTABILIDAD_MS
+from src.main import enrutar_comando, reconocer_audio
+from src.cerebro_ia import generar_respuesta
+
+logger = logging.getLogger(__name__)
+
+# Única ruta sin efectos laterales que merece ejecutarse por adelantado
+RUTAS_ESPECULABLES = {"IA"}
+
+
+def normalizar_transcripcion(texto: str) -> str:
+    """Compara transcripciones sin mayúsculas, puntuación ni espacios repetidos"""
+    texto = re.sub(r"[^\w\s]", " ", texto.lower())
+    return " ".join(texto.split())
+
+
+# ============== FRASE EN CURSO ==============
+class FraseEspeculativa:
+    """Estado especulativo de una sola frase"""
+
+    def __init__(self, ejecutor: "EjecutorEspeculativo"):
+        self.ejecutor = ejecutor
+        self.hipotesis = None
+        self.ruta = None
+        self._futuro = None
+        self._inicio = None
+        self._temporizador = None
+        self._lock = threading.Lock()
+        # Reconocimiento parcial: solo una petición en vuelo, la más reciente espera
+        self._parcial_en_vuelo = False
+        self._parcial_pendiente = None
+        self._cerrada = False
+
+    # ---------- entrada de audio parcial ----------
+    def enviar_audio_parcial(self, audio):
+        """Encola el audio acumulado; si ya hay uno reconociéndose, reemplaza al pendiente"""
+        with self._lock:
+            if self._cerrada:
+                return
+            if self._parcial_en_vuelo:
+                self._parcial_pendiente = audio
+                return
+            self._parcial_en_vuelo = True
+        self.ejecutor.pool_reconocimiento.submit(self._reconocer_parcial, audio)
+
+    def _reconocer_parcial(self, audio):
+        while audio is not None:
+            texto = self.ejecutor.reconocer(audio)
+            if texto and texto != "ERROR_MIC":
+                self.actualizar(texto)
+            with self._lock:
+                audio, self._parcial_pendiente = self._parcial_pendiente, None
+                if audio is None or self._cerrada:
+                    self._parcial_en_vuelo = False
+                    return
+
+    # ---------- hipótesis ----------
+    def actualizar(self, parcial: str):
+        """Registra una hipótesis parcial; una distinta cancela la especulación en curso"""
+        hipotesis = normalizar_transcripcion(parcial)
+        with self._lock:
+            if self._cerrada or hipotesis == self.hipotesis:
+                return
+            self._cancelar_locked()
+            self.hipotesis = hipotesis
+            self._temporizador = threading.Timer(
+                self.ejecutor.estabilidad_ms / 1000, self._especular, args=(hipotesis,)
+            )
+            self._temporizador.daemon = True
+            self._temporizador.start()
+
+    def _especular(self, hipotesis: str):
+        with self._lock:
+            if self._cerrada or hipotesis != self.hipotesis:
+                return
+            self.ruta = self.ejecutor.enrutar(hipotesis)
+            self._inicio = time.perf_counter()
+            self.ejecutor._contar("especulaciones")
+            if self.ruta in RUTAS_ESPECULABLES:
+                logger.debug(f"Especulando consulta IA: {hipotesis[:50]}")
+                self._futuro = self.ejecutor.pool_ia.submit(self.ejecutor._generar, hipotesis)
+
+    # ---------- resolución ----------
+    def confirmar(self, final: Optional[str]) -> Optional[Future]:
+        """
+        Compara la transcripción final con la hipótesis especulada. No espera
+        a la consulta: el reconocimiento sigue con la frase siguiente y quien
+        procesa la respuesta espera al futuro.
+
+        Args:
+            final: Transcripción final (o None si no se entendió)
+
+        Returns:
+            Future: Se resuelve con la respuesta adelantada (None si la consulta
+                falló) cuando la especulación acertó; None en otro caso
+        """
+        with self._lock:
+            self._cerrada = True
+            if self._temporizador:
+                self._temporizador.cancel()
+            if self._inicio is None:
+                return None
+            if not final or normalizar_transcripcion(final) != self.hipotesis:
+                self._cancelar_locked()
+                self.ejecutor._contar("fallos")
+                return None
+            futuro, inicio = self._futuro, self._inicio
+
+        self.ejecutor._contar("aciertos")
+        if futuro is None:
+            # Acierto de enrutado: la habilidad se ejecuta por la vía normal
+            return None
+        confirmado = time.perf_counter()
+        resultado = Future()
+
+        def entregar(futuro):
+            try:
+                respuesta, terminado = futuro.result()
+            except Exception as e:
+                logger.error(f"Error en la consulta especulativa: {e}")
+                resultado.set_result(None)
+                return
+            # Ahorro = parte de la consulta que ya había corrido al llegar la transcripción final
+            self.ejecutor._sumar_ahorro(min(confirmado, terminado) - inicio)
+            resultado.set_result(respuesta)
+
+        futuro.add_done_callback(entregar)
+        return resultado
+
+    def cancelar(self):
+        with self._lock:
+            self._cerrada = True
+            self._cancelar_locked()
+
+    def _cancelar_locked(self):
+        if self._temporizador:
+            self._temporizador.cancel()
+            self._temporizador = None
+        if self._futuro is not None:
+            # La petición HTTP ya enviada no se puede abortar; su resultado se ignora
+            self._futuro.cancel()
+            self._futuro = None
+        self._inicio = None
+        self.ruta = None
+
+
+# ============== EJECUTOR ==============
+class EjecutorEspeculativo:
+    """Crea frases especulativas y acumula la tasa de acierto y el tiempo ahorrado"""
+
+    def __init__(
+        self,
+        enrutar: Callable[[str], Optional[str]] = enrutar_comando,
+        generar: Callable[[str], str] = generar_respuesta,
+        reconocer: Callable[[Any], Optional[str]] = reconocer_audio,
+        estabilidad_ms: int = ESPECULACION_ESTABILIDAD_MS,
+        hilos_reconocimiento: int = 2,
+        hilos_ia: int = 2,
+    ):
+        """
+        Args:
+            enrutar: Decide la habilidad de un comando sin ejecutarla
+            generar: Consulta a la IA
+            reconocer: Reconocedor usado para las transcripciones parciales
+            estabilidad_ms: Tiempo que una hipótesis debe mantenerse para especular
+            hilos_reconocimiento: Hilos para las transcripciones parciales
+            hilos_ia: Hilos para las consultas adelantadas (aparte: una consulta
+                lenta no retrasa el reconocimiento parcial)
+        """
+        self.enrutar = enrutar
+        self.generar = generar
+        self.reconocer = reconocer
+        self.estabilidad_ms = estabilidad_ms
+        self.pool_reconocimiento = ThreadPoolExecutor(
+            max_workers=hilos_reconocimiento, thread_name_prefix="especulacion-parcial"
+        )
+        self.pool_ia = ThreadPoolExecutor(max_workers=hilos_ia, thread_name_prefix="especulacion-ia")
+        self._lock = threading.Lock()
+        self._contadores = {"especulaciones": 0, "aciertos": 0, "fallos": 0}
+        self._ahorro_total = 0.0
+        self._respuestas_adelantadas = 0
+
+    def _generar(self, texto: str):
+        respuesta = self.generar(texto)
+        return respuesta, time.perf_counter()
+
+    def nueva_frase(self) -> FraseEspeculativa:
+        return FraseEspeculativa(self)
+
+    def _contar(self, clave: str):
+        with self._lock:
+            self._contadores[clave] += 1
+
+    def _sumar_ahorro(self, segundos: float):
+        with self._lock:
+            self._ahorro_total += segundos
+            self._respuestas_adelantadas += 1
+
+    def metricas(self) -> Dict[str, Any]:
+        """
+        Returns:
+            dict: especulaciones, aciertos, fallos, tasa_acierto, respuestas
+                adelantadas y ahorro total/medio en ms
+        """
+        with self._lock:
+            datos = dict(self._contadores)
+            ahorro = self._ahorro_total
+            adelantadas = self._respuestas_adelantadas
+        resueltas = datos["aciertos"] + datos["fallos"]
+        datos["tasa_acierto"] = datos["aciertos"] / resueltas if resueltas else 0.0
+        datos["respuestas_adelantadas"] = adelantadas
+        datos["ahorro_total_ms"] = 1000 * ahorro
+        datos["ahorro_medio_ms"] = 1000 * ahorro / adelantadas if adelantadas else 0.0
+        return datos
+
+    def cerrar(self):
+        self.pool_reconocimiento.shutdown(wait=False, cancel_futures=True)
+        self.pool_ia.shutdown(wait=False, cancel_futures=True)
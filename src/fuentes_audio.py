@@ -0,0 +1,280 @@
+"""
+Fuentes de audio - Micrófono real o micrófono virtual a partir de archivos
+
+Todas las fuentes son AudioSource de speech_recognition, así que pasan por
+la misma captura (listen, VAD por energía) que el micrófono. Las fuentes de
+archivo permiten reproducir grabaciones en tiempo real o más rápido para
+medir el reconocimiento y la latencia por turno sin hardware de audio.
+"""
+import os
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+import speech_recognition as sr
+
+from config.settings import AUDIO_FUENTE, AUDIO_FUENTE_VELOCIDAD
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONES_AUDIO = (".wav", ".flac", ".aiff", ".aif")
+
+
+# ============== FUENTE BASE ==============
+class FuenteAudio(sr.AudioSource):
+    """Fuente de audio que puede usarse en varios `with` consecutivos"""
+
+    # Las fuentes en vivo necesitan calibrar el ruido ambiente; las virtuales no
+    en_vivo = False
+
+    def __init__(self):
+        self.SAMPLE_RATE = 16000
+        self.SAMPLE_WIDTH = 2
+        self.CHUNK = 1024
+        self.stream = None
+
+    @property
+    def agotada(self) -> bool:
+        """True cuando ya no queda audio por entregar"""
+        return False
+
+
+class FuenteMicrofono(FuenteAudio):
+    """Micrófono físico (envuelve sr.Microphone)"""
+
+    en_vivo = True
+
+    def __init__(self, device_index: Optional[int] = None):
+        self.microfono = sr.Microphone(device_index=device_index)
+        self.SAMPLE_RATE = self.microfono.SAMPLE_RATE
+        self.SAMPLE_WIDTH = self.microfono.SAMPLE_WIDTH
+        self.CHUNK = self.microfono.CHUNK
+        self.stream = None
+
+    def __enter__(self):
+        self.microfono.__enter__()
+        self.stream = self.microfono.stream
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stream = None
+        return self.microfono.__exit__(exc_type, exc_value, traceback)
+
+
+# ============== FUENTES VIRTUALES ==============
+class _StreamVirtual:
+    """Entrega PCM crudo por bloques al ritmo indicado"""
+
+    def __init__(self, fuente: "FuenteArchivo"):
+        self.fuente = fuente
+
+    def read(self, size: int) -> bytes:
+        return self.fuente._leer(size)
+
+
+class FuenteArchivo(FuenteAudio):
+    """
+    Micrófono virtual que reproduce uno o varios archivos WAV/AIFF/FLAC
+
+    Cada archivo es una frase; entre frases se inserta silencio para que la
+    detección de pausa de listen() cierre cada una. La posición
+    se conserva entre capturas, de modo que cada llamada a escuchar()
+    consume la siguiente frase.
+    """
+
+    def __init__(self, rutas, velocidad: float = 1.0, pausa: float = 1.5, chunk: int = 1024):
+        """
+        Args:
+            rutas: Archivo o lista de archivos de audio
+            velocidad: 1.0 = tiempo real, 2.0 = el doble de rápido, 0 = sin esperas
+            pausa: Segundos de silencio entre frases
+            chunk: Muestras por lectura (igual que sr.Microphone)
+        """
+        super().__init__()
+        if isinstance(rutas, (str, Path)):
+            rutas = [rutas]
+        self.rutas = [Path(r) for r in rutas]
+        if not self.rutas:
+            raise ValueError("La fuente de archivo necesita al menos un archivo de audio")
+        self.velocidad = velocidad
+        self.pausa = pausa
+        self.CHUNK = chunk
+        self._pcm = None
+        self._posicion = 0
+        self._reloj = None
+        self._lock = threading.Lock()
+
+    def _cargar(self):
+        reconocedor = sr.Recognizer()
+        partes = []
+        for i, ruta in enumerate(self.rutas):
+            with sr.AudioFile(str(ruta)) as archivo:
+                audio = reconocedor.record(archivo)
+            if i == 0:
+                self.SAMPLE_RATE = audio.sample_rate
+                self.SAMPLE_WIDTH = audio.sample_width
+            datos = audio.get_raw_data(convert_rate=self.SAMPLE_RATE, convert_width=self.SAMPLE_WIDTH)
+            partes.append(datos)
+            if i < len(self.rutas) - 1:
+                # El fin del stream ya cierra la última frase
+                partes.append(b"\0" * (int(self.pausa * self.SAMPLE_RATE) * self.SAMPLE_WIDTH))
+        self._pcm = b"".join(partes)
+        logger.info(
+            f"Fuente virtual: {len(self.rutas)} frase(s), "
+            f"{len(self._pcm) / (self.SAMPLE_RATE * self.SAMPLE_WIDTH):.1f} s de audio"
+        )
+
+    def __enter__(self):
+        if self._pcm is None:
+            self._cargar()
+        self.stream = _StreamVirtual(self)
+        self._reloj = None
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stream = None
+
+    @property
+    def agotada(self) -> bool:
+        return self._pcm is not None and self._posicion >= len(self._pcm)
+
+    def reiniciar(self):
+        """Vuelve al principio de la primera frase"""
+        with self._lock:
+            self._posicion = 0
+            self._reloj = None
+
+    def _leer(self, size: int) -> bytes:
+        with self._lock:
+            n = size * self.SAMPLE_WIDTH
+            datos = self._pcm[self._posicion:self._posicion + n]
+            self._posicion += len(datos)
+        if self.velocidad > 0 and datos:
+            # Ritmo de un micrófono real: cada bloque "tarda" lo que dura
+            duracion = len(datos) / (self.SAMPLE_RATE * self.SAMPLE_WIDTH) / self.velocidad
+            ahora = time.perf_counter()
+            if self._reloj is None or self._reloj < ahora - 0.5:
+                self._reloj = ahora
+            self._reloj += duracion
+            espera = self._reloj - ahora
+            if espera > 0:
+                time.sleep(espera)
+        return datos
+
+
+class FuenteDirectorio(FuenteArchivo):
+    """Micrófono virtual con todas las grabaciones de un directorio, en orden alfabético"""
+
+    def __init__(self, directorio, velocidad: float = 1.0, pausa: float = 1.5, chunk: int = 1024):
+        directorio = Path(directorio)
+        rutas = sorted(
+            p for p in directorio.iterdir()
+            if p.is_file() and p.suffix.lower() in EXTENSIONES_AUDIO
+        )
+        if not rutas:
+            raise ValueError(f"No hay archivos de audio en {directorio}")
+        super().__init__(rutas, velocidad=velocidad, pausa=pausa, chunk=chunk)
+
+
+# ============== FUENTE POR DEFECTO ==============
+_fuente_por_defecto = None
+_fuente_lock = threading.Lock()
+
+
+def crear_fuente(origen: Optional[str] = None, velocidad: float = AUDIO_FUENTE_VELOCIDAD) -> FuenteAudio:
+    """
+    Crea una fuente a partir de una ruta
+
+    Args:
+        origen: Archivo, directorio o None/"" para el micrófono
+        velocidad: Ritmo de reproducción de las fuentes virtuales
+
+    Returns:
+        FuenteAudio: Fuente lista para usar en escuchar()
+    """
+    if not origen:
+        return FuenteMicrofono()
+    if os.path.isdir(origen):
+        return FuenteDirectorio(origen, velocidad=velocidad)
+    return FuenteArchivo(origen, velocidad=velocidad)
+
+
+def obtener_fuente_por_defecto() -> FuenteAudio:
+    """
+    Fuente configurada con AUDIO_FUENTE (o con configurar_fuente_por_defecto);
+    las virtuales se comparten para que cada escuchar() avance a la siguiente frase
+    """
+    global _fuente_por_defecto
+    with _fuente_lock:
+        if _fuente_por_defecto is None and AUDIO_FUENTE:
+            _fuente_por_defecto = crear_fuente(AUDIO_FUENTE)
+        return _fuente_por_defecto or FuenteMicrofono()
+
+
+def fuente_por_defecto_en_vivo() -> bool:
+    """True si la fuente por defecto es un micrófono físico"""
+    with _fuente_lock:
+        if _fuente_por_defecto is not None:
+            return _fuente_por_defecto.en_vivo
+        return not AUDIO_FUENTE
+
+
+def configurar_fuente_por_defecto(fuente: Optional[FuenteAudio]):
+    """Reemplaza la fuente que usan escuchar() y el modo voz (None = micrófono)"""
+    global _fuente_por_defecto
+    with _fuente_lock:
+        _fuente_por_defecto = fuente
+
+
+# ============== BENCHMARK ==============
+if __name__ == "__main__":
+    import argparse
+    import statistics
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Reproduce grabaciones por la captura de voz y mide latencias")
+    parser.add_argument("origen", help="Archivo o directorio de grabaciones")
+    parser.add_argument("--velocidad", type=float, default=1.0, help="1 = tiempo real, 0 = sin esperas")
+    parser.add_argument("--sin-reconocer", action="store_true", help="Medir solo la captura (VAD)")
+    args = parser.parse_args()
+
+    from src.main import crear_reconocedor, capturar_audio, reconocer_audio
+
+    fuente = crear_fuente(args.origen, velocidad=args.velocidad)
+    r = crear_reconocedor()
+
+    print("=" * 60)
+    print("🎙️  BENCHMARK DE CAPTURA CON MICRÓFONO VIRTUAL")
+    print("=" * 60)
+
+    capturas, reconocimientos = [], []
+    frase = 0
+    while not fuente.agotada:
+        inicio = time.perf_counter()
+        audio = capturar_audio(r, fuente=fuente)
+        t_captura = time.perf_counter() - inicio
+        if audio is None or audio == "ERROR_MIC":
+            break
+        frase += 1
+        capturas.append(t_captura)
+        texto = ""
+        if not args.sin_reconocer:
+            inicio = time.perf_counter()
+            texto = reconocer_audio(audio, r)
+            reconocimientos.append(time.perf_counter() - inicio)
+        duracion = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+        print(f"   {frase:3d}. audio {duracion:5.2f} s · captura {t_captura * 1000:7.1f} ms · {texto}")
+
+    def resumen(nombre, valores):
+        if valores:
+            valores = sorted(valores)
+            p50 = statistics.median(valores) * 1000
+            p90 = valores[int(0.9 * (len(valores) - 1))] * 1000
+            print(f"   {nombre}: p50 {p50:.1f} ms · p90 {p90:.1f} ms")
+
+    print(f"\n📊 {frase} frase(s)")
+    resumen("Captura (VAD)", capturas)
+    resumen("Reconocimiento", reconocimientos)
@@ -3,9 +3,14 @@ Habilidades del sistema - Control de aplicaciones multiplataforma
 """
 import subprocess
 import re
-import shutil
+import shlex
 import logging
-from config.settings import CURRENT_OS, get_programas_for_os
+import os
+from config.settings import CURRENT_OS, ARCHIVOS_RESULTADOS, get_programas_for_os
+from src.indice_difuso import buscar_alias
+from src.resolutor_ejecutables import resolver_ejecutable, ejecutables_disponibles
+from src.indice_archivos import obtener_indice_archivos, actualizar_en_segundo_plano
+from src.lanzador import lanzar_programa
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -21,6 +26,23 @@ def abrir_programa(comando):
     Returns:
         str: Mensaje de confirmación o vacío si no se encontró el programa
     """
+    programa = detectar_programa(comando)
+    if programa:
+        return ejecutar_programa(*programa)
+    
+    return ""
+
+
+def detectar_programa(comando):
+    """
+    Detecta qué programa pide el comando sin ejecutarlo
+    
+    Args:
+        comando (str): Comando de voz del usuario
+        
+    Returns:
+        tuple: (alias, ejecutable) o None si no menciona ningún programa
+    """
     programas = get_programas_for_os()
     
     # Buscar coincidencias en los aliases
@@ -29,9 +51,14 @@ def abrir_programa(comando):
         patron = r'\b' + re.escape(alias) + r'\b'
         
         if re.search(patron, comando.lower()):
-            return ejecutar_programa(alias, ejecutable)
+            return alias, ejecutable
     
-    return ""
+    # Aplicaciones instaladas (.desktop) y alias aproximados ("abre fire fox")
+    resultado = buscar_alias(comando, {"programa", "aplicacion"})
+    if resultado:
+        return resultado[1], resultado[2]
+    
+    return None
 
 
 def ejecutar_programa(nombre, ejecutable):
@@ -51,13 +78,8 @@ def ejecutar_programa(nombre, ejecutable):
             logger.warning(f"Programa no instalado: {nombre}")
             return f"Lo siento, {nombre} no está instalado en tu sistema."
         
-        # Ejecutar según el sistema operativo
-        if CURRENT_OS == "Windows":
-            subprocess.Popen(ejecutable, shell=True)
-        elif CURRENT_OS == "Darwin":  # macOS
-            subprocess.Popen(ejecutable, shell=True)
-        else:  # Linux
-            subprocess.Popen([ejecutable])
+        # Lanzar desde el servicio auxiliar, sin shell (los Exec de .desktop traen argumentos)
+        lanzar_programa(ejecutable)
         
         logger.info(f"✅ Programa '{nombre}' abierto correctamente")
         return f"Abriendo {nombre}."
@@ -73,6 +95,31 @@ def ejecutar_programa(nombre, ejecutable):
         return f"Ocurrió un error al intentar abrir {nombre}."
 
 
+def comando_base(ejecutable):
+    """
+    Programa que lanza una línea de comando, sin argumentos ni el envoltorio
+    'env VAR=valor' ('env LANG=C "/opt/Mi App/app" --x' → "/opt/Mi App/app")
+
+    Args:
+        ejecutable (str): Línea de comando del programa
+
+    Returns:
+        str: Comando base o None si la línea está vacía o mal entrecomillada
+    """
+    try:
+        # En Windows las barras invertidas de las rutas no son escapes
+        partes = shlex.split(ejecutable, posix=CURRENT_OS != "Windows")
+    except ValueError:
+        return None
+    if CURRENT_OS == "Windows":
+        partes = [p.strip('"') for p in partes]
+    if partes and os.path.basename(partes[0]) == "env":
+        partes = partes[1:]
+        while partes and (partes[0].startswith("-") or "=" in partes[0]):
+            partes.pop(0)
+    return partes[0] if partes else None
+
+
 def verificar_ejecutable(ejecutable):
     """
     Verifica si un ejecutable está disponible en el sistema
@@ -83,21 +130,73 @@ def verificar_ejecutable(ejecutable):
     Returns:
         bool: True si existe y es ejecutable
     """
-    # Extraer el comando base (sin argumentos)
-    comando_base = ejecutable.split()[0]
+    # Extraer el comando base (sin argumentos ni 'env')
+    base = comando_base(ejecutable)
+    if not base:
+        return False
     
     # Para macOS con comandos 'open -a'
-    if comando_base == "open":
+    if base == "open":
         return True
     
     # Para Windows con comandos que terminan en .exe o .cmd
     if CURRENT_OS == "Windows":
-        if comando_base.endswith(('.exe', '.cmd')):
-            return shutil.which(comando_base) is not None
+        if base.endswith(('.exe', '.cmd')):
+            return resolver_ejecutable(base) is not None
         return True
     
     # Para Linux y otros sistemas
-    return shutil.which(comando_base) is not None
+    return resolver_ejecutable(base) is not None
+
+
+def ajustar_volumen(porcentaje=None, cambio=None):
+    """
+    Ajusta el volumen general del sistema
+    
+    Args:
+        porcentaje (int): Volumen absoluto de 0 a 100
+        cambio (int): Puntos a subir (positivo) o bajar (negativo)
+        
+    Returns:
+        str: Mensaje de confirmación o error
+    """
+    if porcentaje is None and cambio is None:
+        return "No entendí a qué porcentaje ajustar el volumen."
+    
+    if porcentaje is not None:
+        porcentaje = max(0, min(100, int(porcentaje)))
+        pactl, amixer = f"{porcentaje}%", f"{porcentaje}%"
+        osascript = f"set volume output volume {porcentaje}"
+        mensaje = f"Ajustando volumen al {porcentaje} por ciento."
+    else:
+        cambio = int(cambio)
+        signo = "+" if cambio >= 0 else "-"
+        pactl, amixer = f"{signo}{abs(cambio)}%", f"{abs(cambio)}%{signo}"
+        osascript = f"set volume output volume (output volume of (get volume settings) {signo} {abs(cambio)})"
+        mensaje = "Subiendo el volumen." if cambio >= 0 else "Bajando el volumen."
+    
+    if CURRENT_OS == "Darwin":
+        comandos = [["osascript", "-e", osascript]]
+    elif CURRENT_OS == "Linux":
+        comandos = [
+            ["pactl", "set-sink-volume", "@DEFAULT_SINK@", pactl],
+            ["amixer", "-D", "pulse", "sset", "Master", amixer],
+            ["amixer", "sset", "Master", amixer],
+        ]
+    else:
+        return "Todavía no sé ajustar el volumen en este sistema."
+    
+    for cmd in comandos:
+        if not resolver_ejecutable(cmd[0]):
+            continue
+        try:
+            subprocess.run(cmd, check=True, capture_output=True, timeout=5)
+            logger.info(f"🔊 Volumen: {cmd[-1]}")
+            return mensaje
+        except (subprocess.SubprocessError, OSError) as e:
+            logger.warning(f"{cmd[0]} no pudo ajustar el volumen: {e}")
+    
+    return "No pude ajustar el volumen. Verifica que haya un mezclador de audio instalado."
 
 
 def listar_programas_disponibles():
@@ -108,13 +207,100 @@ def listar_programas_disponibles():
         list: Lista de tuplas (alias, ejecutable, disponible)
     """
     programas = get_programas_for_os()
-    resultado = []
     
-    for alias, ejecutable in programas.items():
-        disponible = verificar_ejecutable(ejecutable)
-        resultado.append((alias, ejecutable, disponible))
+    # Una sola pasada (paralela si el caché está frío) por todos los comandos base
+    ejecutables_disponibles({comando_base(e) for e in programas.values()} - {None})
+    
+    return [
+        (alias, ejecutable, verificar_ejecutable(ejecutable))
+        for alias, ejecutable in programas.items()
+    ]
+
+
+# Últimos archivos encontrados, para "abre el archivo 2"
+_ultimos_archivos = []
+
+
+def _indice_listo():
+    """Índice de archivos, esperando un poco si se está construyendo por primera vez (None si no está)"""
+    indice = obtener_indice_archivos()
+    hilo = actualizar_en_segundo_plano()
+    if hilo is not None and not indice.actualizado:
+        hilo.join(timeout=5)
+        if hilo.is_alive():
+            return None
+    return indice
+
+
+def buscar_archivos(termino):
+    """
+    Busca archivos por nombre en el índice local y lee las mejores coincidencias
+    
+    Args:
+        termino (str): Nombre o parte del nombre ("informe de ventas")
+        
+    Returns:
+        str: Coincidencias numeradas y la oferta de abrir una
+    """
+    indice = _indice_listo()
+    if indice is None:
+        return "Estoy preparando el índice de tus archivos. Pregúntame de nuevo en un momento."
+    
+    rutas = indice.buscar(termino, ARCHIVOS_RESULTADOS)
+    _ultimos_archivos[:] = rutas
+    if not rutas:
+        return f"No encontré ningún archivo que se llame {termino}."
     
-    return resultado
+    partes = [
+        f"{os.path.basename(ruta)}, en {os.path.basename(os.path.dirname(ruta)) or ruta}"
+        for ruta in rutas
+    ]
+    if len(rutas) == 1:
+        return f"Encontré {partes[0]}. Di 'abre el archivo 1' para abrirlo."
+    lista = "; ".join(f"{i}, {parte}" for i, parte in enumerate(partes, 1))
+    return f"Encontré {len(rutas)} archivos: {lista}. ¿Cuál abro? Di, por ejemplo, 'abre el archivo 1'."
+
+
+def abrir_archivo_encontrado(numero=None, nombre=None):
+    """
+    Abre un archivo con la aplicación predeterminada: uno de la última
+    búsqueda o, por nombre, el que mejor coincida en el índice
+    
+    Args:
+        numero (int): Posición en la lista leída (desde 1)
+        nombre (str): Nombre del archivo ("informe.pdf") si no se dio número
+        
+    Returns:
+        str: Mensaje de confirmación o error
+    """
+    if nombre:
+        indice = _indice_listo()
+        if indice is None:
+            return "Estoy preparando el índice de tus archivos. Pregúntame de nuevo en un momento."
+        rutas = indice.buscar(nombre, 1)
+        if not rutas:
+            return f"No encontré ningún archivo que se llame {nombre}."
+        return _abrir_ruta(rutas[0])
+    if not _ultimos_archivos:
+        return "Primero pídeme que busque un archivo."
+    if not 1 <= numero <= len(_ultimos_archivos):
+        return f"Solo encontré {len(_ultimos_archivos)} archivos."
+    return _abrir_ruta(_ultimos_archivos[numero - 1])
+
+
+def _abrir_ruta(ruta):
+    try:
+        if CURRENT_OS == "Windows":
+            os.startfile(ruta)
+        elif CURRENT_OS == "Darwin":
+            lanzar_programa(["open", ruta])
+        else:
+            lanzar_programa(["xdg-open", ruta])
+        logger.info(f"📄 Abriendo {ruta}")
+        return f"Abriendo {os.path.basename(ruta)}."
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.error(f"Error al abrir {ruta}: {e}")
+        return f"No pude abrir {os.path.basename(ruta)}."
 
 
 # ============== TEST ==============
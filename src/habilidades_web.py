@@ -1,9 +1,19 @@
 """
 Habilidades Web - Navegación y búsquedas en internet
 """
+import os
 import webbrowser
 import logging
-from config.settings import WEB_SHORTCUTS, USE_SELENIUM, FIREFOX_PROFILE_PATH
+import threading
+from urllib.parse import quote_plus
+from config.settings import (
+    WEB_SHORTCUTS, USE_SELENIUM, FIREFOX_PROFILE_PATH, GECKODRIVER_PATH, CACHE_DIR,
+    PALABRAS_BUSQUEDA, PALABRAS_REMOVER_BUSQUEDA, CLIMA_LUGAR_POR_DEFECTO
+)
+from src.intenciones import limpiar_termino
+from src.indice_difuso import buscar_alias
+from src.resolutor_ejecutables import resolver_ejecutable
+from src.pool_navegador import obtener_pool
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -28,6 +38,42 @@ except ImportError:
     logger.debug("PyWhatKit no disponible")
 
 
+_ruta_geckodriver = None
+_lock_geckodriver = threading.Lock()
+ARCHIVO_RUTA_GECKODRIVER = CACHE_DIR / "geckodriver.ruta"
+
+
+def ruta_geckodriver():
+    """
+    Resuelve geckodriver una sola vez por proceso
+    
+    Orden: GECKODRIVER_PATH, el PATH, la ruta guardada en caché de una
+    descarga anterior y, solo si nada de eso existe, GeckoDriverManager.
+    
+    Returns:
+        str: Ruta del ejecutable
+    """
+    global _ruta_geckodriver
+    with _lock_geckodriver:
+        if _ruta_geckodriver and os.path.isfile(_ruta_geckodriver):
+            return _ruta_geckodriver
+        ruta = GECKODRIVER_PATH or resolver_ejecutable("geckodriver")
+        if not ruta:
+            try:
+                guardada = ARCHIVO_RUTA_GECKODRIVER.read_text().strip()
+                ruta = guardada if os.path.isfile(guardada) else None
+            except OSError:
+                ruta = None
+        if not ruta:
+            ruta = GeckoDriverManager().install()
+            try:
+                ARCHIVO_RUTA_GECKODRIVER.write_text(ruta)
+            except OSError as e:
+                logger.debug(f"No se pudo guardar la ruta de geckodriver: {e}")
+        _ruta_geckodriver = ruta
+        return ruta
+
+
 def iniciar_driver_firefox():
     """
     Inicializa un driver de Selenium para Firefox
@@ -46,7 +92,7 @@ def iniciar_driver_firefox():
             options.add_argument("-profile")
             options.add_argument(FIREFOX_PROFILE_PATH)
         
-        service = FirefoxService(GeckoDriverManager().install())
+        service = FirefoxService(ruta_geckodriver())
         driver = webdriver.Firefox(service=service, options=options)
         logger.info("✅ Driver de Firefox inicializado")
         return driver
@@ -66,19 +112,41 @@ def abrir_pagina_web(comando):
     Returns:
         str: Mensaje de confirmación o vacío si no se encontró
     """
+    pagina = detectar_pagina_web(comando)
+    if pagina:
+        return abrir_url(*pagina)
+    
+    return ""
+
+
+def detectar_pagina_web(comando):
+    """
+    Detecta qué página pide el comando sin abrirla
+    
+    Args:
+        comando (str): Comando del usuario
+        
+    Returns:
+        tuple: (url, nombre) o None si no menciona ninguna página
+    """
     # Buscar en los atajos predefinidos
     for nombre, url in WEB_SHORTCUTS.items():
         if nombre in comando.lower():
-            return abrir_url(url, nombre)
+            return url, nombre
     
     # Intentar detectar URLs en el comando
     if "http://" in comando or "https://" in comando:
         palabras = comando.split()
         for palabra in palabras:
             if palabra.startswith(("http://", "https://")):
-                return abrir_url(palabra, "página web")
+                return palabra, "página web"
     
-    return ""
+    # Alias aproximado ("abre you tube")
+    resultado = buscar_alias(comando, {"web"})
+    if resultado:
+        return resultado[2], resultado[1]
+    
+    return None
 
 
 def abrir_url(url, nombre="sitio web"):
@@ -93,11 +161,9 @@ def abrir_url(url, nombre="sitio web"):
         str: Mensaje de confirmación
     """
     try:
-        # Método 1: Usar Selenium si está habilitado
+        # Método 1: Usar Selenium si está habilitado (driver reutilizado del pool)
         if USE_SELENIUM and SELENIUM_AVAILABLE:
-            driver = iniciar_driver_firefox()
-            if driver:
-                driver.get(url)
+            if obtener_pool(iniciar_driver_firefox).abrir(url):
                 logger.info(f"Abriendo {nombre} con Firefox: {url}")
                 return f"Abriendo {nombre} con Firefox."
         
@@ -121,17 +187,31 @@ def buscar_en_google(comando):
     Returns:
         str: Mensaje de confirmación o vacío si no es búsqueda
     """
-    # Detectar palabras clave de búsqueda
-    palabras_clave = ["busca", "buscar", "búsqueda", "googlea", "buscar en google"]
+    termino = detectar_busqueda(comando)
+    if termino:
+        return realizar_busqueda(termino)
     
-    for palabra in palabras_clave:
+    return ""
+
+
+def detectar_busqueda(comando):
+    """
+    Detecta si el comando es una búsqueda sin lanzarla
+    
+    Args:
+        comando (str): Comando del usuario
+        
+    Returns:
+        str: Término a buscar o None si no es una búsqueda
+    """
+    for palabra in PALABRAS_BUSQUEDA:
         if palabra in comando.lower():
             termino = extraer_termino_busqueda(comando, palabra)
             
             if termino:
-                return realizar_busqueda(termino)
+                return termino
     
-    return ""
+    return None
 
 
 def extraer_termino_busqueda(comando, palabra_clave):
@@ -149,14 +229,7 @@ def extraer_termino_busqueda(comando, palabra_clave):
         partes = comando.lower().split(palabra_clave, 1)
         
         if len(partes) > 1:
-            termino = partes[1].strip()
-            
-            # Limpiar palabras comunes
-            palabras_remover = ["en google", "por favor", "para mí"]
-            for palabra in palabras_remover:
-                termino = termino.replace(palabra, "").strip()
-            
-            return termino if termino else None
+            return limpiar_termino_busqueda(partes[1])
         
     except Exception as e:
         logger.error(f"Error al extraer término: {e}")
@@ -164,6 +237,19 @@ def extraer_termino_busqueda(comando, palabra_clave):
     return None
 
 
+def limpiar_termino_busqueda(termino):
+    """
+    Quita del término las muletillas que no forman parte de la búsqueda
+    
+    Args:
+        termino (str): Texto que sigue a la palabra clave
+        
+    Returns:
+        str: Término limpio o None si queda vacío
+    """
+    return limpiar_termino(termino, PALABRAS_REMOVER_BUSQUEDA)
+
+
 def realizar_busqueda(termino):
     """
     Ejecuta la búsqueda usando el método disponible
@@ -192,6 +278,47 @@ def realizar_busqueda(termino):
         return f"No pude realizar la búsqueda de '{termino}'."
 
 
+def buscar_en_youtube(termino):
+    """
+    Reproduce en YouTube el primer resultado de la búsqueda
+    
+    Args:
+        termino (str): Qué buscar
+        
+    Returns:
+        str: Mensaje de confirmación
+    """
+    try:
+        if PYWHATKIT_AVAILABLE:
+            pywhatkit.playonyt(termino)
+            logger.info(f"Reproduciendo en YouTube: {termino}")
+            return f"Buscando '{termino}' en YouTube."
+        
+        url = f"https://www.youtube.com/results?search_query={quote_plus(termino)}"
+        webbrowser.open(url)
+        logger.info(f"Buscando en YouTube: {termino}")
+        return f"Buscando '{termino}' en YouTube."
+        
+    except Exception as e:
+        logger.error(f"Error al buscar en YouTube: {e}")
+        return f"No pude buscar '{termino}' en YouTube."
+
+
+def buscar_clima(lugar=None):
+    """
+    Busca el pronóstico del tiempo
+    
+    Args:
+        lugar (str): Ciudad o país (CLIMA_LUGAR_POR_DEFECTO si no se indica)
+        
+    Returns:
+        str: Mensaje de confirmación
+    """
+    lugar = lugar or CLIMA_LUGAR_POR_DEFECTO
+    realizar_busqueda(f"clima en {lugar}")
+    return f"Buscando el pronóstico del tiempo para {lugar}."
+
+
 def listar_atajos_web():
     """
     Lista todos los atajos web disponibles
@@ -0,0 +1,363 @@
+"""
+Historial del chat - Mensajes guardados en SQLite
+
+La transcripción solo vivía en la vista: crecía sin límite en memoria y se
+perdía al cerrar. Aquí cada mensaje se añade (nunca se reescribe) a una
+tabla de SQLite:
+
+- agregar() solo lo pone en una lista de pendientes y devuelve su id; un
+  hilo los escribe por lotes (cada HISTORIAL_INTERVALO_ESCRITURA segundos o
+  al llegar a HISTORIAL_LOTE), así la interfaz nunca espera al disco
+- ultimos() y anteriores() leen páginas por id (clave primaria): la vista
+  arranca con la última página y pide las anteriores al subir
+
+- buscar() usa un índice FTS5 sobre el texto (sin tildes, por prefijos,
+  ordenado por relevancia); el hilo escritor lo actualiza en la misma
+  transacción de cada lote, así que se indexa poco a poco sin coste en la
+  interfaz. Un historial creado antes del índice se indexa por tramos de
+  REINDEXADO_TRAMO mensajes, soltando la conexión entre tramos para que las
+  lecturas de la interfaz no esperen (y retomando el avance si se cierra)
+
+Los mensajes se devuelven como (id, texto, es_usuario), del más antiguo al
+más reciente.
+"""
+import time
+import sqlite3
+import logging
+import threading
+from typing import List, Tuple
+
+from config.settings import HISTORIAL_DB, HISTORIAL_LOTE, HISTORIAL_INTERVALO_ESCRITURA, HISTORIAL_RESULTADOS
+from src.indice_difuso import normalizar
+
+logger = logging.getLogger(__name__)
+
+# FTS5 viene con casi todas las compilaciones de SQLite; sin él se busca con LIKE
+try:
+    sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE prueba USING fts5(texto)")
+    FTS5_AVAILABLE = True
+except sqlite3.Error:
+    FTS5_AVAILABLE = False
+
+MARCA_INICIO, MARCA_FIN = "\x02", "\x03"   # Rodean los términos encontrados en el fragmento
+REINDEXADO_TRAMO = 500    # Mensajes indexados por transacción al indexar un historial existente
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS mensajes (
+    id INTEGER PRIMARY KEY,
+    fecha REAL NOT NULL,
+    es_usuario INTEGER NOT NULL,
+    texto TEXT NOT NULL
+);
+"""
+
+# Índice de contenido externo: guarda solo los términos, el texto sigue en mensajes
+ESQUEMA_FTS = """
+CREATE VIRTUAL TABLE IF NOT EXISTS mensajes_fts USING fts5(
+    texto, content='mensajes', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+-- Mensajes anteriores al índice que faltan por indexar (ids desde..hasta)
+CREATE TABLE IF NOT EXISTS mensajes_fts_pendiente (desde INTEGER NOT NULL, hasta INTEGER NOT NULL);
+"""
+
+
+def consulta_fts(texto: str) -> str:
+    """"Cómo abro Fire" → '"como"* "abro"* "fire"*' (todas las palabras, por prefijo)"""
+    return " ".join(f'"{palabra}"*' for palabra in normalizar(texto).split())
+
+
+class HistorialChat:
+    """Mensajes del chat en SQLite, escritos por lotes en segundo plano"""
+
+    def __init__(self, ruta=HISTORIAL_DB, lote: int = HISTORIAL_LOTE,
+                 intervalo: float = HISTORIAL_INTERVALO_ESCRITURA):
+        """
+        Args:
+            ruta: Archivo de la base de datos (":memory:" para pruebas)
+            lote: Mensajes pendientes que fuerzan una escritura
+            intervalo: Segundos máximos que un mensaje espera a escribirse
+        """
+        self.ruta = str(ruta)
+        self.lote = lote
+        self.intervalo = intervalo
+        # Una sola conexión compartida por el hilo escritor y las lecturas
+        self._conexion = sqlite3.connect(self.ruta, check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.executescript(ESQUEMA)
+        # Historial creado antes del índice: se indexa en segundo plano por tramos
+        if FTS5_AVAILABLE:
+            existe = self._conexion.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'mensajes_fts'"
+            ).fetchone()
+            with self._conexion:
+                self._conexion.executescript(ESQUEMA_FTS)
+                if not existe:
+                    self._conexion.execute(
+                        "INSERT INTO mensajes_fts_pendiente "
+                        "SELECT MIN(id), MAX(id) FROM mensajes HAVING COUNT(*) > 0"
+                    )
+        else:
+            # Sin FTS5 se busca con LIKE, con el texto normalizado como la consulta
+            self._conexion.create_function("normalizar", 1, normalizar, deterministic=True)
+        self._lock = threading.Lock()       # lista de pendientes
+        self._lock_db = threading.Lock()    # conexión
+        self._pendientes = []
+        (ultimo,) = self._conexion.execute("SELECT MAX(id) FROM mensajes").fetchone()
+        self._siguiente_id = (ultimo or 0) + 1
+        self.estadisticas = {"escritos": 0, "lotes": 0, "escritura_ms": 0.0}
+        self._despertar = threading.Event()
+        self._cerrado = False
+        self._hilo = threading.Thread(target=self._escritor, name="historial-chat", daemon=True)
+        self._hilo.start()
+
+    def agregar(self, texto: str, es_usuario: bool) -> int:
+        """
+        Añade un mensaje (se escribe en el siguiente lote)
+
+        Returns:
+            int: Id del mensaje
+        """
+        with self._lock:
+            id_mensaje = self._siguiente_id
+            self._siguiente_id += 1
+            self._pendientes.append((id_mensaje, time.time(), int(es_usuario), texto))
+            lleno = len(self._pendientes) >= self.lote
+        if lleno:
+            self._despertar.set()
+        return id_mensaje
+
+    def _escritor(self):
+        if FTS5_AVAILABLE:
+            self._indexar_anteriores()
+        while not self._cerrado:
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+            self.vaciar()
+
+    def _indexar_anteriores(self):
+        """Indexa por tramos los mensajes que ya existían al crear el índice"""
+        inicio = time.perf_counter()
+        indexados = 0
+        while not self._cerrado:
+            # Cada tramo es una transacción corta; entre tramos la conexión queda libre
+            with self._lock_db:
+                pendiente = self._conexion.execute("SELECT desde, hasta FROM mensajes_fts_pendiente").fetchone()
+                if pendiente is None:
+                    break
+                desde, hasta = pendiente
+                fin = min(hasta, desde + REINDEXADO_TRAMO - 1)
+                try:
+                    with self._conexion:
+                        cursor = self._conexion.execute(
+                            "INSERT INTO mensajes_fts (rowid, texto) "
+                            "SELECT id, texto FROM mensajes WHERE id BETWEEN ? AND ?", (desde, fin)
+                        )
+                        indexados += cursor.rowcount
+                        if fin >= hasta:
+                            self._conexion.execute("DELETE FROM mensajes_fts_pendiente")
+                        else:
+                            self._conexion.execute("UPDATE mensajes_fts_pendiente SET desde = ?", (fin + 1,))
+                except sqlite3.Error as e:
+                    logger.error(f"❌ Error al indexar el historial del chat: {e}")
+                    return
+            time.sleep(0)   # Cede el turno a las lecturas que esperan la conexión
+        if indexados:
+            logger.info(f"🔎 {indexados} mensajes del historial indexados en "
+                        f"{(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+    def vaciar(self):
+        """Escribe ya los mensajes pendientes (una transacción)"""
+        with self._lock_db:
+            with self._lock:
+                lote, self._pendientes = self._pendientes, []
+            if not lote or self._conexion is None:
+                return
+            inicio = time.perf_counter()
+            try:
+                with self._conexion:
+                    self._conexion.executemany(
+                        "INSERT INTO mensajes (id, fecha, es_usuario, texto) VALUES (?, ?, ?, ?)", lote
+                    )
+                    if FTS5_AVAILABLE:
+                        self._conexion.executemany(
+                            "INSERT INTO mensajes_fts (rowid, texto) VALUES (?, ?)",
+                            [(id_mensaje, texto) for id_mensaje, _, _, texto in lote],
+                        )
+            except sqlite3.Error as e:
+                logger.error(f"❌ Error al guardar el historial del chat: {e}")
+                return
+            self.estadisticas["escritos"] += len(lote)
+            self.estadisticas["lotes"] += 1
+            self.estadisticas["escritura_ms"] += (time.perf_counter() - inicio) * 1000
+
+    def _leer(self, consulta: str, parametros) -> List[Tuple[int, str, bool]]:
+        with self._lock_db:
+            filas = self._conexion.execute(consulta, parametros).fetchall()
+        return [(id_mensaje, texto, bool(es_usuario)) for id_mensaje, texto, es_usuario in reversed(filas)]
+
+    def ultimos(self, limite: int) -> List[Tuple[int, str, bool]]:
+        """
+        Args:
+            limite: Mensajes máximos
+
+        Returns:
+            list: Los últimos mensajes como (id, texto, es_usuario), en orden
+        """
+        self.vaciar()
+        return self._leer("SELECT id, texto, es_usuario FROM mensajes ORDER BY id DESC LIMIT ?", (limite,))
+
+    def anteriores(self, antes_de: int, limite: int) -> List[Tuple[int, str, bool]]:
+        """
+        Args:
+            antes_de: Id del mensaje más antiguo que ya se tiene
+            limite: Mensajes máximos
+
+        Returns:
+            list: Página de mensajes anteriores como (id, texto, es_usuario), en orden
+        """
+        with self._lock:
+            pendiente = bool(self._pendientes) and self._pendientes[0][0] < antes_de
+        if pendiente:
+            self.vaciar()
+        return self._leer(
+            "SELECT id, texto, es_usuario FROM mensajes WHERE id < ? ORDER BY id DESC LIMIT ?",
+            (antes_de, limite),
+        )
+
+    def posteriores(self, despues_de: int, limite: int) -> List[Tuple[int, str, bool]]:
+        """
+        Args:
+            despues_de: Id del mensaje más reciente que ya se tiene
+            limite: Mensajes máximos
+
+        Returns:
+            list: Página de mensajes posteriores como (id, texto, es_usuario), en orden
+        """
+        with self._lock:
+            pendiente = bool(self._pendientes) and self._pendientes[-1][0] > despues_de
+        if pendiente:
+            self.vaciar()
+        # La subconsulta toma los siguientes; _leer espera las filas de la más reciente a la más antigua
+        return self._leer(
+            "SELECT * FROM (SELECT id, texto, es_usuario FROM mensajes WHERE id > ? ORDER BY id LIMIT ?) "
+            "ORDER BY id DESC",
+            (despues_de, limite),
+        )
+
+    def alrededor(self, id_mensaje: int, limite: int) -> List[Tuple[int, str, bool]]:
+        """
+        Args:
+            id_mensaje: Mensaje que queda en el centro (un resultado de búsqueda)
+            limite: Mensajes máximos
+
+        Returns:
+            list: Página con el mensaje en medio como (id, texto, es_usuario), en orden
+        """
+        despues = self.posteriores(id_mensaje - 1, limite - limite // 2)
+        antes = self.anteriores(id_mensaje, limite - len(despues))
+        return antes + despues
+
+    def ultimo_id(self) -> int:
+        """Id del último mensaje añadido (0 si no hay)"""
+        with self._lock:
+            return self._siguiente_id - 1
+
+    def buscar(self, texto: str, limite: int = HISTORIAL_RESULTADOS) -> List[Tuple[int, str, bool, float]]:
+        """
+        Busca mensajes que contengan todas las palabras (o palabras que
+        empiecen por ellas), sin distinguir tildes ni mayúsculas
+
+        Args:
+            texto: Lo que escribe el usuario ("comando navegador")
+            limite: Resultados máximos
+
+        Returns:
+            list: (id, fragmento, es_usuario, fecha), los más relevantes primero;
+                el fragmento marca los términos con MARCA_INICIO y MARCA_FIN
+        """
+        consulta = consulta_fts(texto)
+        if not consulta:
+            return []
+        self.vaciar()   # Lo recién enviado también se encuentra
+        if FTS5_AVAILABLE:
+            sql = (
+                "SELECT m.id, snippet(mensajes_fts, 0, ?, ?, '…', 16), m.es_usuario, m.fecha "
+                "FROM mensajes_fts JOIN mensajes m ON m.id = mensajes_fts.rowid "
+                "WHERE mensajes_fts MATCH ? ORDER BY rank LIMIT ?"
+            )
+            parametros = (MARCA_INICIO, MARCA_FIN, consulta, limite)
+        else:
+            # "cómo" debe encontrar "¿Cómo...": se compara el texto normalizado.
+            # normalizar() solo deja letras, dígitos y "_", el único comodín a escapar
+            palabras = [palabra.replace("_", "\\_") for palabra in normalizar(texto).split()]
+            sql = ("SELECT id, substr(texto, 1, 160), es_usuario, fecha FROM mensajes WHERE "
+                   + " AND ".join("normalizar(texto) LIKE ? ESCAPE '\\'" for _ in palabras)
+                   + " ORDER BY id DESC LIMIT ?")
+            parametros = (*(f"%{palabra}%" for palabra in palabras), limite)
+        with self._lock_db:
+            filas = self._conexion.execute(sql, parametros).fetchall()
+        return [(id_mensaje, fragmento, bool(es_usuario), fecha) for id_mensaje, fragmento, es_usuario, fecha in filas]
+
+    def total(self) -> int:
+        with self._lock_db:
+            (escritos,) = self._conexion.execute("SELECT COUNT(*) FROM mensajes").fetchone()
+        with self._lock:
+            return escritos + len(self._pendientes)
+
+    def cerrar(self):
+        """Escribe lo pendiente y cierra la base de datos"""
+        if self._cerrado:
+            return
+        self._cerrado = True
+        self._despertar.set()
+        self._hilo.join(2.0)
+        self.vaciar()
+        with self._lock_db:
+            self._conexion.close()
+            self._conexion = None
+        logger.info(f"💾 Historial del chat cerrado ({self.estadisticas['escritos']} mensajes "
+                    f"en {self.estadisticas['lotes']} lotes)")
+
+
+# ============== TEST ==============
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    logging.basicConfig(level=logging.INFO)
+    ruta = os.path.join(tempfile.mkdtemp(), "historial.db")
+
+    print("=" * 60)
+    print("💾 HISTORIAL DEL CHAT")
+    print("=" * 60)
+    historial = HistorialChat(ruta)
+    n = 20000
+    inicio = time.perf_counter()
+    for i in range(n):
+        historial.agregar(f"Mensaje {i}: " + "texto de prueba " * (1 + i % 8), es_usuario=i % 2 == 0)
+    agregar = (time.perf_counter() - inicio) / n * 1e6
+    print(f"\n   agregar(): {agregar:.1f} µs por mensaje (sin esperar al disco)")
+    historial.vaciar()
+    estadisticas = historial.estadisticas
+    print(f"   Escritos {estadisticas['escritos']} en {estadisticas['lotes']} lotes, "
+          f"{estadisticas['escritura_ms'] / max(1, estadisticas['lotes']):.2f} ms por lote")
+
+    inicio = time.perf_counter()
+    pagina = historial.ultimos(50)
+    print(f"   ultimos(50): {(time.perf_counter() - inicio) * 1000:.2f} ms → ids {pagina[0][0]}..{pagina[-1][0]}")
+    inicio = time.perf_counter()
+    anterior = historial.anteriores(pagina[0][0], 50)
+    print(f"   anteriores(50): {(time.perf_counter() - inicio) * 1000:.2f} ms → ids {anterior[0][0]}..{anterior[-1][0]}")
+
+    for consulta in ("texto prueb", "MENSAJE 1999", "pruéba"):
+        inicio = time.perf_counter()
+        resultados = historial.buscar(consulta)
+        print(f"   buscar({consulta!r}): {len(resultados)} resultados en "
+              f"{(time.perf_counter() - inicio) * 1000:.2f} ms → {resultados[0][1][:60]!r}")
+    historial.cerrar()
+
+    reabierto = HistorialChat(ruta)
+    print(f"\n   Reabierto: {reabierto.total()} mensajes, siguiente id {reabierto.agregar('hola', True)}")
+    reabierto.cerrar()
@@ -0,0 +1,402 @@
+"""
+Índice de archivos - Búsqueda local de nombres de archivo
+
+Reemplaza a lanzar kfind y esperar: los nombres de archivo de las carpetas
+configuradas (la carpeta personal por defecto) se guardan en un índice de
+trigramas en memoria y en disco. Los trigramas llevan una marca de inicio
+("#in" para "informe"), así que también sirven como índice de prefijos.
+
+El recorrido inicial lista los directorios en paralelo; las actualizaciones
+solo hacen stat de cada directorio y vuelven a listar los que cambiaron de
+mtime (crear, borrar o renombrar un archivo modifica su directorio).
+"""
+import os
+import time
+import pickle
+import logging
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import (
+    CACHE_DIR, ARCHIVOS_RAICES, ARCHIVOS_EXCLUIR, ARCHIVOS_INTERVALO_ACTUALIZACION
+)
+from src.indice_difuso import normalizar
+
+logger = logging.getLogger(__name__)
+
+VERSION_INDICE = 1
+ARCHIVO_INDICE = CACHE_DIR / "archivos.idx"
+PALABRAS_VACIAS = {"el", "la", "los", "las", "de", "del", "mi", "un", "una", "que", "se", "llama"}
+
+
+def normalizar_nombre(nombre: str) -> str:
+    """"Informe_Ventas-2024.PDF" → "informe ventas 2024 pdf\""""
+    return normalizar(nombre.replace("_", " "))
+
+
+def trigramas_nombre(normalizado: str) -> set:
+    # "#" marca el inicio de cada palabra: "#in" sirve de índice de prefijos
+    resultado = set()
+    for palabra in normalizado.split():
+        palabra = f"#{palabra}"
+        resultado.update(palabra[i:i + 3] for i in range(len(palabra) - 2))
+    return resultado
+
+
+def _listar(directorio: str, excluir) -> Tuple[str, float, Optional[List[str]], Optional[List[str]]]:
+    """
+    Returns:
+        tuple: (directorio, mtime, archivos, subdirectorios); listas None si no se pudo leer
+    """
+    archivos, subdirectorios = [], []
+    try:
+        mtime = os.stat(directorio).st_mtime
+        with os.scandir(directorio) as entradas:
+            for entrada in entradas:
+                if entrada.name.startswith(".") or entrada.name in excluir:
+                    continue
+                try:
+                    if entrada.is_dir(follow_symlinks=False):
+                        subdirectorios.append(entrada.name)
+                    else:
+                        archivos.append(entrada.name)
+                except OSError:
+                    continue
+    except OSError:
+        return directorio, 0.0, None, None
+    return directorio, mtime, archivos, subdirectorios
+
+
+# ============== ÍNDICE ==============
+class IndiceArchivos:
+    """Índice de nombres de archivo con actualización incremental por mtime"""
+
+    def __init__(self, raices=None, archivo=ARCHIVO_INDICE, excluir=None, hilos: int = 8):
+        """
+        Args:
+            raices: Carpetas a indexar (por defecto ARCHIVOS_RAICES)
+            archivo: Ruta del índice en disco (None = solo en memoria)
+            excluir: Nombres de carpetas que no se recorren
+            hilos: Hilos para listar directorios
+        """
+        self.raices = [os.path.abspath(os.path.expanduser(r)) for r in (raices or ARCHIVOS_RAICES)]
+        self.archivo = archivo
+        self.excluir = set(ARCHIVOS_EXCLUIR if excluir is None else excluir)
+        self.hilos = hilos
+        self._lock = threading.RLock()
+        self._vaciar()
+        self.actualizado = 0.0
+        self.estadisticas = {
+            "archivos": 0, "directorios": 0, "construccion_ms": 0.0,
+            "directorios_listados": 0, "bytes_disco": 0, "consultas": 0, "consulta_ms": 0.0,
+        }
+
+    def _vaciar(self):
+        self._nombres: List[Optional[str]] = []       # None = archivo borrado
+        self._normalizados: List[Optional[str]] = []
+        self._directorio_de = array("I")
+        self._rutas_directorio: List[str] = []
+        # ruta → [id, mtime, subdirectorios, ids de archivos]
+        self._directorios: Dict[str, list] = {}
+        self._trigramas: Dict[str, array] = {}
+        self._borrados = 0
+
+    # ---------- persistencia ----------
+    def cargar(self) -> bool:
+        """Carga el índice del disco si corresponde a las mismas raíces"""
+        if not self.archivo:
+            return False
+        try:
+            with open(self.archivo, "rb") as f:
+                datos = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+            return False
+        if datos.get("version") != VERSION_INDICE or datos.get("raices") != self.raices:
+            return False
+        with self._lock:
+            self._vaciar()
+            self._rutas_directorio = datos["rutas_directorio"]
+            self._directorios = datos["directorios"]
+            self._nombres = datos["nombres"]
+            self._directorio_de = datos["directorio_de"]
+            self._normalizados = datos["normalizados"]
+            self._trigramas = datos["trigramas"]
+            self._borrados = datos["borrados"]
+            self.actualizado = datos["actualizado"]
+        self.estadisticas["bytes_disco"] = os.path.getsize(self.archivo)
+        return True
+
+    def guardar(self):
+        if not self.archivo:
+            return
+        with self._lock:
+            datos = {
+                "version": VERSION_INDICE, "raices": self.raices, "actualizado": self.actualizado,
+                "rutas_directorio": self._rutas_directorio, "directorios": self._directorios,
+                "nombres": self._nombres, "normalizados": self._normalizados,
+                "directorio_de": self._directorio_de,
+                "trigramas": self._trigramas, "borrados": self._borrados,
+            }
+            temporal = f"{self.archivo}.tmp"
+            try:
+                os.makedirs(os.path.dirname(temporal) or ".", exist_ok=True)
+                with open(temporal, "wb") as f:
+                    pickle.dump(datos, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temporal, self.archivo)
+                self.estadisticas["bytes_disco"] = os.path.getsize(self.archivo)
+            except OSError as e:
+                logger.warning(f"No se pudo guardar el índice de archivos: {e}")
+
+    # ---------- construcción incremental ----------
+    def _agregar_archivo(self, id_directorio: int, nombre: str) -> int:
+        id_archivo = len(self._nombres)
+        normalizado = normalizar_nombre(nombre)
+        self._nombres.append(nombre)
+        self._normalizados.append(normalizado)
+        self._directorio_de.append(id_directorio)
+        for t in trigramas_nombre(normalizado):
+            lista = self._trigramas.get(t)
+            if lista is None:
+                self._trigramas[t] = lista = array("I")
+            lista.append(id_archivo)
+        return id_archivo
+
+    def _borrar_archivo(self, id_archivo: int):
+        # Lápida: las listas de trigramas se limpian al compactar
+        self._nombres[id_archivo] = None
+        self._normalizados[id_archivo] = None
+        self._borrados += 1
+
+    def _aplicar(self, directorio, mtime, archivos, subdirectorios):
+        info = self._directorios.get(directorio)
+        if info is None:
+            info = [len(self._rutas_directorio), 0.0, [], []]
+            self._rutas_directorio.append(directorio)
+            self._directorios[directorio] = info
+        actuales = {self._nombres[i]: i for i in info[3] if self._nombres[i] is not None}
+        nuevos = set(archivos)
+        for nombre, id_archivo in actuales.items():
+            if nombre not in nuevos:
+                self._borrar_archivo(id_archivo)
+        ids = [i for n, i in actuales.items() if n in nuevos]
+        ids.extend(self._agregar_archivo(info[0], n) for n in archivos if n not in actuales)
+        info[1], info[2], info[3] = mtime, subdirectorios, ids
+
+    def _quitar_directorio(self, directorio):
+        info = self._directorios.pop(directorio)
+        for id_archivo in info[3]:
+            if self._nombres[id_archivo] is not None:
+                self._borrar_archivo(id_archivo)
+
+    def actualizar(self) -> Dict[str, float]:
+        """
+        Recorre las raíces en paralelo y vuelve a listar solo los directorios
+        cuyo mtime cambió
+
+        Returns:
+            dict: directorios revisados y listados, archivos y duración en ms
+        """
+        inicio = time.perf_counter()
+        revisados = listados = 0
+        visitados = set()
+        frontera = [r for r in self.raices if os.path.isdir(r)]
+        with ThreadPoolExecutor(max_workers=self.hilos) as pool:
+            while frontera:
+                conocidos = {d: self._directorios.get(d) for d in frontera}
+                resultados = pool.map(lambda d: self._revisar(d, conocidos[d]), frontera)
+                siguiente = []
+                with self._lock:
+                    for directorio, mtime, archivos, subdirectorios in resultados:
+                        revisados += 1
+                        if mtime is None:
+                            continue
+                        visitados.add(directorio)
+                        if archivos is not None:
+                            self._aplicar(directorio, mtime, archivos, subdirectorios)
+                            listados += 1
+                        siguiente.extend(
+                            os.path.join(directorio, s) for s in self._directorios[directorio][2]
+                        )
+                frontera = siguiente
+        with self._lock:
+            for directorio in [d for d in self._directorios if d not in visitados]:
+                self._quitar_directorio(directorio)
+            if self._borrados > max(1000, len(self._nombres) // 4):
+                self._compactar()
+            self.actualizado = time.time()
+        if listados:
+            self.guardar()
+        duracion = (time.perf_counter() - inicio) * 1000
+        vivos = len(self._nombres) - self._borrados
+        self.estadisticas.update(
+            archivos=vivos, directorios=len(self._directorios), construccion_ms=duracion,
+            directorios_listados=listados,
+        )
+        logger.info(f"🗃️ Índice de archivos: {vivos} archivos, {listados}/{revisados} directorios listados en {duracion:.0f} ms")
+        return {"revisados": revisados, "listados": listados, "archivos": vivos, "duracion_ms": duracion}
+
+    def _revisar(self, directorio, conocido):
+        # Directorio sin cambios: basta un stat; se sigue bajando por sus subdirectorios guardados
+        if conocido is not None:
+            try:
+                mtime = os.stat(directorio).st_mtime
+            except OSError:
+                return directorio, None, None, None
+            if mtime == conocido[1]:
+                return directorio, mtime, None, None
+        directorio, mtime, archivos, subdirectorios = _listar(directorio, self.excluir)
+        if archivos is None:
+            return directorio, None, None, None
+        return directorio, mtime, archivos, subdirectorios
+
+    def _compactar(self):
+        """Reconstruye los ids sin lápidas"""
+        directorios = [(ruta, info) for ruta, info in self._directorios.items()]
+        nombres = [[self._nombres[i] for i in info[3] if self._nombres[i] is not None] for _, info in directorios]
+        self._vaciar()
+        for (ruta, info), archivos in zip(directorios, nombres):
+            self._aplicar(ruta, info[1], archivos, info[2])
+
+    # ---------- consultas ----------
+    def buscar(self, consulta: str, limite: int = 5) -> List[str]:
+        """
+        Busca archivos cuyo nombre contenga todas las palabras de la consulta
+
+        Args:
+            consulta: "informe de ventas", "foto playa"...
+            limite: Máximo de resultados
+
+        Returns:
+            list: Rutas completas, las mejores primero
+        """
+        inicio = time.perf_counter()
+        palabras = [p for p in normalizar_nombre(consulta).split() if p not in PALABRAS_VACIAS] \
+            or normalizar_nombre(consulta).split()
+        with self._lock:
+            candidatos = None
+            for palabra in palabras:
+                tris = trigramas_nombre(palabra)
+                listas = sorted((self._trigramas.get(t, ()) for t in tris), key=len)
+                if not listas:
+                    continue
+                ids = set(listas[0]).intersection(*listas[1:]) if listas[0] else set()
+                candidatos = ids if candidatos is None else candidatos & ids
+                if not candidatos:
+                    break
+            puntuados = []
+            for id_archivo in candidatos or ():
+                normalizado = self._normalizados[id_archivo]
+                if normalizado is None or not all(p in normalizado for p in palabras):
+                    continue
+                puntuados.append((self._puntuar(normalizado, palabras), id_archivo))
+            puntuados.sort(key=lambda par: (-par[0], len(self._nombres[par[1]])))
+            resultado = [
+                os.path.join(self._rutas_directorio[self._directorio_de[i]], self._nombres[i])
+                for _, i in puntuados[:limite]
+            ]
+        self.estadisticas["consultas"] += 1
+        self.estadisticas["consulta_ms"] = (time.perf_counter() - inicio) * 1000
+        return resultado
+
+    @staticmethod
+    def _puntuar(normalizado: str, palabras: List[str]) -> int:
+        tokens = normalizado.split()
+        raiz = " ".join(tokens[:-1]) if len(tokens) > 1 else normalizado
+        if raiz == " ".join(palabras):
+            return 3  # Nombre exacto sin extensión
+        if all(any(t.startswith(p) for t in tokens) for p in palabras):
+            return 2  # Cada palabra empieza una palabra del nombre
+        return 1
+
+
+_indice = None
+_hilo = None
+_lock_global = threading.Lock()
+
+
+def obtener_indice_archivos() -> IndiceArchivos:
+    """Índice compartido cargado del disco (sin recorrer nada todavía)"""
+    global _indice
+    with _lock_global:
+        if _indice is None:
+            _indice = IndiceArchivos()
+            _indice.cargar()
+    return _indice
+
+
+def actualizar_en_segundo_plano(forzar: bool = False) -> Optional[threading.Thread]:
+    """
+    Lanza una actualización si el índice es más viejo que
+    ARCHIVOS_INTERVALO_ACTUALIZACION y no hay otra en curso
+
+    Returns:
+        Thread: Hilo de la actualización o None si no hacía falta
+    """
+    global _hilo
+    indice = obtener_indice_archivos()
+    with _lock_global:
+        if _hilo is not None and _hilo.is_alive():
+            return _hilo
+        if not forzar and time.time() - indice.actualizado < ARCHIVOS_INTERVALO_ACTUALIZACION:
+            return None
+        _hilo = threading.Thread(target=indice.actualizar, daemon=True, name="indice-archivos")
+        _hilo.start()
+        return _hilo
+
+
+# ============== BENCHMARK ==============
+if __name__ == "__main__":
+    import sys
+    import random
+    import tempfile
+    import statistics
+
+    logging.basicConfig(level=logging.WARNING)
+    raiz = sys.argv[1] if len(sys.argv) > 1 else None
+
+    print("=" * 60)
+    print("🗃️  ÍNDICE DE ARCHIVOS")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as temporal:
+        if raiz is None:
+            # Árbol sintético: 2000 directorios, 40000 archivos
+            raiz = os.path.join(temporal, "home")
+            palabras = ["informe", "ventas", "foto", "playa", "factura", "notas", "proyecto", "tesis", "cv", "receta"]
+            extensiones = ["pdf", "docx", "jpg", "txt", "xlsx", "py"]
+            azar = random.Random(1)
+            for d in range(2000):
+                directorio = os.path.join(raiz, f"carpeta{d // 100}", f"sub{d}")
+                os.makedirs(directorio)
+                for a in range(20):
+                    nombre = "_".join(azar.sample(palabras, 2)) + f"_{a}.{azar.choice(extensiones)}"
+                    open(os.path.join(directorio, nombre), "w").close()
+        archivo = os.path.join(temporal, "archivos.idx")
+
+        indice = IndiceArchivos([raiz], archivo)
+        r = indice.actualizar()
+        print(f"\n❄️  Construcción: {r['duracion_ms']:.0f} ms, {r['archivos']} archivos en {r['listados']} directorios")
+        print(f"💾 En disco: {indice.estadisticas['bytes_disco'] / 1024:.0f} KB")
+
+        indice = IndiceArchivos([raiz], archivo)
+        inicio = time.perf_counter()
+        indice.cargar()
+        print(f"📂 Carga desde disco: {(time.perf_counter() - inicio) * 1000:.0f} ms")
+        r = indice.actualizar()
+        print(f"♻️  Actualización sin cambios: {r['duracion_ms']:.0f} ms ({r['listados']} directorios listados)")
+
+        if os.path.basename(raiz) == "home":
+            open(os.path.join(raiz, "carpeta3", "sub300", "presupuesto_boda.xlsx"), "w").close()
+        r = indice.actualizar()
+        print(f"➕ Tras crear un archivo: {r['duracion_ms']:.0f} ms ({r['listados']} directorio listado)")
+
+        tiempos = []
+        for consulta in ["presupuesto boda", "informe ventas", "foto", "tesis 7", "cv", "no existe nada"] * 20:
+            inicio = time.perf_counter()
+            resultados = indice.buscar(consulta, 3)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        print(f"\n🔎 Consulta: p50 {statistics.median(tiempos):.2f} ms, máx {max(tiempos):.2f} ms")
+        for consulta in ["presupuesto boda", "informe ventas"]:
+            print(f"   '{consulta}' → {[os.path.basename(p) for p in indice.buscar(consulta, 3)]}")
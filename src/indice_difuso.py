@@ -0,0 +1,251 @@
+"""
+Índice difuso de alias - Programas y sitios mal reconocidos por la voz
+
+El reconocimiento de voz suele partir o deformar los nombres ("fire fox",
+"you tube", "visual code"), y esas variantes no coinciden con los alias
+exactos. Este índice guarda cada alias compactado (sin espacios ni tildes)
+en un índice invertido de trigramas; una consulta reúne candidatos por
+trigramas compartidos y los confirma con una distancia de edición acotada.
+"""
+import re
+import logging
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config.settings import (
+    ALIAS_DIFUSO_UMBRAL, VERBOS_APERTURA, WEB_SHORTCUTS, get_programas_for_os
+)
+from src.aplicaciones_escritorio import alias_aplicaciones
+
+logger = logging.getLogger(__name__)
+
+# Palabras que nunca forman parte de un nombre de programa o sitio
+PALABRAS_VACIAS = {
+    "el", "la", "los", "las", "un", "una", "de", "del", "en", "a", "al", "mi",
+    "por", "favor", "porfa", "me", "te", "y", "que", "con", "para",
+    "programa", "aplicacion", "pagina", "sitio",
+}
+LARGO_MINIMO = 4       # Alias más cortos solo coinciden de forma exacta
+MAX_PALABRAS_TRAMO = 3  # "visual studio code"
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas, sin tildes ni puntuación"""
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^\w\s]", " ", texto).split())
+
+
+def trigramas(clave: str) -> set:
+    clave = f"#{clave}#"
+    return {clave[i:i + 3] for i in range(len(clave) - 2)}
+
+
+def distancia_acotada(a: str, b: str, maximo: int) -> int:
+    """
+    Levenshtein que abandona en cuanto supera `maximo`
+
+    Returns:
+        int: Distancia, o maximo + 1 si es mayor
+    """
+    if abs(len(a) - len(b)) > maximo:
+        return maximo + 1
+    anterior = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        actual = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            actual[j] = min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + (ca != cb))
+        if min(actual) > maximo:
+            return maximo + 1
+        anterior = actual
+    return anterior[-1]
+
+
+# ============== ÍNDICE ==============
+class IndiceDifuso:
+    """Índice invertido de trigramas sobre alias compactados"""
+
+    def __init__(self, umbral: float = ALIAS_DIFUSO_UMBRAL):
+        """
+        Args:
+            umbral: Similitud mínima (0-1) para aceptar una coincidencia
+        """
+        self.umbral = umbral
+        self._entradas: List[Tuple[str, str, object, str, Tuple[str, ...]]] = []
+        self._por_clave: Dict[Tuple[str, str], int] = {}
+        self._trigramas: Dict[str, List[int]] = defaultdict(list)
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def agregar(self, alias: str, valor, origen: str):
+        """
+        Args:
+            alias: Nombre tal como lo diría el usuario
+            valor: Lo que representa (ejecutable, URL...)
+            origen: "programa", "web", "aplicacion"...
+        """
+        palabras = tuple(normalizar(alias).split())
+        clave = "".join(palabras)
+        if len(clave) < 3 or (clave, origen) in self._por_clave:
+            return
+        indice = len(self._entradas)
+        self._entradas.append((clave, alias, valor, origen, palabras))
+        self._por_clave[(clave, origen)] = indice
+        for t in trigramas(clave):
+            self._trigramas[t].append(indice)
+
+    def buscar(self, texto: str, origenes=None, umbral: Optional[float] = None,
+               limite: int = 1) -> List[Tuple[float, str, object, str]]:
+        """
+        Busca alias parecidos a cualquier tramo de 1 a 3 palabras del texto
+
+        Args:
+            texto: Parte del comando donde puede estar el nombre
+            origenes: Restringe a estos orígenes (None = todos)
+            umbral: Similitud mínima (por defecto la del índice)
+            limite: Máximo de resultados
+
+        Returns:
+            list: [(similitud, alias, valor, origen)] de mayor a menor similitud
+        """
+        umbral = self.umbral if umbral is None else umbral
+        palabras = [p for p in normalizar(texto).split() if p not in PALABRAS_VACIAS]
+        mejores: Dict[int, float] = {}
+        for inicio in range(len(palabras)):
+            for fin in range(inicio + 1, min(inicio + MAX_PALABRAS_TRAMO, len(palabras)) + 1):
+                tramo = palabras[inicio:fin]
+                for indice, similitud in self._candidatos(tramo, origenes, umbral):
+                    if similitud > mejores.get(indice, 0.0):
+                        mejores[indice] = similitud
+        ordenados = sorted(mejores.items(), key=lambda par: -par[1])[:limite]
+        return [(s, self._entradas[i][1], self._entradas[i][2], self._entradas[i][3]) for i, s in ordenados]
+
+    def _candidatos(self, tramo, origenes, umbral):
+        consulta = "".join(tramo)
+        if len(consulta) < 3:
+            return
+        # Trigramas compartidos como filtro previo (barato)
+        conteo: Dict[int, int] = defaultdict(int)
+        propios = trigramas(consulta)
+        for t in propios:
+            for indice in self._trigramas.get(t, ()):
+                conteo[indice] += 1
+        for indice, compartidos in conteo.items():
+            clave, _, _, origen, palabras = self._entradas[indice]
+            if origenes and origen not in origenes:
+                continue
+            # Cota superior de la similitud de Dice: descarta sin calcular distancias
+            if 2 * compartidos / (len(propios) + len(clave) + 2) < umbral - 0.25:
+                continue
+            if clave == consulta:
+                yield indice, 1.0
+                continue
+            if len(clave) < LARGO_MINIMO:
+                continue
+            largo = max(len(clave), len(consulta))
+            maximo = int(largo * (1 - umbral))
+            similitud = 0.0
+            if maximo > 0:
+                distancia = distancia_acotada(consulta, clave, maximo)
+                if distancia <= maximo:
+                    similitud = 1 - distancia / largo
+            if len(palabras) > 1 and len(tramo) > 1:
+                # "visual code" frente a "visual studio code": palabras en común
+                comunes = sum(len(p) for p in tramo if p in palabras)
+                similitud = max(similitud, 2 * comunes / (len(consulta) + len(clave)))
+            if similitud >= umbral:
+                yield indice, similitud
+
+
+# ============== ÍNDICE COMPARTIDO ==============
+# Fuentes de alias: nombre → (origen, función que retorna {alias: valor})
+_fuentes: Dict[str, Tuple[str, Callable[[], Dict[str, object]]]] = {
+    "programas": ("programa", get_programas_for_os),
+    "web": ("web", lambda: WEB_SHORTCUTS),
+    "aplicaciones": ("aplicacion", alias_aplicaciones),
+}
+_indice = None
+_firma = None
+_lock = threading.Lock()
+# Los verbos se comparan con el comando normalizado: "ábreme" → "abreme"
+_patron_verbos = re.compile(
+    r"\b(?:" + "|".join(re.escape(normalizar(v)) for v in VERBOS_APERTURA) + r")\b"
+)
+
+
+def registrar_fuente_alias(nombre: str, origen: str, obtener: Callable[[], Dict[str, object]]):
+    """
+    Añade una fuente de alias al índice (p. ej. aplicaciones descubiertas)
+
+    Args:
+        nombre: Identificador de la fuente
+        origen: Origen con el que se etiquetan sus alias
+        obtener: Función que retorna {alias: valor}; el índice se reconstruye
+            cuando cambia el objeto retornado o su tamaño
+    """
+    global _indice
+    with _lock:
+        _fuentes[nombre] = (origen, obtener)
+        _indice = None
+
+
+def obtener_indice() -> IndiceDifuso:
+    """Índice con todas las fuentes registradas; se reconstruye si cambiaron"""
+    global _indice, _firma
+    datos = {nombre: (origen, obtener()) for nombre, (origen, obtener) in list(_fuentes.items())}
+    firma = tuple((nombre, id(alias), len(alias)) for nombre, (_, alias) in datos.items())
+    if _indice is None or firma != _firma:
+        with _lock:
+            indice = IndiceDifuso()
+            for origen, alias in datos.values():
+                for nombre, valor in alias.items():
+                    indice.agregar(nombre, valor, origen)
+            _indice, _firma = indice, firma
+            logger.debug(f"Índice difuso de alias: {len(indice)} entradas")
+    return _indice
+
+
+def buscar_alias(comando: str, origenes=None) -> Optional[Tuple[float, str, object, str]]:
+    """
+    Busca un alias aproximado después de un verbo de apertura ("abre", "ejecuta"...)
+
+    Args:
+        comando: Comando del usuario
+        origenes: Orígenes admitidos (None = todos)
+
+    Returns:
+        tuple: (similitud, alias, valor, origen) o None
+    """
+    comando = normalizar(comando)
+    verbo = _patron_verbos.search(comando)
+    if not verbo:
+        return None
+    resultados = obtener_indice().buscar(comando[verbo.end():], origenes)
+    return resultados[0] if resultados else None
+
+
+# ============== BENCHMARK ==============
+if __name__ == "__main__":
+    import timeit
+
+    indice = obtener_indice()
+    consultas = [
+        "abre fire fox", "abre you tube", "abre visual code", "abre el calculador",
+        "abre git hub", "abre whats app", "abre la terminal", "abre netflis",
+        "abre una hoja de cálculo", "abre la puerta", "ábreme you tube",
+    ]
+
+    print("=" * 60)
+    print(f"🔎 ÍNDICE DIFUSO ({len(indice)} alias, umbral {indice.umbral})")
+    print("=" * 60)
+    for consulta in consultas:
+        resultado = buscar_alias(consulta)
+        destino = f"{resultado[1]} ({resultado[0]:.2f}, {resultado[3]})" if resultado else "—"
+        print(f"   {consulta:28s} → {destino}")
+
+    repeticiones = 2000
+    total = timeit.timeit(lambda: [buscar_alias(c) for c in consultas], number=repeticiones)
+    print(f"\n📊 {total / (repeticiones * len(consultas)) * 1e6:.1f} µs por consulta")
@@ -0,0 +1,193 @@
+"""
+Motor de intenciones - Todos los disparadores compilados en una sola expresión
+
+Cada habilidad registrada aporta sus disparadores (subcadenas, palabras
+completas o expresiones regulares). Se compilan una vez en una expresión
+combinada que, en un único recorrido, encuentra las posiciones donde
+empieza algún disparador; en esas posiciones se confirma cada habilidad con
+su propia expresión, de mayor a menor prioridad, y la primera que acepta
+devuelve sus datos (slots).
+"""
+import re
+import logging
+from typing import Optional, Tuple, Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+MODOS = ("subcadena", "palabra", "regex")
+
+
+class Coincidencia:
+    """Disparador encontrado en el comando"""
+
+    __slots__ = ("comando", "texto", "disparador", "inicio", "fin", "valor")
+
+    def __init__(self, comando, texto, disparador, inicio, fin, valor):
+        self.comando = comando        # Comando original
+        self.texto = texto            # Comando en minúsculas
+        self.disparador = disparador  # Texto que coincidió
+        self.inicio = inicio
+        self.fin = fin
+        self.valor = valor            # Valor asociado al disparador (p. ej. el ejecutable)
+
+    @property
+    def resto(self) -> str:
+        """Texto que sigue al disparador"""
+        return self.texto[self.fin:]
+
+
+# ============== MOTOR ==============
+class MotorIntenciones:
+    """Expresión combinada de disparadores con sus tablas de valores"""
+
+    def __init__(self, habilidades: List[Any]):
+        """
+        Args:
+            habilidades: Objetos con `nombre`, `prioridad`, `modo`,
+                `tabla_disparadores()` ({disparador: valor}) y
+                `extraer(Coincidencia)` (slots o None para descartar)
+        """
+        self.habilidades = sorted(habilidades, key=lambda h: -h.prioridad)
+        self.tablas = []
+        self.patrones = []
+        alternativas = []
+        for habilidad in self.habilidades:
+            tabla = habilidad.tabla_disparadores()
+            self.tablas.append(tabla)
+            alternativa = _alternativa(tabla, habilidad.modo)
+            self.patrones.append(re.compile(alternativa) if alternativa else None)
+            if alternativa:
+                alternativas.append(f"(?:{alternativa})")
+        # El lookahead encuentra todas las posiciones (también solapadas) donde
+        # empieza algún disparador; solo indica dónde, no de qué habilidad: en
+        # una misma posición pueden coincidir varias
+        self.patron = re.compile(f"(?=(?:{'|'.join(alternativas)}))") if alternativas else None
+        self.total_disparadores = sum(len(t) for t in self.tablas)
+
+    def detectar(self, comando: str) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        """
+        Recorre el comando una vez y confirma las habilidades solo en las
+        posiciones donde empieza algún disparador
+
+        Args:
+            comando: Comando del usuario
+
+        Returns:
+            tuple: (habilidad, slots) o None si debe atenderlo la IA
+        """
+        if not comando or self.patron is None:
+            return None
+        texto = comando.lower()
+        posiciones = [m.start() for m in self.patron.finditer(texto)]
+        if not posiciones:
+            return None
+
+        # Por prioridad en todas las posiciones: "googlea el clima" es una
+        # búsqueda aunque "clima" también sea disparador
+        for habilidad, tabla, patron in zip(self.habilidades, self.tablas, self.patrones):
+            if patron is None:
+                continue
+            for posicion in posiciones:
+                m = patron.match(texto, posicion)
+                if not m:
+                    continue
+                inicio, fin = m.span()
+                disparador = texto[inicio:fin]
+                valor = tabla.get(disparador) if habilidad.modo != "regex" else None
+                slots = habilidad.extraer(
+                    Coincidencia(comando, texto, disparador, inicio, fin, valor)
+                )
+                if slots is not None:
+                    return habilidad, slots
+        return None
+
+
+def _alternativa(tabla, modo: str) -> str:
+    if modo == "regex":
+        return "|".join(f"(?:{patron})" for patron in tabla)
+    # Más largos primero: en una misma posición gana "buscar en google" sobre "busca"
+    plantilla = r"\b{}\b" if modo == "palabra" else "{}"
+    ordenados = sorted(tabla, key=len, reverse=True)
+    return "|".join(plantilla.format(re.escape(d)) for d in ordenados)
+
+
+def limpiar_termino(termino: str, muletillas) -> Optional[str]:
+    """
+    Args:
+        termino: Texto que sigue a una palabra clave
+        muletillas: Fragmentos que se eliminan del término
+
+    Returns:
+        str: Término limpio o None si queda vacío
+    """
+    termino = termino.strip()
+    for muletilla in muletillas:
+        termino = termino.replace(muletilla, "").strip()
+    return termino or None
+
+
+# ============== BENCHMARK ==============
+if __name__ == "__main__":
+    import timeit
+
+    from config.settings import EXIT_COMMANDS
+    from src.habilidades_sistema import detectar_programa
+    from src.habilidades_web import detectar_pagina_web, detectar_busqueda
+    from src.registro_habilidades import registro
+
+    def cadena_original(comando):
+        """Recorridos lineales de procesar_comando(), sin ejecutar nada"""
+        if any(palabra in comando for palabra in EXIT_COMMANDS):
+            return "Salida"
+        for nombre, detectar in (("Sistema", detectar_programa),
+                                 ("Web", detectar_pagina_web),
+                                 ("Búsqueda", detectar_busqueda)):
+            if detectar(comando):
+                return nombre
+        return None
+
+    comandos = [
+        "abre firefox", "abre la calculadora por favor", "abre youtube",
+        "quiero ver github", "busca recetas de pasta", "buscar en google python",
+        "googlea el clima de mañana", "abre https://example.com/Ruta",
+        "adiós aurora", "eso es todo", "qué hora es en japón",
+        "cuéntame un chiste sobre programadores",
+        "explícame cómo funciona la fotosíntesis en las plantas con detalle",
+        "cuál es la capital de australia", "abre vscode y busca el error",
+    ]
+
+    print("=" * 60)
+    print("⚡ BENCHMARK: MOTOR COMPILADO vs CADENA ORIGINAL")
+    print("=" * 60)
+
+    motor = registro.motor()
+    print(f"\n{motor.total_disparadores} disparadores compilados\n")
+    distintos = 0
+    for comando in comandos:
+        original = cadena_original(comando)
+        resultado = motor.detectar(comando)
+        compilado = resultado[0].nombre if resultado else None
+        if compilado == "URL":
+            compilado = "Web"
+        marca = "✅" if original == compilado else "⚠️ "
+        distintos += original != compilado
+        print(f"   {marca} {comando[:40]:40s} → {compilado or 'IA'} {resultado[1] if resultado else ''}")
+
+    # Misma posición: si la habilidad prioritaria descarta, la siguiente sigue pudiendo atender
+    from types import SimpleNamespace
+    prioritaria = SimpleNamespace(nombre="Prioritaria", prioridad=2, modo="subcadena",
+                                  tabla_disparadores=lambda: {"abre": None}, extraer=lambda c: None)
+    siguiente = SimpleNamespace(nombre="Siguiente", prioridad=1, modo="palabra",
+                                tabla_disparadores=lambda: {"abre el": None}, extraer=lambda c: {})
+    resultado = MotorIntenciones([prioritaria, siguiente]).detectar("abre el mapa")
+    print(f"\n   Disparadores solapados → {resultado[0].nombre if resultado else 'IA'} (esperado: Siguiente)")
+
+    repeticiones = 2000
+    t_original = timeit.timeit(lambda: [cadena_original(c) for c in comandos], number=repeticiones)
+    t_motor = timeit.timeit(lambda: [motor.detectar(c) for c in comandos], number=repeticiones)
+    por_comando = repeticiones * len(comandos) / 1e6
+    print(f"\n📊 Cadena original: {t_original / por_comando:6.2f} µs/comando")
+    print(f"📊 Motor compilado: {t_motor / por_comando:6.2f} µs/comando "
+          f"({t_original / t_motor:.1f}x)")
+    print(f"   Intenciones distintas: {distintos}/{len(comandos)} "
+          f"(volumen, YouTube y clima no existían en la cadena original, que abría Google con \"googlea\")")
@@ -7,18 +7,31 @@ import sys
 import threading
 import logging
 import re
+import math
 import time
+import html
 
-from PySide6.QtCore import Qt, QPropertyAnimation, QThread, Signal, QTimer, QEasingCurve, QPoint
-from PySide6.QtGui import QFont, QCursor, QPainter, QColor, QLinearGradient, QRadialGradient, QClipboard
+from collections import OrderedDict
+
+from PySide6.QtCore import (
+    Qt, QPropertyAnimation, QThread, Signal, QTimer, QEasingCurve, QPoint,
+    QAbstractListModel, QModelIndex, QRect, QRectF, QSize, QPointF
+)
+from PySide6.QtGui import QFont, QFontMetrics, QCursor, QPainter, QPen, QColor, QPixmap, QLinearGradient, QRadialGradient, QClipboard
 from PySide6.QtWidgets import (
     QApplication, QWidget, QLabel, QPushButton, QLineEdit,
-    QVBoxLayout, QHBoxLayout, QScrollArea, QFrame, QTextEdit
+    QVBoxLayout, QHBoxLayout, QFrame, QTextEdit,
+    QListView, QStyledItemDelegate, QAbstractItemView, QStackedWidget, QStackedLayout, QTextBrowser
 )
 
-from config.settings import WINDOW_TITLE
+from config.settings import WINDOW_TITLE, PIPELINE_INTERVALO_METRICAS, HISTORIAL_PAGINA, HISTORIAL_VENTANA
 from src.main import escuchar, procesar_comando
-from src.cerebro_ia import generar_respuesta
+from src.pipeline_voz import PipelineVoz, formatear_metricas
+from src.reloj_animacion import obtener_reloj, medir_pintado
+from src.pool_tareas import obtener_pool_tareas
+from src.cerebro_ia import generar_respuesta_stream
+from src.render_markdown import MarkdownIncremental, tiene_markdown
+from src.historial_chat import HistorialChat, MARCA_INICIO, MARCA_FIN
 from gtts import gTTS
 import os
 import platform
@@ -112,207 +125,292 @@ def hablar_interruptible(texto):
             pass
 
 
-# ============== WORKER PARA CHAT ==============
-class ChatWorker(QThread):
-    """Worker para generar respuestas en el chat sin bloquear la UI"""
-    response_ready = Signal(str)
-    error_occurred = Signal(str)
-    
-    def __init__(self, pregunta):
-        super().__init__()
-        self.pregunta = pregunta
-    
-    def run(self):
-        try:
-            respuesta = generar_respuesta(self.pregunta)
-            self.response_ready.emit(respuesta)
-        except Exception as e:
-            logger.error(f"Error al generar respuesta: {e}")
-            self.error_occurred.emit("Lo siento, ocurrió un error al procesar tu mensaje.")
+# ============== TAREA DEL CHAT ==============
+def generar_respuesta_chat(tarea, pregunta):
+    """
+    Genera la respuesta del chat en el carril de red del pool de tareas
+
+    Args:
+        tarea: Manejador de la tarea (cada fragmento sale con tarea.avanzar())
+        pregunta: Mensaje del usuario
+
+    Returns:
+        str: Respuesta completa (o lo recibido hasta que se pausó)
+    """
+    partes = []
+    for fragmento in generar_respuesta_stream(pregunta):
+        if tarea.cancelada:
+            break
+        partes.append(fragmento)
+        tarea.avanzar(fragmento)
+    return "".join(partes)
 
 
 # ============== WORKER PARA VOZ ==============
+COMANDOS_SALIDA_VOZ = ["adiós", "adios", "eso es todo", "termina"]
+
+
 class VoiceWorker(QThread):
-    """Thread para modo voz continuo con interrupción"""
+    """Thread que mantiene vivo el pipeline de voz continuo"""
     message_received = Signal(str)
     response_ready = Signal(str)
     status_updated = Signal(str)
+    metrics_updated = Signal(dict)
     should_stop = Signal()
     
     def __init__(self):
         super().__init__()
         self.running = True
         self.pausar_escucha = False
+        self.pipeline = None
+        self._detenido = threading.Event()
+    
+    def procesar(self, comando):
+        """Procesa un comando reconocido; la despedida cierra la sesión"""
+        if any(palabra in comando for palabra in COMANDOS_SALIDA_VOZ):
+            return "Hasta luego. Fue un placer ayudarte.", False
+        respuesta, _ = procesar_comando(comando)
+        return respuesta, True
     
     def run(self):
-        global voz_activa, detener_voz_flag
-        
-        while self.running:
-            if voz_activa or self.pausar_escucha:
-                time.sleep(0.1)
-                continue
-            
-            self.status_updated.emit("🎤 Escuchando...")
-            comando = escuchar()
-            
-            if comando == "ERROR_MIC":
-                self.status_updated.emit("❌ Error de micrófono")
-                break
-            
-            if not comando:
-                continue
-            
-            # Interrumpir si está hablando
-            if voz_activa:
-                detener_voz_flag = True
-                time.sleep(0.3)
-                detener_voz_flag = False
-            
-            self.message_received.emit(f"Tú: {comando}")
-            
-            if any(palabra in comando for palabra in ["adiós", "adios", "eso es todo", "termina"]):
-                respuesta = "Hasta luego. Fue un placer ayudarte."
-                self.response_ready.emit(respuesta)
-                hablar_interruptible(limpiar_texto_para_voz(respuesta))
-                self.should_stop.emit()
-                break
-            
-            self.status_updated.emit("🧠 Procesando...")
-            respuesta, _ = procesar_comando(comando)
-            
-            if respuesta:
-                self.response_ready.emit(respuesta)
-                self.status_updated.emit("💬 Respondiendo...")
-                hablar_interruptible(limpiar_texto_para_voz(respuesta))
-        
-        self.status_updated.emit("💤 Modo voz desactivado")
+        self.pipeline = PipelineVoz(
+            procesar=self.procesar,
+            limpiar=limpiar_texto_para_voz,
+            pausar_captura=lambda: voz_activa or self.pausar_escucha,
+            on_transcripcion=lambda comando: self.message_received.emit(f"Tú: {comando}"),
+            on_respuesta=self.response_ready.emit,
+            on_estado=self.status_updated.emit,
+            on_fin=self.should_stop.emit,
+        )
+        self.pipeline.iniciar()
+        
+        while self.running and self.pipeline.activo:
+            metricas = self.pipeline.metricas()
+            logger.debug(f"Pipeline de voz: {formatear_metricas(metricas)}")
+            self.metrics_updated.emit(metricas)
+            self._detenido.wait(PIPELINE_INTERVALO_METRICAS)
+        
+        self.pipeline.detener()
+        self.metrics_updated.emit(self.pipeline.metricas())
+        if self.running:
+            # El pipeline terminó por sí solo (error de micrófono)
+            self.status_updated.emit("💤 Modo voz desactivado")
     
     def stop(self):
-        global detener_voz_flag
-        detener_voz_flag = True
         self.running = False
-        time.sleep(0.3)
+        self._detenido.set()
+        if self.pipeline:
+            self.pipeline.interrumpir()
 
 
 # ============== INDICADOR "ESCRIBIENDO..." ==============
 class TypingIndicator(QWidget):
-    """Indicador animado de "Aurora está escribiendo..." """
+    """Indicador animado de "Aurora está escribiendo..." (pintado, sin hojas de estilo)"""
+    TEXTO = "Aurora está escribiendo"
+    COLORES_PUNTOS = (QColor(COLORS['cyan']), QColor(COLORS['magenta']), QColor(COLORS['text_dim']))
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setFixedHeight(50)
-        self.phase = 0.0
-        
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(15, 0, 15, 0)
-        
-        self.label = QLabel("Aurora está escribiendo")
-        self.label.setFont(QFont("Segoe UI", 11))
-        self.label.setStyleSheet(f"color: {COLORS['text_dim']}; background: transparent;")
-        
-        self.dot1 = QLabel("●")
-        self.dot2 = QLabel("●")
-        self.dot3 = QLabel("●")
-        
-        for dot in [self.dot1, self.dot2, self.dot3]:
-            dot.setFont(QFont("Segoe UI", 14))
-            dot.setFixedWidth(15)
-        
-        layout.addWidget(self.label)
-        layout.addWidget(self.dot1)
-        layout.addWidget(self.dot2)
-        layout.addWidget(self.dot3)
-        layout.addStretch()
-        
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_animation)
-        self.timer.start(150)
+        self.phase = 0
+        
+        self.fuente = QFont("Segoe UI", 11)
+        self.fuente_puntos = QFont("Segoe UI", 14)
+        self.color_texto = QColor(COLORS['text_dim'])
+        # Geometría calculada una vez: cada tick solo repinta los puntos
+        ancho_texto = QFontMetrics(self.fuente).horizontalAdvance(self.TEXTO)
+        self.rect_texto = QRect(15, 0, ancho_texto, 50)
+        self.rects_puntos = [QRect(15 + ancho_texto + 6 + i * 21, 0, 15, 50) for i in range(3)]
+        self.zona_puntos = self.rects_puntos[0].united(self.rects_puntos[-1])
+        self.setMinimumWidth(self.zona_puntos.right() + 15)
+        self._actualizar_colores()
+        
+        obtener_reloj().suscribir(self, self.update_animation, 150)
     
-    def update_animation(self):
-        self.phase = (self.phase + 1) % 3
-        
-        import math
-        hue_offset = (self.phase * 120) % 360
-        
-        for i, dot in enumerate([self.dot1, self.dot2, self.dot3]):
-            if i == self.phase:
-                dot.setStyleSheet(f"color: {COLORS['cyan']}; background: transparent;")
-            elif i == (self.phase - 1) % 3:
-                dot.setStyleSheet(f"color: {COLORS['magenta']}; background: transparent;")
-            else:
-                dot.setStyleSheet(f"color: {COLORS['text_dim']}; background: transparent;")
+    def _actualizar_colores(self):
+        # El punto actual en cian, el anterior en magenta, el otro apagado
+        cian, magenta, apagado = self.COLORES_PUNTOS
+        self.colores = [apagado] * 3
+        self.colores[self.phase] = cian
+        self.colores[(self.phase - 1) % 3] = magenta
+    
+    def update_animation(self, pasos=1):
+        self.phase = (self.phase + pasos) % 3
+        self._actualizar_colores()
+        self.update(self.zona_puntos)
+    
+    @medir_pintado
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+        centro = Qt.AlignmentFlag.AlignVCenter
+        if event.rect().intersects(self.rect_texto):
+            painter.setFont(self.fuente)
+            painter.setPen(self.color_texto)
+            painter.drawText(self.rect_texto, centro | Qt.AlignmentFlag.AlignLeft, self.TEXTO)
+        painter.setFont(self.fuente_puntos)
+        for rect, color in zip(self.rects_puntos, self.colores):
+            painter.setPen(color)
+            painter.drawText(rect, centro | Qt.AlignmentFlag.AlignHCenter, "●")
+
+
+# ============== ETIQUETA DE ESTADO ==============
+class EtiquetaEstado(QWidget):
+    """
+    Línea de texto centrada para estados que cambian a menudo (texto y color).
+    Se pinta directamente: cambiar el color no re-parsea CSS ni re-pule el
+    widget, y cambiar el texto no recalcula el layout (la altura es fija).
+    """
+    def __init__(self, texto="", tamano=15, color=COLORS['text_dim'], parent=None):
+        super().__init__(parent)
+        self.texto = texto
+        self.color = QColor(color)
+        self.fuente = QFont("Segoe UI", tamano)
+        self.metricas = QFontMetrics(self.fuente)
+        self.setFixedHeight(self.metricas.height() + 8)
+    
+    def text(self):
+        return self.texto
+    
+    def setText(self, texto):
+        if texto != self.texto:
+            self.texto = texto
+            self.update()
+    
+    def establecer_color(self, color):
+        self.color = QColor(color)
+        self.update()
+    
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setFont(self.fuente)
+        painter.setPen(self.color)
+        texto = self.metricas.elidedText(self.texto, Qt.TextElideMode.ElideRight, self.width())
+        painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, texto)
+
+
+# ============== PALETAS Y CUADROS PRECALCULADOS ==============
+def paleta_ciclo(paradas, pasos):
+    """
+    Precalcula un ciclo de colores interpolando linealmente entre paradas
+
+    Args:
+        paradas: [(posición 0..1, (r, g, b))], la primera en 0 y la última en 1
+        pasos: Número de colores del ciclo
+
+    Returns:
+        list: QColor por paso
+    """
+    paleta = []
+    for i in range(pasos):
+        fase = i / pasos
+        for (inicio, c1), (fin, c2) in zip(paradas, paradas[1:]):
+            if fase < fin:
+                break
+        t = (fase - inicio) / (fin - inicio)
+        paleta.append(QColor(*(int(a + (b - a) * t) for a, b in zip(c1, c2))))
+    return paleta
+
+
+class CacheCuadros:
+    """Cuadros de una animación cíclica, renderizados la primera vez que se piden"""
+
+    def __init__(self, cuadros, renderizar):
+        """
+        Args:
+            cuadros: Cuadros por ciclo
+            renderizar: renderizar(índice, QSize, dpr) → QPixmap
+        """
+        self.cuadros = cuadros
+        self.renderizar = renderizar
+        self._clave = None
+        self._pixmaps = []
+
+    def obtener(self, indice, tamano, dpr=1.0):
+        clave = (tamano.width(), tamano.height(), dpr)
+        if clave != self._clave:
+            # Otro tamaño: los cuadros anteriores ya no sirven
+            self._clave = clave
+            self._pixmaps = [None] * self.cuadros
+        pixmap = self._pixmaps[indice]
+        if pixmap is None:
+            pixmap = self._pixmaps[indice] = self.renderizar(indice, tamano, dpr)
+        return pixmap
+
+
+def _pixmap_transparente(tamano, dpr):
+    pixmap = QPixmap(int(tamano.width() * dpr), int(tamano.height() * dpr))
+    pixmap.setDevicePixelRatio(dpr)
+    pixmap.fill(Qt.GlobalColor.transparent)
+    return pixmap
 
 
 # ============== FONDO ANIMADO ==============
 class AnimatedBackground(QWidget):
     """Fondo animado con gradiente líquido"""
+    CUADROS = 200            # Un cuadro por paso de 0.005 del ciclo
+    ESCALA = 16              # Los cuadros se renderizan a 1/16 y se escalan (el gradiente es suave)
+    COLOR_BORDE = QColor(10, 14, 39)
+    # Transición: Azul oscuro → Magenta oscuro → Cian oscuro
+    PALETA = paleta_ciclo([(0.0, (26, 35, 122)), (0.33, (191, 0, 255)), (0.66, (0, 217, 255)), (1.0, (26, 35, 122))], CUADROS)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.color_phase = 0.0
-        
-        self.color_timer = QTimer(self)
-        self.color_timer.timeout.connect(self.update_animation)
-        self.color_timer.start(50)
+        obtener_reloj().suscribir(self, self.update_animation, 50)
     
-    def update_animation(self):
-        self.color_phase = (self.color_phase + 0.005) % 1.0
+    def update_animation(self, pasos=1):
+        self.color_phase = (self.color_phase + 0.005 * pasos) % 1.0
         self.update()
     
+    @staticmethod
+    def _renderizar(indice, tamano, dpr):
+        ancho = max(1, math.ceil(tamano.width() / AnimatedBackground.ESCALA))
+        alto = max(1, math.ceil(tamano.height() / AnimatedBackground.ESCALA))
+        phase = indice / AnimatedBackground.CUADROS * 2 * math.pi
+        center_x = ancho / 2 + math.cos(phase) * ancho * 0.3
+        center_y = alto / 2 + math.sin(phase * 0.7) * alto * 0.3
+        
+        gradient = QRadialGradient(center_x, center_y, max(ancho, alto))
+        gradient.setColorAt(0.0, AnimatedBackground.COLOR_BORDE)
+        gradient.setColorAt(0.3, AnimatedBackground.PALETA[indice])
+        gradient.setColorAt(1.0, AnimatedBackground.COLOR_BORDE)
+        
+        pixmap = QPixmap(ancho, alto)
+        painter = QPainter(pixmap)
+        painter.fillRect(pixmap.rect(), gradient)
+        painter.end()
+        return pixmap
+    
+    @medir_pintado
     def paintEvent(self, event):
+        indice = int(self.color_phase * self.CUADROS) % self.CUADROS
+        reducido = _cache_fondo.obtener(indice, self.size())
+        escala_x = reducido.width() / max(1, self.width())
+        escala_y = reducido.height() / max(1, self.height())
+        
+        # Solo la zona pedida, escalada con suavizado desde el cuadro reducido
+        rect = event.rect()
+        origen = QRectF(rect.x() * escala_x, rect.y() * escala_y, rect.width() * escala_x, rect.height() * escala_y)
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
-        import math
-        phase = self.color_phase * 2 * math.pi
-        
-        center_x = self.width() / 2 + math.cos(phase) * self.width() * 0.3
-        center_y = self.height() / 2 + math.sin(phase * 0.7) * self.height() * 0.3
-        
-        gradient = QRadialGradient(center_x, center_y, max(self.width(), self.height()))
-        
-        # Transición: Azul oscuro → Magenta oscuro → Cian oscuro
-        if self.color_phase < 0.33:
-            t = self.color_phase / 0.33
-            gradient.setColorAt(0.0, QColor(10, 14, 39))
-            gradient.setColorAt(0.3, QColor(
-                int(26 + (191 - 26) * t),
-                int(35 + (0 - 35) * t),
-                int(122 + (255 - 122) * t)
-            ))
-            gradient.setColorAt(1.0, QColor(10, 14, 39))
-        elif self.color_phase < 0.66:
-            t = (self.color_phase - 0.33) / 0.33
-            gradient.setColorAt(0.0, QColor(10, 14, 39))
-            gradient.setColorAt(0.3, QColor(
-                int(191 + (0 - 191) * t),
-                int(0 + (217 - 0) * t),
-                int(255)
-            ))
-            gradient.setColorAt(1.0, QColor(10, 14, 39))
-        else:
-            t = (self.color_phase - 0.66) / 0.34
-            gradient.setColorAt(0.0, QColor(10, 14, 39))
-            gradient.setColorAt(0.3, QColor(
-                int(0 + (26 - 0) * t),
-                int(217 + (35 - 217) * t),
-                int(255 + (122 - 255) * t)
-            ))
-            gradient.setColorAt(1.0, QColor(10, 14, 39))
-        
-        painter.fillRect(self.rect(), gradient)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        painter.drawPixmap(QRectF(rect), reducido, origen)
+
+
+_cache_fondo = CacheCuadros(AnimatedBackground.CUADROS, AnimatedBackground._renderizar)
 
 
 # ============== BOTÓN LÍQUIDO ==============
 class LiquidButton(QPushButton):
     """Botón circular con animación líquida de colores"""
+    CUADROS = 50             # El color cambia cada dos ticks (paso de 0.01)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setFixedSize(200, 200)  # Más pequeño
         self.color_phase = 0.0
         self.scale = 1.0
-        
-        self.color_timer = QTimer(self)
-        self.color_timer.timeout.connect(self.update_colors)
-        self.color_timer.start(30)
+        obtener_reloj().suscribir(self, self.update_colors, 30)
         
         self.scale_animation = QPropertyAnimation(self, b"scale_value")
         self.scale_animation.setDuration(3000)
@@ -331,9 +429,14 @@ class LiquidButton(QPushButton):
         self.scale = 1.0
         self.update()
     
-    def update_colors(self):
-        self.color_phase = (self.color_phase + 0.01) % 1.0
-        self.update()
+    def _indice(self):
+        return int(self.color_phase * self.CUADROS) % self.CUADROS
+    
+    def update_colors(self, pasos=1):
+        anterior = self._indice()
+        self.color_phase = (self.color_phase + 0.01 * pasos) % 1.0
+        if self._indice() != anterior:
+            self.update()
     
     def get_scale_value(self):
         return self.scale
@@ -344,43 +447,56 @@ class LiquidButton(QPushButton):
     
     scale_value = property(get_scale_value, set_scale_value)
     
+    @staticmethod
+    def _renderizar(indice, tamano, dpr):
+        """Círculo con el gradiente del cuadro, a tamaño completo (escala 1)"""
+        phase = indice / LiquidButton.CUADROS * 2 * math.pi
+        seno, coseno = abs(math.sin(phase)), abs(math.cos(phase))
+        
+        gradient = QLinearGradient(0, 0, tamano.width(), tamano.height())
+        gradient.setColorAt(0.0, QColor(int(191 - 191 * seno), int(217 * seno), 255))
+        gradient.setColorAt(0.5, QColor(COLORS['magenta']))
+        gradient.setColorAt(1.0, QColor(int(255 - 64 * coseno), 0, int(128 + 127 * coseno)))
+        
+        pixmap = _pixmap_transparente(tamano, dpr)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setBrush(gradient)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.drawEllipse(0, 0, tamano.width(), tamano.height())
+        painter.end()
+        return pixmap
+    
+    @medir_pintado
     def paintEvent(self, event):
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
-        import math
-        phase = self.color_phase * 2 * math.pi
-        
-        r1 = int(191 + (0 - 191) * abs(math.sin(phase)))
-        g1 = int(0 + (217 - 0) * abs(math.sin(phase)))
-        b1 = int(255)
+        lado = min(self.width(), self.height())
+        sprite = _cache_boton.obtener(self._indice(), QSize(lado, lado), self.devicePixelRatioF())
         
-        r2 = int(255 + (191 - 255) * abs(math.cos(phase)))
-        g2 = int(0 + (0 - 0) * abs(math.cos(phase)))
-        b2 = int(128 + (255 - 128) * abs(math.cos(phase)))
-        
-        gradient = QLinearGradient(0, 0, self.width(), self.height())
-        gradient.setColorAt(0.0, QColor(r1, g1, b1))
-        gradient.setColorAt(0.5, QColor(COLORS['magenta']))
-        gradient.setColorAt(1.0, QColor(r2, g2, b2))
-        
-        size = min(self.width(), self.height()) * self.scale
+        size = lado * self.scale
         x = (self.width() - size) / 2
         y = (self.height() - size) / 2
-        
-        painter.setBrush(gradient)
-        painter.setPen(Qt.PenStyle.NoPen)
-        painter.drawEllipse(int(x), int(y), int(size), int(size))
+        if self.scale != 1.0:
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        painter.drawPixmap(QRectF(x, y, size, size), sprite, QRectF(sprite.rect()))
         
         painter.setPen(QColor('white'))
         painter.setFont(QFont("Segoe UI", 14, QFont.Weight.Bold))
         painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, self.text())
 
 
+_cache_boton = CacheCuadros(LiquidButton.CUADROS, LiquidButton._renderizar)
+
+
 # ============== WIDGET FLOTANTE ==============
 class FloatingWidget(QWidget):
     """Widget flotante minimizado estilo Messenger"""
     clicked = Signal()
+    CUADROS = 48
+    # Rosa → Azul marino → Cian → Magenta
+    PALETA = paleta_ciclo([
+        (0.0, (255, 0, 128)), (0.25, (26, 35, 126)), (0.5, (0, 217, 255)), (0.75, (191, 0, 255)), (1.0, (255, 0, 128)),
+    ], CUADROS)
     
     def __init__(self, parent=None):
         super().__init__(parent, Qt.WindowType.Tool | Qt.WindowType.FramelessWindowHint | Qt.WindowType.WindowStaysOnTopHint)
@@ -389,60 +505,49 @@ class FloatingWidget(QWidget):
         self.dragging = False
         self.offset = QPoint()
         
-        self.color_timer = QTimer(self)
-        self.color_timer.timeout.connect(self.update_colors)
-        self.color_timer.start(30)
+        obtener_reloj().suscribir(self, self.update_colors, 30)
         
         self.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
         
         screen = QApplication.primaryScreen().geometry()
         self.move(screen.width() - 90, screen.height() - 90)
     
-    def update_colors(self):
-        self.color_phase = (self.color_phase + 0.015) % 1.0
-        self.update()
+    def _indice(self):
+        return int(self.color_phase * self.CUADROS) % self.CUADROS
     
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
-        import math
-        phase = self.color_phase * 2 * math.pi
-        
-        # Rosa → Azul marino → Cian → Magenta
-        if self.color_phase < 0.25:
-            t = self.color_phase / 0.25
-            r = int(255 + (26 - 255) * t)
-            g = int(0 + (35 - 0) * t)
-            b = int(128 + (126 - 128) * t)
-        elif self.color_phase < 0.5:
-            t = (self.color_phase - 0.25) / 0.25
-            r = int(26 + (0 - 26) * t)
-            g = int(35 + (217 - 35) * t)
-            b = int(126 + (255 - 126) * t)
-        elif self.color_phase < 0.75:
-            t = (self.color_phase - 0.5) / 0.25
-            r = int(0 + (191 - 0) * t)
-            g = int(217 + (0 - 217) * t)
-            b = int(255)
-        else:
-            t = (self.color_phase - 0.75) / 0.25
-            r = int(191 + (255 - 191) * t)
-            g = int(0)
-            b = int(255 + (128 - 255) * t)
-        
+    def update_colors(self, pasos=1):
+        anterior = self._indice()
+        self.color_phase = (self.color_phase + 0.015 * pasos) % 1.0
+        if self._indice() != anterior:
+            # Solo el círculo cambia
+            self.update(5, 5, 60, 60)
+    
+    @staticmethod
+    def _renderizar(indice, tamano, dpr):
+        color = FloatingWidget.PALETA[indice]
+        r, g, b = color.red(), color.green(), color.blue()
         gradient = QRadialGradient(35, 35, 35)
-        gradient.setColorAt(0.0, QColor(r, g, b))
+        gradient.setColorAt(0.0, color)
         gradient.setColorAt(0.5, QColor(int(r*0.8), int(g*0.8), int(b*0.8)))
         gradient.setColorAt(1.0, QColor(int(r*0.6), int(g*0.6), int(b*0.6)))
         
+        pixmap = _pixmap_transparente(tamano, dpr)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         painter.setBrush(gradient)
         painter.setPen(Qt.PenStyle.NoPen)
         painter.drawEllipse(5, 5, 60, 60)
         
         painter.setPen(QColor('white'))
         painter.setFont(QFont("Segoe UI", 18, QFont.Weight.Bold))
-        painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, "A")
+        painter.drawText(QRect(0, 0, tamano.width(), tamano.height()), Qt.AlignmentFlag.AlignCenter, "A")
+        painter.end()
+        return pixmap
+    
+    @medir_pintado
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, _cache_flotante.obtener(self._indice(), self.size(), self.devicePixelRatioF()))
     
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
@@ -460,76 +565,627 @@ class FloatingWidget(QWidget):
                 self.clicked.emit()
 
 
-# ============== BURBUJA DE CHAT ADAPTABLE ==============
-class ChatBubble(QFrame):
-    """Burbuja de mensaje estilo chat futurista con tamaño adaptable"""
+_cache_flotante = CacheCuadros(FloatingWidget.CUADROS, FloatingWidget._renderizar)
+
+
+# ============== TRANSCRIPCIÓN DEL CHAT ==============
+ROL_USUARIO = Qt.ItemDataRole.UserRole + 1
+FLAGS_TEXTO = int(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop | Qt.TextFlag.TextWordWrap)
+
+
+class ChatModel(QAbstractListModel):
+    """
+    Mensajes del chat como (texto, is_user); no se crea ningún widget por mensaje.
+    Solo contiene una ventana del historial: ids guarda el id de cada mensaje
+    en HistorialChat (None si aún no se ha guardado).
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.mensajes = []
+        self.ids = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.mensajes)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        texto, is_user = self.mensajes[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return texto
+        if role == ROL_USUARIO:
+            return is_user
+        return None
+
+    def flags(self, index):
+        # "Editable" solo para abrir con doble clic un selector de texto de solo lectura
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsEditable
+
+    def agregar(self, texto, is_user=True, id_mensaje=None):
+        fila = len(self.mensajes)
+        self.beginInsertRows(QModelIndex(), fila, fila)
+        self.mensajes.append((texto, is_user))
+        self.ids.append(id_mensaje)
+        self.endInsertRows()
+
+    def agregar_varios(self, mensajes, ids=None):
+        """
+        Args:
+            mensajes: Lista de (texto, is_user), insertados de una vez
+            ids: Ids de los mensajes en el historial (opcional)
+        """
+        if not mensajes:
+            return
+        fila = len(self.mensajes)
+        self.beginInsertRows(QModelIndex(), fila, fila + len(mensajes) - 1)
+        self.mensajes.extend(mensajes)
+        self.ids.extend(ids or [None] * len(mensajes))
+        self.endInsertRows()
+
+    def anteponer(self, mensajes, ids):
+        """Inserta al principio una página de mensajes más antiguos"""
+        if not mensajes:
+            return
+        self.beginInsertRows(QModelIndex(), 0, len(mensajes) - 1)
+        self.mensajes[:0] = mensajes
+        self.ids[:0] = ids
+        self.endInsertRows()
+
+    def reiniciar(self, mensajes, ids):
+        """Cambia toda la ventana por otra (p. ej. la página de un resultado de búsqueda)"""
+        self.beginResetModel()
+        self.mensajes = list(mensajes)
+        self.ids = list(ids)
+        self.endResetModel()
+
+    def quitar_primeras(self, cantidad):
+        """Saca de la ventana los mensajes más antiguos (siguen en el historial)"""
+        if cantidad <= 0:
+            return
+        self.beginRemoveRows(QModelIndex(), 0, cantidad - 1)
+        del self.mensajes[:cantidad]
+        del self.ids[:cantidad]
+        self.endRemoveRows()
+
+    def fijar_id(self, fila, id_mensaje):
+        self.ids[fila] = id_mensaje
+
+    def id_primero(self):
+        """Id del mensaje guardado más antiguo de la ventana (None si no hay)"""
+        return next((id_mensaje for id_mensaje in self.ids if id_mensaje is not None), None)
+
+    def id_ultimo(self):
+        """Id del mensaje guardado más reciente de la ventana (None si no hay)"""
+        return next((id_mensaje for id_mensaje in reversed(self.ids) if id_mensaje is not None), None)
+
+    def extender(self, fila, fragmento):
+        """Añade un fragmento al mensaje de la fila (respuesta en streaming)"""
+        texto, is_user = self.mensajes[fila]
+        self.mensajes[fila] = (texto + fragmento, is_user)
+        index = self.index(fila)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole])
+
+    def texto(self, fila):
+        return self.mensajes[fila][0]
+
+
+class ChatBubbleDelegate(QStyledItemDelegate):
+    """Pinta las burbujas del chat; los tamaños se cachean por ancho de la vista"""
+    MARGEN_X = 10
+    MARGEN_Y = 7                 # 15 px entre burbujas, como el layout anterior
+    PADDING = (14, 14, 14, 10)   # izquierda, arriba, derecha, abajo
+    ALTO_ACCIONES = 36           # franja de Editar/Copiar en los mensajes del usuario
+    ANCHO_MAXIMO = 0.7           # fracción del ancho disponible
+    ANCHOS_CACHEADOS = 4         # anchos recientes (al redimensionar la ventana)
+    DOCUMENTOS_CACHEADOS = 128   # respuestas con markdown maquetadas (las más recientes)
+    INTERVALO_RECOLOCAR_MS = 50  # como mucho una re-colocación de filas por intervalo al crecer
+    PASO_ANCHO = 8               # el ancho del texto se redondea a múltiplos de 8 px
+    ACCIONES = ("✏️ Editar", "📋 Copiar")
+
+    def __init__(self, vista):
+        super().__init__(vista)
+        self.vista = vista
+        self.fuente = QFont("Segoe UI", 11)
+        self.metricas = QFontMetrics(self.fuente)
+        self.fuente_acciones = QFont("Segoe UI")
+        self.fuente_acciones.setPixelSize(10)
+        metricas_acciones = QFontMetrics(self.fuente_acciones)
+        self.anchos_acciones = [metricas_acciones.horizontalAdvance(t) + 24 for t in self.ACCIONES]
+        self.color_texto = QColor(COLORS['text'])
+        self.colores = {
+            True: (QColor(COLORS['magenta']), QColor(191, 0, 255, 77)),
+            False: (QColor(COLORS['surface_light']), QColor(0, 217, 255, 51)),
+        }
+        self.alto_linea = self.metricas.boundingRect(QRect(0, 0, 1000, 1000), FLAGS_TEXTO, "Ág").height()
+        self._cache = OrderedDict()   # ancho máximo del texto → {fila: QSize de la burbuja}
+        self._naturales = {}          # fila → ancho del texto en una línea (-2: markdown)
+        self._documentos = OrderedDict()   # fila → MarkdownIncremental
+        self._crecidas = set()             # filas que cambiaron de alto desde la última re-colocación
+        self._timer_recolocar = QTimer(self)
+        self._timer_recolocar.setSingleShot(True)
+        self._timer_recolocar.timeout.connect(self._recolocar)
+
+    def invalidar(self, *args):
+        self._cache.clear()
+        self._naturales.clear()
+        self._documentos.clear()
+        self._crecidas.clear()
+
+    def _mover_filas(self, desde, delta, quitar=()):
+        """Renumera los cachés por fila: las filas >= desde se desplazan delta"""
+        def mover(cache):
+            return {(fila + delta if fila >= desde else fila): valor
+                    for fila, valor in cache.items() if fila not in quitar}
+        for ancho, tamanos in self._cache.items():
+            self._cache[ancho] = mover(tamanos)
+        self._naturales = mover(self._naturales)
+        self._documentos = OrderedDict(mover(self._documentos))
+        self._crecidas = set(mover(dict.fromkeys(self._crecidas)))
+
+    def filas_insertadas(self, padre, primera, ultima):
+        # Al añadir al final no hay nada que renumerar (el caso habitual)
+        if primera < self.vista.modelo.rowCount() - (ultima - primera + 1):
+            self._mover_filas(primera, ultima - primera + 1)
+
+    def filas_quitadas(self, padre, primera, ultima):
+        self._mover_filas(ultima + 1, primera - ultima - 1, quitar=range(primera, ultima + 1))
+
+    def documento(self, fila, texto):
+        """Documento con formato de una respuesta (se crea al pintarla o medirla)"""
+        documento = self._documentos.get(fila)
+        if documento is None:
+            documento = self._documentos[fila] = MarkdownIncremental(self.fuente, texto)
+            if len(self._documentos) > self.DOCUMENTOS_CACHEADOS:
+                self._documentos.popitem(last=False)
+        else:
+            self._documentos.move_to_end(fila)
+        return documento
+
+    def extender(self, fila, fragmento, terminar=False):
+        """
+        Lleva un fragmento nuevo de la respuesta al documento de la fila y
+        re-mide solo esa fila
+
+        Args:
+            fila: Fila del mensaje (el modelo ya tiene el texto completo)
+            fragmento: Texto recibido
+            terminar: True si la respuesta ha terminado
+        """
+        documento = self._documentos.get(fila)
+        texto = self.vista.modelo.texto(fila)
+        if documento is not None:
+            documento.agregar(fragmento)
+        elif tiene_markdown(texto):
+            documento = self.documento(fila, texto)
+        if documento is not None and terminar:
+            documento.terminar()
+        self._naturales.pop(fila, None)
+        index = self.vista.modelo.index(fila)
+        anterior = None
+        for tamanos in self._cache.values():
+            tamano = tamanos.pop(fila, None)
+            if tamano is not None and anterior is None:
+                anterior = tamano
+        # Solo si cambia la altura hay que re-colocar las filas; QListView las
+        # recorre todas, así que durante el streaming se agrupa en un intervalo
+        if anterior is None or self.tamano_burbuja(index).height() != anterior.height():
+            self._crecidas.add(fila)
+            if terminar:
+                self._recolocar()
+            elif not self._timer_recolocar.isActive():
+                self._timer_recolocar.start(self.INTERVALO_RECOLOCAR_MS)
+
+    def _recolocar(self):
+        self._timer_recolocar.stop()
+        filas = self._crecidas
+        self._crecidas = set()
+        modelo = self.vista.modelo
+        for fila in filas:
+            if fila < modelo.rowCount():
+                self.sizeHintChanged.emit(modelo.index(fila))
+
+    def ancho_texto_maximo(self):
+        """Ancho máximo del texto; no depende de que haya barra de scroll"""
+        izquierda, _, derecha, _ = self.PADDING
+        ancho = int(self.vista.width() * self.ANCHO_MAXIMO) - izquierda - derecha
+        # Redondeado: al arrastrar el borde de la ventana se reutiliza el cache
+        return max(ancho - ancho % self.PASO_ANCHO, 40)
+
+    def tamano_burbuja(self, index):
+        """Tamaño de la burbuja al ancho actual de la vista (cacheado)"""
+        maximo = self.ancho_texto_maximo()
+        tamanos = self._cache.get(maximo)
+        if tamanos is None:
+            tamanos = self._cache[maximo] = {}
+            if len(self._cache) > self.ANCHOS_CACHEADOS:
+                self._cache.popitem(last=False)
+        fila = index.row()
+        tamano = tamanos.get(fila)
+        if tamano is None:
+            # Directo a la lista del modelo: sizeHint se llama para todas las filas
+            texto, is_user = self.vista.modelo.mensajes[fila]
+            natural = self._naturales.get(fila)
+            if natural is None:
+                if not is_user and tiene_markdown(texto):
+                    natural = self._naturales[fila] = -2
+                else:
+                    # Ancho en una sola línea (-1 si tiene saltos); no depende del ancho de la vista
+                    natural = self._naturales[fila] = -1 if "\n" in texto else self.metricas.horizontalAdvance(texto)
+            if natural == -2:
+                ideal, alto = self.documento(fila, texto).medidas(maximo)
+                ancho_texto, alto_texto = min(math.ceil(ideal), maximo), math.ceil(alto)
+            elif 0 <= natural <= maximo:
+                ancho_texto, alto_texto = natural, self.alto_linea
+            else:
+                rect = self.metricas.boundingRect(QRect(0, 0, maximo, 1 << 20), FLAGS_TEXTO, texto)
+                ancho_texto, alto_texto = rect.width(), rect.height()
+            izquierda, arriba, derecha, abajo = self.PADDING
+            ancho_burbuja = ancho_texto + izquierda + derecha
+            alto = alto_texto + arriba + abajo
+            if is_user:
+                alto += self.ALTO_ACCIONES
+                ancho_burbuja = max(ancho_burbuja, izquierda + sum(self.anchos_acciones) + 8 + derecha)
+            tamano = tamanos[fila] = QSize(ancho_burbuja, alto)
+        return tamano
+
+    def rect_burbuja(self, rect, index):
+        """Rectángulo de la burbuja dentro de la fila (a la derecha si es del usuario)"""
+        tamano = self.tamano_burbuja(index)
+        if index.data(ROL_USUARIO):
+            x = rect.left() + self.vista.viewport().width() - self.MARGEN_X - tamano.width()
+        else:
+            x = rect.left() + self.MARGEN_X
+        return QRect(x, rect.top() + self.MARGEN_Y, tamano.width(), tamano.height())
+
+    def rect_texto(self, burbuja, is_user):
+        izquierda, arriba, derecha, abajo = self.PADDING
+        return burbuja.adjusted(izquierda, arriba, -derecha, -abajo - (self.ALTO_ACCIONES if is_user else 0))
+
+    def rects_acciones(self, burbuja):
+        """Posición de los botones Editar y Copiar en el pie de la burbuja"""
+        x = burbuja.left() + self.PADDING[0]
+        y = burbuja.bottom() - self.PADDING[3] - 28 + 1
+        rects = []
+        for ancho in self.anchos_acciones:
+            rects.append(QRect(x, y, ancho, 28))
+            x += ancho + 8
+        return rects
+
+    def sizeHint(self, option, index):
+        return QSize(self.vista.viewport().width(), self.tamano_burbuja(index).height() + 2 * self.MARGEN_Y)
+
+    def paint(self, painter, option, index):
+        is_user = bool(index.data(ROL_USUARIO))
+        burbuja = self.rect_burbuja(option.rect, index)
+        fondo, borde = self.colores[is_user]
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(QPen(borde, 1))
+        painter.setBrush(fondo)
+        painter.drawRoundedRect(QRectF(burbuja).adjusted(0.5, 0.5, -0.5, -0.5), 16, 16)
+        painter.setFont(self.fuente)
+        painter.setPen(self.color_texto)
+        # Se pinta con el mismo ancho de ajuste con el que se midió: corta las líneas igual
+        texto = self.rect_texto(burbuja, is_user)
+        maximo = self.ancho_texto_maximo()
+        fila = index.row()
+        if self._naturales.get(fila) == -2:
+            # Solo se dibujan las líneas dentro de la parte visible de la vista
+            recorte = QRectF(texto).intersected(QRectF(self.vista.viewport().rect()))
+            self.documento(fila, index.data()).pintar(
+                painter, QPointF(texto.topLeft()), maximo, self.color_texto, recorte
+            )
+        else:
+            texto.setWidth(max(texto.width(), maximo))
+            painter.drawText(texto, FLAGS_TEXTO, index.data())
+        if is_user:
+            # Solo se dibujan; los botones reales aparecen al pasar el ratón
+            painter.setFont(self.fuente_acciones)
+            for rect, texto in zip(self.rects_acciones(burbuja), self.ACCIONES):
+                painter.setPen(QPen(QColor(255, 255, 255, 51), 1))
+                painter.setBrush(QColor(255, 255, 255, 26))
+                painter.drawRoundedRect(QRectF(rect).adjusted(0.5, 0.5, -0.5, -0.5), 6, 6)
+                painter.setPen(self.color_texto)
+                painter.drawText(rect, int(Qt.AlignmentFlag.AlignCenter), texto)
+        painter.restore()
+
+    # ---------- selector de texto (doble clic) ----------
+    def createEditor(self, parent, option, index):
+        editor = QTextEdit(parent)
+        editor.setReadOnly(True)
+        editor.setFont(self.fuente)
+        editor.setFrameShape(QFrame.Shape.NoFrame)
+        editor.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        editor.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        editor.document().setDocumentMargin(0)
+        editor.setStyleSheet(f"QTextEdit {{ background: transparent; color: {COLORS['text']}; }}")
+        return editor
+
+    def setEditorData(self, editor, index):
+        editor.setPlainText(index.data())
+        editor.selectAll()
+
+    def setModelData(self, editor, model, index):
+        pass  # Solo lectura
+
+    def updateEditorGeometry(self, editor, option, index):
+        burbuja = self.rect_burbuja(option.rect, index)
+        editor.setGeometry(self.rect_texto(burbuja, bool(index.data(ROL_USUARIO))))
+
+
+class ChatView(QListView):
+    """
+    Transcripción del chat virtualizada: solo se pintan las burbujas visibles.
+    Los botones de Editar/Copiar se crean la primera vez que se pasa el ratón
+    por un mensaje del usuario y se mueven de burbuja en burbuja.
+    """
     edit_requested = Signal(str)
     copy_requested = Signal(str)
-    
-    def __init__(self, text, is_user=True, parent=None):
+    pide_anteriores = Signal()
+    pide_posteriores = Signal()
+
+    def __init__(self, parent=None):
         super().__init__(parent)
-        self.text_content = text
-        self.is_user = is_user
-        
-        bg_color = COLORS['magenta'] if is_user else COLORS['surface_light']
-        
+        self.modelo = ChatModel(self)
+        self.delegado = ChatBubbleDelegate(self)
+        self.setModel(self.modelo)
+        self.setItemDelegate(self.delegado)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.DoubleClicked)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.verticalScrollBar().setSingleStep(20)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setMouseTracking(True)
         self.setStyleSheet(f"""
-            QFrame {{
-                background-color: {bg_color};
-                border-radius: 16px;
-                padding: 0px;
-                border: 1px solid {'rgba(191, 0, 255, 0.3)' if is_user else 'rgba(0, 217, 255, 0.2)'};
-            }}
+            QListView {{ background: transparent; border: none; }}
+            QScrollBar:vertical {{ background: {COLORS['surface']}; width: 8px; border-radius: 4px; }}
+            QScrollBar::handle:vertical {{ background: {COLORS['cyan']}; border-radius: 4px; }}
         """)
-        
-        main_layout = QVBoxLayout(self)
-        main_layout.setContentsMargins(14, 14, 14, 10)
-        main_layout.setSpacing(8)
-        
-        # Texto del mensaje
-        label = QLabel(text)
-        label.setWordWrap(True)
-        label.setFont(QFont("Segoe UI", 11))
-        label.setStyleSheet(f"color: {COLORS['text']}; background-color: transparent;")
-        label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
-        main_layout.addWidget(label)
-        
-        # Botones de acciones (solo para mensajes del usuario)
-        if is_user:
-            actions_layout = QHBoxLayout()
-            actions_layout.setSpacing(8)
-            actions_layout.setContentsMargins(0, 4, 0, 0)
-            
-            btn_edit = QPushButton("✏️ Editar")
-            btn_copy = QPushButton("📋 Copiar")
-            
-            for btn in [btn_edit, btn_copy]:
-                btn.setFixedHeight(28)
-                btn.setStyleSheet(f"""
-                    QPushButton {{
-                        background: rgba(255, 255, 255, 0.1);
-                        border: 1px solid rgba(255, 255, 255, 0.2);
-                        border-radius: 6px;
-                        color: {COLORS['text']};
-                        font-size: 10px;
-                        padding: 4px 12px;
-                    }}
-                    QPushButton:hover {{
-                        background: rgba(255, 255, 255, 0.2);
-                    }}
-                """)
-            
-            btn_edit.clicked.connect(lambda: self.edit_requested.emit(self.text_content))
-            btn_copy.clicked.connect(lambda: self.copy_requested.emit(self.text_content))
-            
-            actions_layout.addWidget(btn_edit)
-            actions_layout.addWidget(btn_copy)
-            actions_layout.addStretch()
-            
-            main_layout.addLayout(actions_layout)
-        
-        # Ajustar ancho según contenido (máximo 70% del ancho disponible)
-        self.adjustSize()
+        self._botones = None
+        self._fila_acciones = -1
+        # Pegada al final mientras el usuario no se desplace hacia arriba
+        self.siguiendo_final = True
+        self.verticalScrollBar().actionTriggered.connect(
+            lambda *_: QTimer.singleShot(0, self._comprobar_final)
+        )
+        self.verticalScrollBar().rangeChanged.connect(self._rango_cambiado)
+        self.modelo.modelReset.connect(self.delegado.invalidar)
+        self.modelo.rowsInserted.connect(self.delegado.filas_insertadas)
+        self.modelo.rowsRemoved.connect(self.delegado.filas_quitadas)
+        # Respuesta que llega en streaming; se renumera al anteponer o recortar
+        self.fila_respuesta = None
+        self.modelo.rowsInserted.connect(self._filas_insertadas)
+        self.modelo.rowsRemoved.connect(self._filas_quitadas)
+        # Paginación hacia atrás: al acercarse arriba se piden mensajes anteriores
+        self.sin_anteriores = False
+        self._pidiendo = False
+        self.verticalScrollBar().valueChanged.connect(self._comprobar_inicio)
+        # Tras saltar a un resultado la ventana puede no llegar al último mensaje:
+        # al acercarse abajo se piden los posteriores. La respuesta en streaming
+        # se acumula aparte hasta que la ventana vuelva al final.
+        self.sin_posteriores = True
+        self._pidiendo_posteriores = False
+        self.respuesta_oculta = None
+        self.verticalScrollBar().valueChanged.connect(self._comprobar_fin)
+
+    def agregar_mensaje(self, texto, is_user=True, id_mensaje=None):
+        self.modelo.agregar(texto, is_user, id_mensaje)
+
+    def iniciar_respuesta(self, fragmento):
+        """Empieza un mensaje de Aurora que llegará por fragmentos"""
+        if not self.sin_posteriores:
+            self.respuesta_oculta = fragmento
+            return
+        self.modelo.agregar("", False)
+        self.fila_respuesta = self.modelo.rowCount() - 1
+        self.extender_respuesta(fragmento)
+
+    def extender_respuesta(self, fragmento):
+        if self.fila_respuesta is None:
+            self.respuesta_oculta += fragmento
+            return
+        self.modelo.extender(self.fila_respuesta, fragmento)
+        self.delegado.extender(self.fila_respuesta, fragmento)
+
+    def en_respuesta(self):
+        """True si hay una respuesta en streaming (visible o no)"""
+        return self.fila_respuesta is not None or self.respuesta_oculta is not None
+
+    def terminar_respuesta(self):
+        """
+        Returns:
+            tuple: (fila, texto) del mensaje terminado, con fila None si no está
+                en la ventana; None si no había respuesta en curso
+        """
+        fila, self.fila_respuesta = self.fila_respuesta, None
+        if fila is not None:
+            self.delegado.extender(fila, "", terminar=True)
+            return fila, self.modelo.texto(fila)
+        texto, self.respuesta_oculta = self.respuesta_oculta, None
+        return None if texto is None else (None, texto)
+
+    def _filas_insertadas(self, padre, primera, ultima):
+        if self.fila_respuesta is not None and primera <= self.fila_respuesta:
+            self.fila_respuesta += ultima - primera + 1
+
+    def _filas_quitadas(self, padre, primera, ultima):
+        if self.fila_respuesta is not None and primera <= self.fila_respuesta:
+            self.fila_respuesta -= ultima - primera + 1
+
+    # ---------- ventana de mensajes ----------
+    def anteponer(self, mensajes, ids):
+        """Inserta mensajes anteriores arriba sin mover lo que se está viendo"""
+        barra = self.verticalScrollBar()
+        desde_final = barra.maximum() - barra.value()
+        self.modelo.anteponer(mensajes, ids)
+        self.doItemsLayout()
+        barra.setValue(barra.maximum() - desde_final)
+
+    def reiniciar(self, mensajes, ids, al_final):
+        """
+        Cambia la ventana por otra página del historial
+
+        Args:
+            mensajes: Lista de (texto, is_user)
+            ids: Ids de los mensajes
+            al_final: True si la página llega hasta el último mensaje guardado
+        """
+        if self.fila_respuesta is not None:
+            self.respuesta_oculta = self.modelo.texto(self.fila_respuesta)
+            self.fila_respuesta = None
+        self.modelo.reiniciar(mensajes, ids)
+        self.sin_anteriores = False
+        self.sin_posteriores = False
+        self.siguiendo_final = False
+        if al_final:
+            self._llegar_al_final()
+        self.doItemsLayout()
+
+    def agregar_posteriores(self, mensajes, ids, al_final, maximo):
+        """
+        Añade abajo la página siguiente y, si la ventana pasa de maximo
+        mensajes, quita los más antiguos sin mover lo que se está viendo
+        """
+        self.modelo.agregar_varios(mensajes, ids)
+        sobran = self.modelo.rowCount() - maximo
+        arriba = self.indexAt(QPoint(0, 0)).row()
+        if sobran > 0 and arriba >= sobran:
+            antes = self.visualRect(self.modelo.index(arriba)).top()
+            self.modelo.quitar_primeras(sobran)
+            self.sin_anteriores = False
+            self.doItemsLayout()
+            barra = self.verticalScrollBar()
+            barra.setValue(barra.value() + self.visualRect(self.modelo.index(arriba - sobran)).top() - antes)
+        if al_final:
+            self._llegar_al_final()
+
+    def _llegar_al_final(self):
+        # La ventana vuelve a acabar en el último mensaje: la respuesta en curso reaparece
+        self.sin_posteriores = True
+        if self.respuesta_oculta is not None:
+            texto, self.respuesta_oculta = self.respuesta_oculta, None
+            self.iniciar_respuesta(texto)
+
+    def recortar(self, maximo):
+        """
+        Deja como mucho maximo mensajes, quitando los más antiguos. Solo si
+        se está al final: quien lee más arriba no ve moverse nada.
+        """
+        sobran = self.modelo.rowCount() - maximo
+        if sobran > 0 and self.siguiendo_final:
+            self.modelo.quitar_primeras(sobran)
+            self.sin_anteriores = False
+
+    def ir_a(self, fila):
+        """Centra un mensaje (un resultado de búsqueda) y deja de seguir el final"""
+        self.siguiendo_final = False
+        self.scrollTo(self.modelo.index(fila), QAbstractItemView.ScrollHint.PositionAtCenter)
+
+    def _comprobar_inicio(self, *args):
+        # A menos de una pantalla del principio (o sin barra todavía)
+        if self.sin_anteriores or self._pidiendo or self.verticalScrollBar().value() > self.viewport().height():
+            return
+        self._pidiendo = True
+        QTimer.singleShot(0, self._pedir_anteriores)
+
+    def _pedir_anteriores(self):
+        self._pidiendo = False
+        self.pide_anteriores.emit()
+
+    def _comprobar_fin(self, *args):
+        # A menos de una pantalla del final de una ventana que no llega al último mensaje
+        barra = self.verticalScrollBar()
+        if (self.sin_posteriores or self._pidiendo_posteriores
+                or barra.value() < barra.maximum() - self.viewport().height()):
+            return
+        self._pidiendo_posteriores = True
+        QTimer.singleShot(0, self._pedir_posteriores)
+
+    def _pedir_posteriores(self):
+        self._pidiendo_posteriores = False
+        self.pide_posteriores.emit()
+
+    def dataChanged(self, topLeft, bottomRight, roles=()):
+        # QListView re-coloca todas las filas con cada dataChanged; aquí el
+        # tamaño solo cambia por sizeHintChanged del delegado, basta repintar
+        QAbstractItemView.dataChanged(self, topLeft, bottomRight, roles)
+
+    def _comprobar_final(self):
+        barra = self.verticalScrollBar()
+        self.siguiendo_final = self.sin_posteriores and barra.value() >= barra.maximum() - 4
+
+    def _rango_cambiado(self, minimo, maximo):
+        # La burbuja que crece (o el indicador que encoge la vista) no deja atrás el final
+        if self.siguiendo_final:
+            self.verticalScrollBar().setValue(maximo)
+        self._comprobar_inicio()
+        self._comprobar_fin()
+
+    # ---------- acciones al pasar el ratón ----------
+    def _crear_botones(self):
+        estilo = f"""
+            QPushButton {{
+                background: rgba(255, 255, 255, 0.1);
+                border: 1px solid rgba(255, 255, 255, 0.2);
+                border-radius: 6px;
+                color: {COLORS['text']};
+                font-size: 10px;
+                padding: 4px 12px;
+            }}
+            QPushButton:hover {{
+                background: rgba(255, 255, 255, 0.2);
+            }}
+        """
+        self._botones = []
+        for texto, senal in zip(ChatBubbleDelegate.ACCIONES, (self.edit_requested, self.copy_requested)):
+            boton = QPushButton(texto, self.viewport())
+            boton.setStyleSheet(estilo)
+            boton.setCursor(QCursor(Qt.CursorShape.PointingHandCursor))
+            boton.clicked.connect(lambda _=False, s=senal: s.emit(self.modelo.texto(self._fila_acciones)))
+            boton.hide()
+            self._botones.append(boton)
+
+    def _ocultar_acciones(self):
+        self._fila_acciones = -1
+        for boton in self._botones or ():
+            boton.hide()
+
+    def _mostrar_acciones(self, pos):
+        index = self.indexAt(pos)
+        if not index.isValid() or not index.data(ROL_USUARIO):
+            self._ocultar_acciones()
+            return
+        if index.row() == self._fila_acciones:
+            return
+        if self._botones is None:
+            self._crear_botones()
+        self._fila_acciones = index.row()
+        burbuja = self.delegado.rect_burbuja(self.visualRect(index), index)
+        for boton, rect in zip(self._botones, self.delegado.rects_acciones(burbuja)):
+            boton.setGeometry(rect)
+            boton.show()
+
+    def mouseMoveEvent(self, event):
+        super().mouseMoveEvent(event)
+        self._mostrar_acciones(event.position().toPoint())
+
+    def leaveEvent(self, event):
+        super().leaveEvent(event)
+        self._ocultar_acciones()
+
+    def scrollContentsBy(self, dx, dy):
+        self._ocultar_acciones()
+        super().scrollContentsBy(dx, dy)
+
+    def resizeEvent(self, event):
+        self._ocultar_acciones()
+        super().resizeEvent(event)
+
+    @medir_pintado
+    def paintEvent(self, event):
+        super().paintEvent(event)
 
 
 # ============== VENTANA PRINCIPAL ==============
@@ -539,12 +1195,15 @@ class AuroraWindow(QWidget):
     def __init__(self):
         super().__init__()
         self.voice_worker = None
-        self.chat_worker = None
+        self.tarea_chat = None       # Respuesta en curso en el pool de tareas
         self.chat_input = None
         self.liquid_button = None
         self.floating_widget = None
         self.animated_bg = None
         self.typing_indicator = None
+        self.chat_view = None
+        self.historial = None        # Mensajes del chat en SQLite (se abre con la pantalla de chat)
+        self.tarea_busqueda = None   # Búsqueda en el historial en curso
         self.mic_recording = False
         self.configurar_ventana()
         self.crear_interfaz()
@@ -559,14 +1218,43 @@ class AuroraWindow(QWidget):
         self.main_layout = QVBoxLayout(self)
         self.main_layout.setContentsMargins(0, 0, 0, 0)
         self.main_layout.setSpacing(0)
+        
+        # Una página por pantalla: se construye al usarla por primera vez y se
+        # conserva, así cambiar de modo no rehace widgets ni pierde el chat
+        self.paginas = QStackedWidget()
+        self.main_layout.addWidget(self.paginas)
+        self._paginas = {}
+        self.tiempos_paginas = {}    # pantalla → ms de la primera construcción
     
-    def limpiar_layout(self):
-        while self.main_layout.count():
-            item = self.main_layout.takeAt(0)
-            if item.widget():
-                widget = item.widget()
-                widget.setParent(None)
-                widget.deleteLater()
+    def mostrar_pagina(self, nombre):
+        """
+        Muestra una pantalla (construyéndola si es la primera vez)
+        
+        Args:
+            nombre: "selector", "chat" o "voz"
+            
+        Returns:
+            bool: True si la pantalla se acaba de construir
+        """
+        pagina = self._paginas.get(nombre)
+        if pagina is not None:
+            self.paginas.setCurrentWidget(pagina)
+            return False
+        
+        constructores = {
+            "selector": self.construir_selector,
+            "chat": self.construir_chat,
+            "voz": self.construir_voz,
+        }
+        inicio = time.perf_counter()
+        pagina = self._paginas[nombre] = constructores[nombre]()
+        self.paginas.addWidget(pagina)
+        # Incluye mostrarla: ahí se aplican las hojas de estilo y los layouts
+        self.paginas.setCurrentWidget(pagina)
+        duracion = (time.perf_counter() - inicio) * 1000
+        self.tiempos_paginas[nombre] = duracion
+        logger.info(f"🧱 Pantalla '{nombre}' construida en {duracion:.1f} ms")
+        return True
     
     def changeEvent(self, event):
         """Detectar minimización"""
@@ -574,7 +1262,24 @@ class AuroraWindow(QWidget):
             if self.isMinimized():
                 self.crear_floating_widget()
         super().changeEvent(event)
-    
+
+    def closeEvent(self, event):
+        """Al cerrar: parar el modo voz y esperar (con límite) al pool de tareas"""
+        global detener_voz_flag
+        detener_voz_flag = True   # Corta la voz que se esté reproduciendo
+        if self.tarea_chat:
+            self.tarea_chat.cancelar()
+            self.tarea_chat = None
+        if self.voice_worker and self.voice_worker.isRunning():
+            self.voice_worker.stop()
+            self.voice_worker.wait(2000)
+        logger.info(f"🧵 Tareas al cerrar: {obtener_pool_tareas().metricas()}")
+        obtener_pool_tareas().cerrar()
+        if self.historial:
+            self.terminar_respuesta()   # Lo recibido de una respuesta a medias también se guarda
+            self.historial.cerrar()
+        super().closeEvent(event)
+
     def crear_floating_widget(self):
         """Crear widget flotante al minimizar"""
         if not self.floating_widget:
@@ -591,12 +1296,15 @@ class AuroraWindow(QWidget):
             self.floating_widget = None
     
     def mostrar_selector_modo(self):
-        self.limpiar_layout()
-        
-        # Fondo animado
-        self.animated_bg = AnimatedBackground(self)
-        self.animated_bg.setGeometry(self.rect())
-        self.animated_bg.lower()
+        self.mostrar_pagina("selector")
+    
+    def construir_selector(self):
+        pagina = QWidget()
+        # Fondo animado debajo del contenido; al cambiar de página queda oculto
+        # y el reloj de animaciones deja de llamarlo
+        capas = QStackedLayout(pagina)
+        capas.setStackingMode(QStackedLayout.StackingMode.StackAll)
+        self.animated_bg = AnimatedBackground()
         
         container = QWidget()
         container.setStyleSheet("background: transparent;")
@@ -652,18 +1360,17 @@ class AuroraWindow(QWidget):
         layout.addLayout(botones_layout)
         layout.addStretch()
         
-        self.main_layout.addWidget(container)
-    
-    def resizeEvent(self, event):
-        """Actualizar tamaño del fondo animado"""
-        super().resizeEvent(event)
-        if self.animated_bg:
-            self.animated_bg.setGeometry(self.rect())
+        capas.addWidget(self.animated_bg)
+        capas.addWidget(container)
+        capas.setCurrentWidget(container)
+        return pagina
     
     # ============== MODO CHAT ==============
     def mostrar_modo_chat(self):
-        self.limpiar_layout()
-        
+        self.mostrar_pagina("chat")
+        self.chat_input.setFocus()
+    
+    def construir_chat(self):
         container = QWidget()
         container.setStyleSheet(f"background-color: {COLORS['background']};")
         main_layout = QVBoxLayout(container)
@@ -697,25 +1404,35 @@ class AuroraWindow(QWidget):
             }}
         """)
         
+        # Buscador en todo el historial
+        btn_buscar = QPushButton("🔍")
+        btn_buscar.setFixedSize(40, 40)
+        btn_buscar.setCheckable(True)
+        btn_buscar.setToolTip("Buscar en la conversación")
+        btn_buscar.toggled.connect(self.alternar_busqueda)
+        btn_buscar.setStyleSheet(f"""
+            QPushButton {{ background: {COLORS['surface']}; border: 1px solid {COLORS['cyan']}; border-radius: 20px; font-size: 15px; }}
+            QPushButton:hover {{ border: 1px solid {COLORS['magenta']}; }}
+            QPushButton:checked {{ background: {COLORS['surface_light']}; border: 1px solid {COLORS['magenta']}; }}
+        """)
+        
         header.addWidget(titulo)
         header.addStretch()
+        header.addWidget(btn_buscar)
         header.addWidget(btn_volver)
         
-        # Área de chat con scroll
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        scroll.setStyleSheet(f"""
-            QScrollArea {{ background: transparent; border: none; }}
-            QScrollBar:vertical {{ background: {COLORS['surface']}; width: 8px; border-radius: 4px; }}
-            QScrollBar::handle:vertical {{ background: {COLORS['cyan']}; border-radius: 4px; }}
-        """)
+        self.panel_busqueda = self.crear_panel_busqueda()
+        
+        # Transcripción virtualizada (modelo + delegado)
+        self.chat_view = ChatView()
+        self.chat_view.edit_requested.connect(self.editar_mensaje)
+        self.chat_view.copy_requested.connect(self.copiar_mensaje)
+        self.chat_view.pide_anteriores.connect(self.cargar_mensajes_anteriores)
+        self.chat_view.pide_posteriores.connect(self.cargar_mensajes_posteriores)
         
-        self.chat_container = QWidget()
-        self.chat_container.setStyleSheet("background: transparent;")
-        self.chat_layout = QVBoxLayout(self.chat_container)
-        self.chat_layout.setSpacing(15)
-        self.chat_layout.addStretch()
-        scroll.setWidget(self.chat_container)
+        # Hueco para el indicador de "escribiendo..." bajo la transcripción
+        self.typing_layout = QHBoxLayout()
+        self.typing_layout.setContentsMargins(0, 0, 0, 0)
         
         # Input container
         input_container = QFrame()
@@ -771,76 +1488,197 @@ class AuroraWindow(QWidget):
         input_layout.addWidget(self.btn_send)
         
         main_layout.addLayout(header)
-        main_layout.addWidget(scroll, 1)
+        main_layout.addWidget(self.panel_busqueda)
+        main_layout.addWidget(self.chat_view, 1)
+        main_layout.addLayout(self.typing_layout)
         main_layout.addWidget(input_container)
         
-        self.main_layout.addWidget(container)
-        
-        # Mensaje de bienvenida
-        self.agregar_mensaje_chat("¡Hola! Soy Aurora. ¿En qué puedo ayudarte hoy?", is_user=False)
+        # Solo la última página del historial; las anteriores se leen al subir
+        self.historial = HistorialChat()
+        ultimos = self.historial.ultimos(HISTORIAL_PAGINA)
+        if ultimos:
+            self.chat_view.modelo.agregar_varios(
+                [(texto, es_usuario) for _, texto, es_usuario in ultimos],
+                [id_mensaje for id_mensaje, _, _ in ultimos],
+            )
+            QTimer.singleShot(0, self.scroll_to_bottom)
+        else:
+            # Mensaje de bienvenida
+            self.agregar_mensaje_chat("¡Hola! Soy Aurora. ¿En qué puedo ayudarte hoy?", is_user=False)
+        return container
     
     def volver_a_inicio(self):
-        """Volver al selector de modo"""
-        self.chat_input = None
-        self.chat_worker = None
-        self.typing_indicator = None
+        """Volver al selector de modo (el chat se conserva; una respuesta en curso sigue llegando)"""
         self.mostrar_selector_modo()
     
     def agregar_mensaje_chat(self, texto, is_user=True):
-        """Agrega una burbuja de chat"""
-        bubble = ChatBubble(texto, is_user)
-        
-        # Conectar señales de editar y copiar
-        if is_user:
-            bubble.edit_requested.connect(self.editar_mensaje)
-            bubble.copy_requested.connect(self.copiar_mensaje)
-        
-        # Ancho adaptable (máximo 70% del ancho disponible)
-        max_width = int(self.width() * 0.7)
-        bubble.setMaximumWidth(max_width)
-        
-        container = QHBoxLayout()
-        container.setContentsMargins(0, 0, 0, 0)
-        if is_user:
-            container.addStretch()
-            container.addWidget(bubble)
-        else:
-            container.addWidget(bubble)
-            container.addStretch()
-        
-        # Insertar antes del stretch final
-        self.chat_layout.insertLayout(self.chat_layout.count() - 1, container)
+        """Agrega un mensaje a la transcripción (la vista pinta la burbuja) y al historial"""
+        if not self.chat_view.sin_posteriores:
+            self.mostrar_ultimos_mensajes()
+        self.chat_view.agregar_mensaje(texto, is_user, self.historial.agregar(texto, is_user))
+        self.chat_view.recortar(HISTORIAL_VENTANA)
         
         # Scroll automático
-        QTimer.singleShot(50, self.scroll_to_bottom)
+        QTimer.singleShot(0, self.scroll_to_bottom)
+    
+    def cargar_mensajes_anteriores(self):
+        """Al subir cerca del principio: antepone la página anterior del historial"""
+        primero = self.chat_view.modelo.id_primero()
+        anteriores = self.historial.anteriores(primero, HISTORIAL_PAGINA) if primero is not None else []
+        if not anteriores:
+            self.chat_view.sin_anteriores = True
+            return
+        self.chat_view.anteponer(
+            [(texto, es_usuario) for _, texto, es_usuario in anteriores],
+            [id_mensaje for id_mensaje, _, _ in anteriores],
+        )
     
+    def cargar_mensajes_posteriores(self):
+        """Al bajar cerca del final de una ventana que no llega al último mensaje"""
+        ultimo = self.chat_view.modelo.id_ultimo()
+        if ultimo is None:
+            return
+        posteriores = self.historial.posteriores(ultimo, HISTORIAL_PAGINA)
+        self.chat_view.agregar_posteriores(
+            [(texto, es_usuario) for _, texto, es_usuario in posteriores],
+            [id_mensaje for id_mensaje, _, _ in posteriores],
+            al_final=len(posteriores) < HISTORIAL_PAGINA,
+            maximo=HISTORIAL_VENTANA,
+        )
+
+    def mostrar_ultimos_mensajes(self):
+        """Vuelve a la última página del historial (p. ej. al enviar tras saltar a un resultado)"""
+        ultimos = self.historial.ultimos(HISTORIAL_PAGINA)
+        self.chat_view.reiniciar(
+            [(texto, es_usuario) for _, texto, es_usuario in ultimos],
+            [id_mensaje for id_mensaje, _, _ in ultimos],
+            al_final=True,
+        )
+        self.scroll_to_bottom()
+
     def scroll_to_bottom(self):
         """Hacer scroll hasta el final del chat"""
-        scroll_area = self.chat_container.parent()
-        if isinstance(scroll_area, QScrollArea):
-            scroll_bar = scroll_area.verticalScrollBar()
-            scroll_bar.setValue(scroll_bar.maximum())
+        if self.chat_view:
+            self.chat_view.scrollToBottom()
+            self.chat_view.siguiendo_final = True
     
     def mostrar_typing_indicator(self):
         """Muestra el indicador de 'escribiendo...'"""
         if not self.typing_indicator:
             self.typing_indicator = TypingIndicator()
-            container = QHBoxLayout()
-            container.addWidget(self.typing_indicator)
-            container.addStretch()
-            self.chat_layout.insertLayout(self.chat_layout.count() - 1, container)
+            self.typing_layout.addWidget(self.typing_indicator)
+            self.typing_layout.addStretch()
             self.scroll_to_bottom()
     
     def ocultar_typing_indicator(self):
         """Oculta el indicador de 'escribiendo...'"""
         if self.typing_indicator:
+            while self.typing_layout.count():
+                self.typing_layout.takeAt(0)
             self.typing_indicator.setParent(None)
             self.typing_indicator.deleteLater()
             self.typing_indicator = None
     
+    # ---------- búsqueda en el historial ----------
+    def crear_panel_busqueda(self):
+        """Panel (oculto) con el campo de búsqueda y los resultados resaltados"""
+        panel = QFrame()
+        panel.setStyleSheet(f"""
+            QFrame {{ background: {COLORS['surface']}; border-radius: 15px; border: 1px solid {COLORS['surface_light']}; }}
+        """)
+        layout = QVBoxLayout(panel)
+        layout.setContentsMargins(15, 10, 15, 10)
+        layout.setSpacing(8)
+        
+        self.busqueda_input = QLineEdit()
+        self.busqueda_input.setPlaceholderText("Buscar en la conversación...")
+        self.busqueda_input.setFont(QFont("Segoe UI", 11))
+        self.busqueda_input.setStyleSheet(f"""
+            QLineEdit {{ background: transparent; border: none; color: {COLORS['text']}; padding: 4px; }}
+        """)
+        # Se busca cuando se deja de escribir un momento, no con cada tecla
+        self.timer_busqueda = QTimer(self)
+        self.timer_busqueda.setSingleShot(True)
+        self.timer_busqueda.setInterval(200)
+        self.timer_busqueda.timeout.connect(self.buscar_en_historial)
+        self.busqueda_input.textChanged.connect(lambda _: self.timer_busqueda.start())
+        
+        self.busqueda_resultados = QTextBrowser()
+        self.busqueda_resultados.setOpenLinks(False)
+        self.busqueda_resultados.anchorClicked.connect(self.ir_a_resultado)
+        self.busqueda_resultados.setMaximumHeight(220)
+        self.busqueda_resultados.setFont(QFont("Segoe UI", 10))
+        self.busqueda_resultados.setStyleSheet(f"""
+            QTextBrowser {{ background: transparent; border: none; color: {COLORS['text']}; }}
+            QScrollBar:vertical {{ background: {COLORS['surface']}; width: 8px; border-radius: 4px; }}
+            QScrollBar::handle:vertical {{ background: {COLORS['cyan']}; border-radius: 4px; }}
+        """)
+        
+        layout.addWidget(self.busqueda_input)
+        layout.addWidget(self.busqueda_resultados)
+        panel.hide()
+        return panel
+    
+    def alternar_busqueda(self, visible):
+        self.panel_busqueda.setVisible(visible)
+        if visible:
+            self.busqueda_input.setFocus()
+            self.busqueda_input.selectAll()
+        else:
+            self.chat_input.setFocus()
+    
+    def buscar_en_historial(self):
+        """Lanza la búsqueda en el carril de cálculo (con miles de mensajes tarda decenas de ms)"""
+        if self.tarea_busqueda:
+            self.tarea_busqueda.cancelar()
+            self.tarea_busqueda = None
+        texto = self.busqueda_input.text().strip()
+        if not texto:
+            self.busqueda_resultados.clear()
+            return
+        self.tarea_busqueda = obtener_pool_tareas().lanzar(
+            "cpu", lambda tarea: self.historial.buscar(texto),
+            al_terminar=self.mostrar_resultados_busqueda,
+            nombre="busqueda_historial",
+        )
+    
+    def mostrar_resultados_busqueda(self, resultados):
+        """Resultados por relevancia, con los términos encontrados resaltados"""
+        self.tarea_busqueda = None
+        if not resultados:
+            self.busqueda_resultados.setHtml(f"<p style='color: {COLORS['text_dim']};'>Sin resultados</p>")
+            return
+        bloques = []
+        for id_mensaje, fragmento, es_usuario, fecha in resultados:
+            texto = html.escape(" ".join(fragmento.split()))
+            texto = texto.replace(MARCA_INICIO, f"<b style='color: {COLORS['cyan']};'>").replace(MARCA_FIN, "</b>")
+            autor = "Tú" if es_usuario else "Aurora"
+            cuando = time.strftime("%d/%m/%Y %H:%M", time.localtime(fecha))
+            bloques.append(
+                f"<p><a href='#{id_mensaje}' style='color: {COLORS['magenta']}; text-decoration: none;'>"
+                f"{autor} · {cuando}</a><br>{texto}</p>"
+            )
+        self.busqueda_resultados.setHtml("".join(bloques))
+    
+    def ir_a_resultado(self, url):
+        """Lleva la transcripción al mensaje del resultado (una página centrada en él si no está en la ventana)"""
+        id_mensaje = int(url.fragment())
+        modelo = self.chat_view.modelo
+        if id_mensaje not in modelo.ids:
+            pagina = self.historial.alrededor(id_mensaje, HISTORIAL_PAGINA)
+            if not pagina:
+                return
+            self.chat_view.reiniciar(
+                [(texto, es_usuario) for _, texto, es_usuario in pagina],
+                [id_pagina for id_pagina, _, _ in pagina],
+                al_final=pagina[-1][0] >= self.historial.ultimo_id(),
+            )
+        if id_mensaje in modelo.ids:
+            self.chat_view.ir_a(modelo.ids.index(id_mensaje))
+    
     def enviar_mensaje_chat(self):
         """Envía mensaje de texto"""
-        if not self.chat_input or self.chat_worker:
+        if not self.chat_input or self.tarea_chat:
             return
         
         texto = self.chat_input.text().strip()
@@ -857,32 +1695,64 @@ class AuroraWindow(QWidget):
         # Mostrar indicador
         self.mostrar_typing_indicator()
         
-        # Crear worker para generar respuesta
-        self.chat_worker = ChatWorker(texto)
-        self.chat_worker.response_ready.connect(self.on_response_ready)
-        self.chat_worker.error_occurred.connect(self.on_response_error)
-        self.chat_worker.start()
+        # Generar la respuesta en el pool (carril de red); llega por fragmentos
+        self.tarea_chat = obtener_pool_tareas().lanzar(
+            "red", generar_respuesta_chat, texto,
+            al_avanzar=self.on_response_chunk,
+            al_terminar=self.on_response_ready,
+            al_fallar=self.on_response_error,
+            nombre="respuesta_chat",
+        )
     
+    def on_response_chunk(self, fragmento):
+        """Callback por cada fragmento de la respuesta: solo crece la última burbuja"""
+        if not self.chat_view:
+            return
+        if not self.chat_view.en_respuesta():
+            self.ocultar_typing_indicator()
+            self.chat_view.iniciar_respuesta(fragmento)
+        else:
+            self.chat_view.extender_respuesta(fragmento)
+
+    def terminar_respuesta(self):
+        """Cierra la respuesta en streaming y la guarda ya completa (el historial solo añade)"""
+        if not self.chat_view:
+            return
+        terminada = self.chat_view.terminar_respuesta()
+        if terminada is None:
+            return
+        fila, texto = terminada
+        id_mensaje = self.historial.agregar(texto, False)
+        # Fuera de la ventana (se está leyendo un resultado) aparecerá al bajar
+        if fila is not None:
+            self.chat_view.modelo.fijar_id(fila, id_mensaje)
+            self.chat_view.recortar(HISTORIAL_VENTANA)
+
     def on_response_ready(self, respuesta):
-        """Callback cuando la respuesta está lista"""
+        """Callback cuando la respuesta está completa"""
         self.ocultar_typing_indicator()
-        self.agregar_mensaje_chat(respuesta, is_user=False)
+        if not self.chat_view.en_respuesta():
+            self.agregar_mensaje_chat(respuesta, is_user=False)
+        self.terminar_respuesta()
         self.btn_send.setText("ENVIAR")
-        self.chat_worker = None
+        self.tarea_chat = None
     
     def on_response_error(self, error):
         """Callback cuando hay un error"""
         self.ocultar_typing_indicator()
-        self.agregar_mensaje_chat(error, is_user=False)
+        self.terminar_respuesta()
+        self.agregar_mensaje_chat("Lo siento, ocurrió un error al procesar tu mensaje.", is_user=False)
         self.btn_send.setText("ENVIAR")
-        self.chat_worker = None
+        self.tarea_chat = None
     
     def enviar_o_pausar(self):
         """Enviar mensaje o pausar generación"""
-        if self.chat_worker and self.chat_worker.isRunning():
-            # Pausar generación
-            self.chat_worker.terminate()
-            self.chat_worker = None
+        if self.tarea_chat:
+            # Pausar generación (lo recibido hasta ahora se queda en la burbuja;
+            # los fragmentos que aún lleguen se descartan)
+            self.tarea_chat.cancelar()
+            self.tarea_chat = None
+            self.terminar_respuesta()
             self.ocultar_typing_indicator()
             self.btn_send.setText("ENVIAR")
         else:
@@ -904,24 +1774,24 @@ class AuroraWindow(QWidget):
     
     def iniciar_grabacion_chat(self):
         """Inicia la grabación de voz en el chat"""
-        def escuchar_comando():
-            comando = escuchar()
+        def actualizar_ui(comando):
+            if not self.chat_input:
+                return
+            
+            self.btn_mic.setChecked(False)
+            self.btn_mic.setText("🎤")
             
-            def actualizar_ui():
-                if not self.chat_input:
-                    return
-                
-                self.btn_mic.setChecked(False)
-                self.btn_mic.setText("🎤")
-                
-                if comando and comando != "ERROR_MIC":
-                    self.chat_input.setText(comando)
-                
-                self.chat_input.setPlaceholderText("Escribe tu mensaje...")
+            if comando and comando != "ERROR_MIC":
+                self.chat_input.setText(comando)
             
-            QTimer.singleShot(0, actualizar_ui)
+            self.chat_input.setPlaceholderText("Escribe tu mensaje...")
         
-        threading.Thread(target=escuchar_comando, daemon=True).start()
+        obtener_pool_tareas().lanzar(
+            "audio", lambda tarea: escuchar(),
+            al_terminar=actualizar_ui,
+            al_fallar=lambda e: actualizar_ui(None),
+            nombre="microfono_chat",
+        )
     
     def detener_grabacion_chat(self):
         """Detiene la grabación (ya manejado por el toggle)"""
@@ -940,13 +1810,14 @@ class AuroraWindow(QWidget):
     
     # ============== MODO VOZ ==============
     def mostrar_modo_voz(self):
-        self.limpiar_layout()
-        
-        threading.Thread(
-            target=lambda: hablar_interruptible(limpiar_texto_para_voz("Modo voz activado. Presiona el botón para hablar.")),
-            daemon=True
-        ).start()
-        
+        obtener_pool_tareas().lanzar(
+            "audio",
+            lambda tarea: hablar_interruptible(limpiar_texto_para_voz("Modo voz activado. Presiona el botón para hablar.")),
+            nombre="saludo_voz",
+        )
+        self.mostrar_pagina("voz")
+    
+    def construir_voz(self):
         container = QWidget()
         container.setStyleSheet(f"background-color: {COLORS['background']};")
         main_layout = QVBoxLayout(container)
@@ -987,19 +1858,20 @@ class AuroraWindow(QWidget):
         self.liquid_button.clicked.connect(self.toggle_voz)
         
         # Estado
-        self.voice_status = QLabel("Presiona el botón para comenzar")
-        self.voice_status.setFont(QFont("Segoe UI", 15))
-        self.voice_status.setStyleSheet(f"color: {COLORS['text_dim']}; background: transparent;")
-        self.voice_status.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.voice_status = EtiquetaEstado("Presiona el botón para comenzar", 15)
+        
+        # Métricas del pipeline (profundidad de cola y latencia por etapa)
+        self.voice_metrics = EtiquetaEstado("", 9)
         
         main_layout.addLayout(header)
         main_layout.addStretch()
         main_layout.addWidget(self.liquid_button, alignment=Qt.AlignmentFlag.AlignCenter)
         main_layout.addSpacing(30)
         main_layout.addWidget(self.voice_status)
+        main_layout.addWidget(self.voice_metrics)
         main_layout.addStretch()
         
-        self.main_layout.addWidget(container)
+        return container
     
     def toggle_voz(self):
         """Toggle del modo voz"""
@@ -1015,13 +1887,20 @@ class AuroraWindow(QWidget):
             self.liquid_button.start_animation()
         
         self.voice_status.setText("🎤 Escuchando continuamente...")
-        self.voice_status.setStyleSheet(f"color: {COLORS['cyan']}; background: transparent;")
+        self.voice_status.establecer_color(COLORS['cyan'])
         
         self.voice_worker = VoiceWorker()
-        self.voice_worker.status_updated.connect(lambda msg: self.voice_status.setText(msg))
+        self.voice_worker.status_updated.connect(self.actualizar_estado_voz)
+        self.voice_worker.metrics_updated.connect(self.actualizar_metricas_voz)
         self.voice_worker.should_stop.connect(self.detener_voz)
         self.voice_worker.start()
     
+    def actualizar_estado_voz(self, mensaje):
+        self.voice_status.setText(mensaje)
+    
+    def actualizar_metricas_voz(self, metricas):
+        self.voice_metrics.setText(formatear_metricas(metricas))
+    
     def detener_voz(self):
         """Detiene el modo voz (funciona incluso si está hablando)"""
         global detener_voz_flag
@@ -1036,18 +1915,30 @@ class AuroraWindow(QWidget):
             self.liquid_button.stop_animation()
         
         self.voice_status.setText("Presiona el botón para reactivar")
-        self.voice_status.setStyleSheet(f"color: {COLORS['text_dim']}; background: transparent;")
+        self.voice_status.establecer_color(COLORS['text_dim'])
         
         time.sleep(0.3)
         detener_voz_flag = False
 
 
 # ============== MAIN ==============
-def main():
-    """Función principal para ejecutar la interfaz"""
+def main(perfil_ui=False, capa_perfil=False):
+    """
+    Función principal para ejecutar la interfaz
+
+    Args:
+        perfil_ui: Medir cuadros, pintado por widget y retraso del bucle (--profile-ui)
+        capa_perfil: Mostrar esas métricas sobre la ventana (--profile-overlay)
+    """
     app = QApplication(sys.argv)
     
     ventana = AuroraWindow()
+    if perfil_ui or capa_perfil:
+        from src.perfil_ui import PerfilUI
+        perfil = PerfilUI(parent=app)
+        perfil.observar(ventana, capa=capa_perfil)
+        perfil.iniciar()
+        app.aboutToQuit.connect(perfil.registrar_resumen)
     ventana.show()
     
     sys.exit(app.exec())
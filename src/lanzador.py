@@ -0,0 +1,271 @@
+"""
+Lanzador de programas - Servicio auxiliar para abrir aplicaciones
+
+Hacer fork del proceso de la interfaz (PySide6, cientos de MB) para abrir
+un programa es lento, y Popen sin guardar el hijo deja procesos zombi. Al
+arrancar se lanza un proceso auxiliar pequeño (src/lanzador_servicio.py)
+que recibe las peticiones por una tubería, lanza con posix_spawn, recoge a
+los hijos y devuelve la latencia de cada lanzamiento y su código de salida.
+
+Donde no hay posix_spawn (Windows) o el servicio está desactivado, se usa
+subprocess.Popen sin shell y un hilo que espera al hijo.
+"""
+import os
+import sys
+import json
+import atexit
+import time
+import errno
+import shlex
+import logging
+import threading
+import subprocess
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config.settings import CURRENT_OS, LANZADOR_SERVICIO
+
+logger = logging.getLogger(__name__)
+
+SERVICIO_DISPONIBLE = hasattr(os, "posix_spawnp") and CURRENT_OS != "Windows"
+SCRIPT_SERVICIO = Path(__file__).with_name("lanzador_servicio.py")
+
+
+def argumentos_programa(ejecutable: str) -> List[str]:
+    """
+    Convierte el comando configurado en argv sin pasar por el shell
+
+    Args:
+        ejecutable: "firefox", "open -a 'Google Chrome'", "start winword"...
+
+    Returns:
+        list: argv
+    """
+    if CURRENT_OS == "Windows":
+        argv = shlex.split(ejecutable, posix=False)
+        if argv and argv[0].lower() == "start":
+            # "start" es interno de cmd; el argumento vacío es el título de la ventana
+            return ["cmd", "/c", "start", ""] + argv[1:]
+        return argv
+    return shlex.split(ejecutable)
+
+
+# ============== LANZADOR ==============
+class Lanzador:
+    """Cliente del proceso auxiliar (o lanzamiento local si no está disponible)"""
+
+    def __init__(self, usar_servicio: bool = LANZADOR_SERVICIO and SERVICIO_DISPONIBLE):
+        self.usar_servicio = usar_servicio
+        self._proceso: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+        self._siguiente_id = 0
+        self._pendientes: Dict[int, list] = {}   # id → [Event, respuesta, nombre]
+        self._vivos: Dict[int, str] = {}         # pid → nombre
+        self.salidas = deque(maxlen=50)          # (nombre, pid, código, duración)
+        self.estadisticas = {
+            "lanzamientos": 0, "errores": 0, "latencia_ms": 0.0, "latencia_max_ms": 0.0, "spawn_ms": 0.0,
+        }
+
+    # ---------- servicio auxiliar ----------
+    def iniciar(self) -> bool:
+        """Arranca el proceso auxiliar (mejor cuanto antes, con el proceso aún pequeño)"""
+        if not self.usar_servicio:
+            return False
+        with self._lock:
+            if self._proceso and self._proceso.poll() is None:
+                return True
+            try:
+                self._proceso = subprocess.Popen(
+                    [sys.executable, "-u", str(SCRIPT_SERVICIO)],
+                    stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1,
+                )
+            except OSError as e:
+                logger.warning(f"No se pudo iniciar el servicio de lanzamiento: {e}")
+                self.usar_servicio = False
+                return False
+            threading.Thread(target=self._leer, args=(self._proceso,), daemon=True,
+                             name="lanzador").start()
+        logger.info(f"🚀 Servicio de lanzamiento iniciado (pid {self._proceso.pid})")
+        return True
+
+    def _leer(self, proceso):
+        for linea in proceso.stdout:
+            try:
+                mensaje = json.loads(linea)
+            except ValueError:
+                continue
+            if "id" in mensaje:
+                pendiente = self._pendientes.pop(mensaje["id"], None)
+                if pendiente:
+                    # Registrado aquí, en el mismo hilo y antes que su aviso de salida
+                    if "pid" in mensaje:
+                        self._vivos[mensaje["pid"]] = pendiente[2]
+                    pendiente[1] = mensaje
+                    pendiente[0].set()
+            else:
+                self._registrar_salida(mensaje["pid"], mensaje["estado"], mensaje.get("duracion_s"))
+        # El servicio terminó: despertar a quien esperaba
+        for pendiente in list(self._pendientes.values()):
+            pendiente[0].set()
+
+    def _registrar_salida(self, pid, codigo, duracion):
+        nombre = self._vivos.pop(pid, str(pid))
+        self.salidas.append((nombre, pid, codigo, duracion))
+        if codigo:
+            logger.warning(f"⚠️ {nombre} (pid {pid}) terminó con código {codigo}")
+        else:
+            logger.debug(f"{nombre} (pid {pid}) terminó")
+
+    def _lanzar_servicio(self, argv: List[str], espera: float) -> int:
+        if not self.iniciar():
+            return self._lanzar_local(argv)
+        pendiente = [threading.Event(), None, os.path.basename(argv[0])]
+        with self._lock:
+            self._siguiente_id += 1
+            id_peticion = self._siguiente_id
+            self._pendientes[id_peticion] = pendiente
+            try:
+                self._proceso.stdin.write(json.dumps({"id": id_peticion, "argv": argv}) + "\n")
+                self._proceso.stdin.flush()
+            except (OSError, ValueError):
+                self._pendientes.pop(id_peticion, None)
+                logger.warning("El servicio de lanzamiento no responde, lanzando localmente")
+                return self._lanzar_local(argv)
+        pendiente[0].wait(espera)
+        respuesta = pendiente[1]
+        if respuesta is None:
+            self._pendientes.pop(id_peticion, None)
+            logger.warning("El servicio de lanzamiento no respondió, lanzando localmente")
+            return self._lanzar_local(argv)
+        if "error" in respuesta:
+            numero = respuesta.get("errno") or errno.EIO
+            raise OSError(numero, respuesta["error"], argv[0])
+        self.estadisticas["spawn_ms"] = respuesta["ms"]
+        return respuesta["pid"]
+
+    # ---------- lanzamiento local ----------
+    def _lanzar_local(self, argv: List[str]) -> int:
+        proceso = subprocess.Popen(
+            argv, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+            start_new_session=CURRENT_OS != "Windows",
+        )
+        inicio = time.monotonic()
+        # Antes de arrancar el hilo que avisa de la salida
+        self._vivos[proceso.pid] = os.path.basename(argv[0])
+
+        def esperar():
+            codigo = proceso.wait()
+            self._registrar_salida(proceso.pid, codigo, round(time.monotonic() - inicio, 3))
+        threading.Thread(target=esperar, daemon=True).start()
+        return proceso.pid
+
+    # ---------- API ----------
+    def lanzar(self, argv: List[str], espera: float = 5.0) -> int:
+        """
+        Lanza un programa sin esperar a que termine
+
+        Args:
+            argv: Programa y argumentos
+            espera: Segundos máximos para la respuesta del servicio
+
+        Returns:
+            int: PID del programa
+
+        Raises:
+            FileNotFoundError, PermissionError, OSError: Si no se pudo lanzar
+        """
+        inicio = time.perf_counter()
+        try:
+            pid = self._lanzar_servicio(argv, espera) if self.usar_servicio else self._lanzar_local(argv)
+        except OSError:
+            self.estadisticas["errores"] += 1
+            raise
+        latencia = (time.perf_counter() - inicio) * 1000
+        self.estadisticas["lanzamientos"] += 1
+        n = self.estadisticas["lanzamientos"]
+        self.estadisticas["latencia_ms"] += (latencia - self.estadisticas["latencia_ms"]) / n
+        self.estadisticas["latencia_max_ms"] = max(self.estadisticas["latencia_max_ms"], latencia)
+        logger.debug(f"{argv[0]} lanzado (pid {pid}) en {latencia:.1f} ms")
+        return pid
+
+    def cerrar(self):
+        """Cierra el servicio; los programas ya lanzados siguen abiertos"""
+        with self._lock:
+            if self._proceso and self._proceso.poll() is None:
+                try:
+                    self._proceso.stdin.close()
+                    self._proceso.wait(timeout=2)
+                except (OSError, subprocess.TimeoutExpired):
+                    self._proceso.kill()
+            self._proceso = None
+
+
+_lanzador = None
+
+
+def obtener_lanzador() -> Lanzador:
+    global _lanzador
+    if _lanzador is None:
+        _lanzador = Lanzador()
+        atexit.register(_lanzador.cerrar)
+    return _lanzador
+
+
+def iniciar_lanzador() -> bool:
+    """Arranca el servicio auxiliar; llamar al inicio, antes de cargar la interfaz"""
+    return obtener_lanzador().iniciar()
+
+
+def lanzar_programa(ejecutable) -> int:
+    """
+    Args:
+        ejecutable: Comando configurado (str) o argv (list)
+
+    Returns:
+        int: PID del programa
+    """
+    argv = argumentos_programa(ejecutable) if isinstance(ejecutable, str) else list(ejecutable)
+    return obtener_lanzador().lanzar(argv)
+
+
+# ============== BENCHMARK ==============
+if __name__ == "__main__":
+    import statistics
+
+    logging.basicConfig(level=logging.INFO)
+    # Simular un proceso grande como el de la interfaz (~800 MB tocados)
+    lastre = bytearray(800 * 1024 * 1024)
+    for i in range(0, len(lastre), 4096):
+        lastre[i] = 1
+
+    def medir(lanzar, veces=30):
+        tiempos = []
+        for _ in range(veces):
+            inicio = time.perf_counter()
+            lanzar(["true"])
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        return statistics.median(tiempos), max(tiempos)
+
+    print("=" * 60)
+    print("🚀 LANZADOR DE PROGRAMAS (proceso de 800 MB)")
+    print("=" * 60)
+    p50, maximo = medir(lambda argv: subprocess.Popen(argv).wait())
+    print(f"\n   Popen desde este proceso: p50 {p50:.2f} ms, máx {maximo:.2f} ms")
+    p50, maximo = medir(lambda argv: subprocess.Popen(argv, close_fds=False, start_new_session=True).wait())
+    print(f"   Popen (posix_spawn/vfork):  p50 {p50:.2f} ms, máx {maximo:.2f} ms")
+
+    lanzador = Lanzador(usar_servicio=SERVICIO_DISPONIBLE)
+    lanzador.iniciar()
+    p50, maximo = medir(lanzador.lanzar)
+    print(f"   Servicio auxiliar:          p50 {p50:.2f} ms, máx {maximo:.2f} ms "
+          f"(posix_spawn {lanzador.estadisticas['spawn_ms']:.2f} ms)")
+    try:
+        lanzador.lanzar(["no-existe-este-programa"])
+    except FileNotFoundError as e:
+        print(f"   Error devuelto por el servicio: {e!r}")
+    lanzador.lanzar(["sh", "-c", "exit 3"])
+    time.sleep(0.3)
+    print(f"\n📊 {lanzador.estadisticas}")
+    print(f"   Últimas salidas: {list(lanzador.salidas)[-2:]}")
+    lanzador.cerrar()
@@ -0,0 +1,91 @@
+"""
+Proceso auxiliar del lanzador - Lanza programas con posix_spawn
+
+Se ejecuta como script independiente (solo biblioteca estándar) para que el
+proceso sea pequeño: lo arranca src/lanzador.py al inicio y le habla por
+stdin/stdout con una línea JSON por mensaje.
+
+    → {"id": 1, "argv": ["firefox"]}
+    ← {"id": 1, "pid": 4242, "ms": 0.4}            o {"id": 1, "errno": 2, "error": "..."}
+    ← {"pid": 4242, "estado": 0, "duracion_s": 12.5}  (cuando el programa termina)
+
+Los programas se lanzan en su propia sesión (Ctrl+C en la terminal de
+Aurora no los cierra), con stdin/stdout en /dev/null para no mezclarse con
+el protocolo. Un hilo los recoge al terminar y avisa del código de salida.
+"""
+import os
+import sys
+import json
+import time
+import threading
+
+_salida = sys.stdout
+_lock = threading.Lock()
+# Lanzar y registrar el inicio es atómico frente a la recogida: un programa que
+# termina al instante no se avisa antes que su lanzamiento ni sin duración
+_lock_hijos = threading.Lock()
+_inicios = {}
+_hay_hijos = threading.Event()
+
+_ACCIONES = [
+    (os.POSIX_SPAWN_OPEN, 0, os.devnull, os.O_RDONLY, 0),
+    (os.POSIX_SPAWN_OPEN, 1, os.devnull, os.O_WRONLY, 0),
+]
+
+
+def enviar(mensaje):
+    with _lock:
+        _salida.write(json.dumps(mensaje) + "\n")
+        _salida.flush()
+
+
+def recoger_hijos():
+    """Espera a los programas lanzados y avisa de su código de salida"""
+    while True:
+        try:
+            pid, estado = os.waitpid(-1, 0)
+        except ChildProcessError:
+            # Sin hijos: esperar al próximo lanzamiento (el timeout cubre la carrera con set())
+            _hay_hijos.wait(timeout=1.0)
+            _hay_hijos.clear()
+            continue
+        with _lock_hijos:
+            inicio = _inicios.pop(pid, None)
+            enviar({
+                "pid": pid,
+                "estado": os.waitstatus_to_exitcode(estado),
+                "duracion_s": round(time.monotonic() - inicio, 3) if inicio else None,
+            })
+
+
+def lanzar(peticion):
+    argv = peticion["argv"]
+    with _lock_hijos:
+        lanzado = time.monotonic()
+        inicio = time.perf_counter()
+        try:
+            pid = os.posix_spawnp(
+                argv[0], argv, dict(os.environ, **peticion.get("env", {})),
+                file_actions=_ACCIONES, setsid=True,
+            )
+        except OSError as e:
+            enviar({"id": peticion["id"], "errno": e.errno, "error": e.strerror or str(e)})
+            return
+        _inicios[pid] = lanzado
+        enviar({"id": peticion["id"], "pid": pid, "ms": round((time.perf_counter() - inicio) * 1000, 3)})
+    _hay_hijos.set()
+
+
+def main():
+    threading.Thread(target=recoger_hijos, daemon=True).start()
+    for linea in sys.stdin:
+        try:
+            peticion = json.loads(linea)
+        except ValueError:
+            continue
+        lanzar(peticion)
+    # stdin cerrado: Aurora terminó; los programas lanzados siguen abiertos
+
+
+if __name__ == "__main__":
+    main()
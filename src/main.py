@@ -9,6 +9,7 @@ import platform
 import time
 import logging
 import threading
+import inspect
 import subprocess
 from queue import Queue, Empty
 from pathlib import Path
@@ -17,15 +18,26 @@ from config.settings import (
     VOICE_LANG, TTS_LANG, TEMP_AUDIO_FILE,
     ENERGY_THRESHOLD, DYNAMIC_ENERGY, LISTEN_TIMEOUT,
     PHRASE_TIME_LIMIT, AMBIENT_NOISE_DURATION,
-    EXIT_COMMANDS, get_audio_player
+    ESPECULACION_INTERVALO_PARCIAL, AUDIO_PREPROCESADO, CLASIFICADOR_ACTIVO,
+    get_audio_player
 )
 
 from src.cerebro_ia import generar_respuesta
-from src.habilidades_sistema import abrir_programa
-from src.habilidades_web import abrir_pagina_web, buscar_en_google
+from src.fuentes_audio import obtener_fuente_por_defecto
+from src.preprocesado_audio import (
+    preprocesar_fuente, codificador_disponible,
+    CodificadorFlacIncremental, AudioDataCodificada
+)
+from src.registro_habilidades import registro
+from src.clasificador_intenciones import clasificar_comando
+from src.multi_intencion import planificar, ejecutar_plan
 
 logger = logging.getLogger(__name__)
 
+# listen(stream=True) solo existe desde SpeechRecognition 3.10; sin él se escucha
+# la frase entera y se codifica al reconocer
+LISTEN_STREAM_AVAILABLE = "stream" in inspect.signature(sr.Recognizer.listen).parameters
+
 # TTS worker globals
 _tts_queue = Queue()
 _tts_worker_thread = None
@@ -49,6 +61,43 @@ def _find_player_command():
             return players
     return None
 
+def comando_reproductor(ruta):
+    """
+    Construye la línea de comando para reproducir un archivo de audio
+
+    Args:
+        ruta: Archivo de audio a reproducir
+
+    Returns:
+        list: Programa y argumentos, o None si no hay reproductor disponible
+    """
+    player_cmd = _find_player_command()
+    if player_cmd is None:
+        # fallback: try ffplay via subprocess if available
+        if os.system("which ffplay > /dev/null 2>&1") == 0:
+            return ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", str(ruta)]
+        if os.system("which mpg123 > /dev/null 2>&1") == 0:
+            return ["mpg123", str(ruta)]
+        return None
+    # split the command into program and args
+    return player_cmd.split() + [str(ruta)]
+
+def sintetizar_voz(texto, ruta):
+    """
+    Genera el audio de un texto con gTTS y lo guarda en disco
+
+    Args:
+        texto: Texto ya limpio para síntesis
+        ruta: Archivo MP3 de destino
+
+    Returns:
+        Path: Ruta del archivo generado
+    """
+    ruta = Path(ruta)
+    tts = gTTS(text=texto, lang=TTS_LANG)
+    tts.save(str(ruta))
+    return ruta
+
 def _tts_worker():
     global _tts_process
     while True:
@@ -63,26 +112,16 @@ def _tts_worker():
             _tts_playing_flag.clear()
             tmp = Path(TEMP_AUDIO_FILE)
             # Generar audio
-            tts = gTTS(text=text, lang=TTS_LANG)
-            tts.save(str(tmp))
-            player_cmd = _find_player_command()
-            if player_cmd is None:
-                # fallback: try ffplay via subprocess if available
-                if os.system("which ffplay > /dev/null 2>&1") == 0:
-                    cmd = ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet", str(tmp)]
-                elif os.system("which mpg123 > /dev/null 2>&1") == 0:
-                    cmd = ["mpg123", str(tmp)]
-                else:
-                    logger.error("No audio player found")
-                    _tts_playing_flag.clear()
-                    try:
-                        tmp.unlink()
-                    except Exception:
-                        pass
-                    continue
-            else:
-                # split the command into program and args
-                cmd = player_cmd.split() + [str(tmp)]
+            sintetizar_voz(text, tmp)
+            cmd = comando_reproductor(tmp)
+            if cmd is None:
+                logger.error("No audio player found")
+                _tts_playing_flag.clear()
+                try:
+                    tmp.unlink()
+                except Exception:
+                    pass
+                continue
             with _tts_lock:
                 try:
                     _tts_process = subprocess.Popen(cmd)
@@ -157,55 +196,222 @@ def tts_is_playing() -> bool:
 def limpiar_para_tts(texto: str) -> str:
     return texto.replace("\n", " ").strip()
 
-def escuchar():
+def crear_reconocedor():
     r = sr.Recognizer()
     r.energy_threshold = ENERGY_THRESHOLD
     r.dynamic_energy_threshold = DYNAMIC_ENERGY
+    return r
+
+def capturar_audio(r=None, fuente=None, calibrar=True, detener_tts=True, on_parcial=None):
+    """
+    Captura una frase de una fuente de audio sin reconocerla
+
+    Args:
+        r: Recognizer a reutilizar (se crea uno nuevo si es None)
+        fuente: FuenteAudio a usar; si es None, la fuente por defecto
+            (micrófono o AUDIO_FUENTE)
+        calibrar: Ajustar el umbral al ruido ambiente antes de escuchar
+            (solo en fuentes en vivo)
+        detener_tts: Cortar la voz de Aurora antes de escuchar
+        on_parcial: Recibe el AudioData acumulado cada
+            ESPECULACION_INTERVALO_PARCIAL segundos mientras se habla
+
+    Returns:
+        AudioData, None si no se habló o "ERROR_MIC"
+    """
+    r = r or crear_reconocedor()
     try:
-        with sr.Microphone() as source:
-            # if TTS playing, stop it immediately before listening
-            try:
-                if tts_is_playing():
-                    stop_tts()
-                    # small wait to ensure player terminated
-                    time.sleep(0.05)
-            except Exception:
-                pass
-            r.adjust_for_ambient_noise(source, duration=AMBIENT_NOISE_DURATION)
-            audio = r.listen(source, timeout=LISTEN_TIMEOUT, phrase_time_limit=PHRASE_TIME_LIMIT)
-            comando = r.recognize_google(audio, language=VOICE_LANG)
-            return comando.lower()
+        fuente = fuente or obtener_fuente_por_defecto()
+        if getattr(fuente, "agotada", False):
+            return None
+        calibrar = calibrar and getattr(fuente, "en_vivo", True)
+        if AUDIO_PREPROCESADO:
+            fuente = preprocesar_fuente(fuente)
+        with fuente as source:
+            return _escuchar_frase(r, source, calibrar, detener_tts, on_parcial)
     except sr.WaitTimeoutError:
         return None
+    except OSError as e:
+        logger.error(f"OS error accessing microphone: {e}")
+        return "ERROR_MIC"
+    except Exception as e:
+        logger.exception(f"Unexpected error in capturar_audio: {e}")
+        return "ERROR_MIC"
+
+def _escuchar_frase(r, source, calibrar, detener_tts, on_parcial=None):
+    # if TTS playing, stop it immediately before listening
+    if detener_tts:
+        try:
+            if tts_is_playing():
+                stop_tts()
+                # small wait to ensure player terminated
+                time.sleep(0.05)
+        except Exception:
+            pass
+    if calibrar:
+        r.adjust_for_ambient_noise(source, duration=AMBIENT_NOISE_DURATION)
+    codificar = AUDIO_PREPROCESADO and codificador_disponible()
+    if (on_parcial is None and not codificar) or not LISTEN_STREAM_AVAILABLE:
+        # Sin nada que hacer por bloques, listen() normal
+        return r.listen(source, timeout=LISTEN_TIMEOUT, phrase_time_limit=PHRASE_TIME_LIMIT)
+    # Escucha por bloques: se codifica y se publica el audio acumulado mientras se habla
+    bytes_por_segundo = source.SAMPLE_RATE * source.SAMPLE_WIDTH
+    bloques = []
+    nuevos = 0
+    codificador = None
+    try:
+        for bloque in r.listen(source, timeout=LISTEN_TIMEOUT,
+                               phrase_time_limit=PHRASE_TIME_LIMIT, stream=True):
+            if codificar:
+                try:
+                    if codificador is None:
+                        # Se arranca con el primer bloque de voz, no en cada espera en silencio
+                        codificador = CodificadorFlacIncremental(source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+                    codificador.alimentar(bloque.frame_data)
+                except Exception as e:
+                    # El audio se sigue capturando; get_flac_data() lo codificará al reconocer
+                    logger.warning(f"Codificación incremental fallida, se codificará al reconocer: {e}")
+                    if codificador:
+                        codificador.cancelar()
+                    codificador, codificar = None, False
+            bloques.append(bloque.frame_data)
+            nuevos += len(bloque.frame_data)
+            if on_parcial and nuevos >= ESPECULACION_INTERVALO_PARCIAL * bytes_por_segundo:
+                nuevos = 0
+                on_parcial(sr.AudioData(b"".join(bloques), source.SAMPLE_RATE, source.SAMPLE_WIDTH))
+    except BaseException:
+        if codificador:
+            codificador.cancelar()
+        raise
+    datos = b"".join(bloques)
+    if codificador:
+        try:
+            flac = codificador.terminar()
+        except Exception as e:
+            logger.warning(f"Codificación incremental fallida, se codificará al reconocer: {e}")
+            codificador.cancelar()
+            flac = None
+        return AudioDataCodificada(datos, source.SAMPLE_RATE, source.SAMPLE_WIDTH, flac)
+    return sr.AudioData(datos, source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+
+def reconocer_audio(audio, r=None):
+    """
+    Transcribe una frase capturada con el reconocedor de Google
+
+    Args:
+        audio: AudioData devuelto por capturar_audio()
+        r: Recognizer a reutilizar
+
+    Returns:
+        str: Texto en minúsculas, None si no se entendió o "ERROR_MIC"
+    """
+    r = r or crear_reconocedor()
+    try:
+        comando = r.recognize_google(audio, language=VOICE_LANG)
+        return comando.lower()
     except sr.UnknownValueError:
         return None
     except sr.RequestError as e:
         logger.error(f"Recognition request error: {e}")
         return "ERROR_MIC"
-    except OSError as e:
-        logger.error(f"OS error accessing microphone: {e}")
-        return "ERROR_MIC"
     except Exception as e:
-        logger.exception(f"Unexpected error in escuchar: {e}")
+        logger.exception(f"Unexpected error in reconocer_audio: {e}")
         return "ERROR_MIC"
 
+def escuchar(fuente=None):
+    """
+    Escucha y reconoce una frase
+
+    Args:
+        fuente: FuenteAudio (micrófono, archivo o directorio); por defecto
+            la configurada en AUDIO_FUENTE o el micrófono
+
+    Returns:
+        str: Texto en minúsculas, None si no se entendió o "ERROR_MIC"
+    """
+    r = crear_reconocedor()
+    audio = capturar_audio(r, fuente)
+    if audio is None or audio == "ERROR_MIC":
+        return audio
+    return reconocer_audio(audio, r)
+
+def enrutar_comando(comando):
+    """
+    Decide qué habilidad atendería el comando, sin ejecutar nada
+
+    Args:
+        comando: Comando del usuario en minúsculas
+
+    Returns:
+        str: Nombre de la habilidad ("Salida", "Sistema", "Web"...),
+            "Respuesta" si hay respuesta local, "Varias" si son varias
+            órdenes, "IA" o None si no hay comando
+    """
+    if not comando or comando == "ERROR_MIC":
+        return None
+    if planificar(comando, _detectar_clausula):
+        return "Varias"
+    # Sin contar en las métricas: se llama también con hipótesis parciales
+    deteccion = registro.detectar(comando, contar=False)
+    if deteccion:
+        return deteccion[0].nombre
+    clasificacion = _clasificar_local(comando, contar=False)
+    if clasificacion:
+        return clasificacion.habilidad or "Respuesta"
+    return "IA"
+
+def _clasificar_local(comando, contar=True):
+    """Clasificador local para comandos sin disparador exacto (None = usar la IA)"""
+    if not CLASIFICADOR_ACTIVO:
+        return None
+    clasificacion = clasificar_comando(comando, contar=contar)
+    if clasificacion and clasificacion.habilidad and not registro.obtener(clasificacion.habilidad):
+        logger.warning(f"La intención {clasificacion.intencion} apunta a una habilidad inexistente: {clasificacion.habilidad}")
+        return None
+    return clasificacion
+
+def _detectar_clausula(clausula):
+    """Habilidad de una cláusula de un comando con varias intenciones"""
+    deteccion = registro.detectar(clausula, contar=False)
+    if deteccion:
+        return deteccion[0], deteccion[1], True
+    clasificacion = _clasificar_local(clausula, contar=False)
+    if clasificacion and clasificacion.habilidad:
+        return registro.obtener(clasificacion.habilidad), clasificacion.slots, False
+    return None
+
+def _procesar_varias(acciones):
+    """Ejecuta las acciones de un comando compuesto y junta las respuestas"""
+    salida = any(a.habilidad.nombre == "Salida" for a in acciones)
+    acciones = [a for a in acciones if a.habilidad.nombre != "Salida"]
+    respuestas = ejecutar_plan(acciones, registro.ejecutar)
+    if salida:
+        respuestas.append("¡Hasta luego! Fue un placer ayudarte.")
+    return " ".join(r for r in respuestas if r), not salida
+
 def procesar_comando(comando):
     if not comando or comando == "ERROR_MIC":
         return "", True
-    if any(palabra in comando for palabra in EXIT_COMMANDS):
-        return "¡Hasta luego! Fue un placer ayudarte.", False
-    habilidades = [
-        ("Sistema", abrir_programa),
-        ("Web", abrir_pagina_web),
-        ("Búsqueda", buscar_en_google)
-    ]
-    for nombre, funcion in habilidades:
-        try:
-            respuesta = funcion(comando)
+    acciones = planificar(comando, _detectar_clausula)
+    if acciones:
+        return _procesar_varias(acciones)
+    deteccion = registro.detectar(comando)
+    if deteccion:
+        habilidad, slots = deteccion
+        if habilidad.nombre == "Salida":
+            return "¡Hasta luego! Fue un placer ayudarte.", False
+        # Los errores quedan registrados en el log y en las métricas del registro
+        respuesta = registro.ejecutar(habilidad, slots)
+        if respuesta:
+            return respuesta, True
+    else:
+        clasificacion = _clasificar_local(comando)
+        if clasificacion:
+            if clasificacion.respuesta:
+                return clasificacion.respuesta, True
+            respuesta = registro.ejecutar(registro.obtener(clasificacion.habilidad), clasificacion.slots)
             if respuesta:
                 return respuesta, True
-        except Exception:
-            continue
     try:
         respuesta_ia = generar_respuesta(comando)
         return respuesta_ia, True
@@ -245,7 +451,7 @@ def modo_terminal():
                 break
     print("\n👋 ¡Hasta pronto!")
 
-def test_sistema():
+def test_sistema(fuente=None):
     print("=" * 60)
     print("🧪 TEST DE SISTEMA")
     print("=" * 60)
@@ -255,14 +461,27 @@ def test_sistema():
     print("✅ Test completado")
     print("\n2️⃣  Test de reconocimiento de voz...")
     print("   (Di algo en 5 segundos)")
-    comando = escuchar()
-    if comando:
+    r = crear_reconocedor()
+    inicio = time.perf_counter()
+    audio = capturar_audio(r, fuente)
+    t_captura = time.perf_counter() - inicio
+    comando = None
+    t_reconocimiento = 0.0
+    if audio is not None and audio != "ERROR_MIC":
+        inicio = time.perf_counter()
+        comando = reconocer_audio(audio, r)
+        t_reconocimiento = time.perf_counter() - inicio
+    if comando and comando != "ERROR_MIC":
         print(f"✅ Reconocido: {comando}")
     else:
         print("⚠️  No se detectó voz")
+    print(f"   ⏱️  Captura {t_captura * 1000:.0f} ms · reconocimiento {t_reconocimiento * 1000:.0f} ms")
     print("\n3️⃣  Test de procesamiento...")
-    respuesta, _ = procesar_comando("hola")
+    inicio = time.perf_counter()
+    respuesta, _ = procesar_comando(comando or "hola")
+    t_proceso = time.perf_counter() - inicio
     print(f"✅ Respuesta: {respuesta[:50]}...")
+    print(f"   ⏱️  Turno completo {(t_captura + t_reconocimiento + t_proceso) * 1000:.0f} ms")
     print("\n" + "=" * 60)
     print("🎉 Tests completados")
     print("=" * 60)
@@ -273,7 +492,12 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Aura - Asistente de IA")
     parser.add_argument("--terminal", action="store_true", help="Ejecutar en modo terminal")
     parser.add_argument("--test", action="store_true", help="Ejecutar tests del sistema")
+    parser.add_argument("--fuente", help="WAV/FLAC o directorio de grabaciones en lugar del micrófono")
+    parser.add_argument("--velocidad", type=float, default=1.0, help="Ritmo de la fuente virtual (0 = sin esperas)")
     args = parser.parse_args()
+    if args.fuente:
+        from src.fuentes_audio import crear_fuente, configurar_fuente_por_defecto
+        configurar_fuente_por_defecto(crear_fuente(args.fuente, velocidad=args.velocidad))
     if args.test:
         test_sistema()
     elif args.terminal:
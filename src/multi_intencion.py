@@ -0,0 +1,176 @@
+"""
+Comandos con varias intenciones - "abre youtube y sube el volumen a 40"
+
+El comando se parte en cláusulas ("y", comas) y cada cláusula se enruta por
+separado. Si todas corresponden a una habilidad, las acciones se ejecutan
+en un pool de hilos: las que comparten recurso (el navegador, el volumen)
+van en orden dentro de una misma cadena, y "luego"/"después" separa etapas
+que esperan a las anteriores. Las respuestas se juntan en el orden dicho.
+"""
+import re
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+from config.settings import MULTI_INTENCION_HILOS
+
+logger = logging.getLogger(__name__)
+
+# "y luego", "después"... obligan a esperar; "y" y las comas no
+_SEPARADOR = re.compile(
+    r"\s*,?\s*\b(?P<etapa>y\s+luego|y\s+despu[eé]s|y\s+entonces|luego|despu[eé]s)\b\s*"
+    r"|\s*,\s*(?:y\s+)?|\s+[ye]\s+"
+)
+
+_pool = None
+
+
+def _obtener_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=MULTI_INTENCION_HILOS, thread_name_prefix="habilidad")
+    return _pool
+
+
+def dividir_clausulas(comando: str) -> List[Tuple[str, bool]]:
+    """
+    Args:
+        comando: Comando del usuario
+
+    Returns:
+        list: [(cláusula, empieza_etapa)]; empieza_etapa es True si la
+            cláusula debe esperar a todo lo anterior ("... y luego ...")
+    """
+    clausulas = []
+    inicio, etapa = 0, False
+    for separador in _SEPARADOR.finditer(comando):
+        clausula = comando[inicio:separador.start()].strip()
+        if clausula:
+            clausulas.append((clausula, etapa))
+            etapa = False
+        etapa = etapa or bool(separador.group("etapa"))
+        inicio = separador.end()
+    resto = comando[inicio:].strip()
+    if resto:
+        clausulas.append((resto, etapa))
+    return clausulas
+
+
+class Accion:
+    """Una cláusula ya enrutada"""
+    __slots__ = ("clausula", "habilidad", "slots", "recurso", "etapa")
+
+    def __init__(self, clausula, habilidad, slots, etapa):
+        self.clausula = clausula
+        self.habilidad = habilidad
+        self.slots = slots
+        self.etapa = etapa
+        self.recurso = habilidad.recurso_de(slots)
+
+    def __repr__(self):
+        return f"Accion({self.clausula!r} → {self.habilidad.nombre}, recurso={self.recurso!r})"
+
+
+def planificar(comando: str, detectar: Callable) -> Optional[List[Accion]]:
+    """
+    Enruta cada cláusula del comando
+
+    Args:
+        comando: Comando del usuario
+        detectar: detectar(cláusula) → (Habilidad, slots, exacta) o None;
+            exacta indica que coincidió un disparador (no el clasificador)
+
+    Returns:
+        list: Acciones en el orden dicho, o None si el comando no tiene
+            varias intenciones reconocibles (se procesa entero como siempre)
+    """
+    clausulas = dividir_clausulas(comando)
+    if len(clausulas) < 2:
+        return None
+    acciones, exactas = [], 0
+    for clausula, etapa in clausulas:
+        deteccion = detectar(clausula)
+        if not deteccion:
+            # "busca tom y jerry": la segunda mitad no es una orden
+            return None
+        habilidad, slots, exacta = deteccion
+        exactas += exacta
+        acciones.append(Accion(clausula, habilidad, slots, etapa))
+    # Al menos una orden con disparador exacto: evita partir preguntas para la IA
+    return acciones if exactas else None
+
+
+def ejecutar_plan(acciones: List[Accion], ejecutar: Callable) -> List[str]:
+    """
+    Ejecuta las acciones: en paralelo salvo las que comparten recurso o
+    esperan a una etapa anterior
+
+    Args:
+        acciones: Resultado de planificar()
+        ejecutar: ejecutar(habilidad, slots) → respuesta
+
+    Returns:
+        list: Respuesta de cada acción en el orden dicho ("" si no respondió)
+    """
+    respuestas = [""] * len(acciones)
+    etapas: List[List[int]] = []
+    for i, accion in enumerate(acciones):
+        if accion.etapa or not etapas:
+            etapas.append([])
+        etapas[-1].append(i)
+
+    def cadena(indices):
+        for i in indices:
+            inicio = time.perf_counter()
+            respuestas[i] = ejecutar(acciones[i].habilidad, acciones[i].slots) or ""
+            logger.debug(f"{acciones[i]} en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+    pool = _obtener_pool()
+    for etapa in etapas:
+        cadenas = {}
+        for i in etapa:
+            # Sin recurso compartido: cadena propia
+            clave = acciones[i].recurso or f"#{i}"
+            cadenas.setdefault(clave, []).append(i)
+        if len(cadenas) == 1:
+            cadena(next(iter(cadenas.values())))
+            continue
+        for futuro in [pool.submit(cadena, indices) for indices in cadenas.values()]:
+            futuro.result()
+    return respuestas
+
+
+# ============== TEST ==============
+if __name__ == "__main__":
+    from src.registro_habilidades import registro
+
+    def detectar(clausula):
+        deteccion = registro.detectar(clausula, contar=False)
+        return (deteccion[0], deteccion[1], True) if deteccion else None
+
+    def ejecutar_simulado(habilidad, slots):
+        time.sleep(0.3)
+        return f"[{habilidad.nombre}]"
+
+    comandos = [
+        "abre youtube y sube el volumen a 40",
+        "abre firefox y busca el clima",
+        "pon el volumen al 20, abre github y luego abre la calculadora",
+        "busca tom y jerry",
+        "qué diferencia hay entre un virus y una bacteria",
+    ]
+    print("=" * 60)
+    print("🧪 COMANDOS CON VARIAS INTENCIONES (cada acción simulada tarda 300 ms)")
+    print("=" * 60)
+    for comando in comandos:
+        plan = planificar(comando, detectar)
+        print(f"\n💬 {comando}")
+        if not plan:
+            print("   → una sola intención (procesamiento normal)")
+            continue
+        for accion in plan:
+            print(f"   {'⏸ ' if accion.etapa else '  '}{accion}")
+        inicio = time.perf_counter()
+        respuestas = ejecutar_plan(plan, ejecutar_simulado)
+        print(f"   → {' '.join(respuestas)} en {(time.perf_counter() - inicio) * 1000:.0f} ms")
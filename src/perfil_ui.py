@@ -0,0 +1,299 @@
+"""
+Perfilado de la interfaz - Tiempo por cuadro, pintado por widget y retraso del bucle
+
+Con `python run.py --profile-ui` se mide, sin tocar el código de los widgets:
+
+- Cuadros: cada UpdateRequest de la ventana (Qt repinta y vuelca todo lo
+  pendiente) se procesa desde el filtro de eventos y se cronometra.
+- Pintado por widget: los paintEvent decorados con medir_pintado (reloj de
+  animaciones) avisan al perfil con el widget y la duración.
+- Retraso del bucle de eventos: un temporizador de 16 ms anota cuánto tarde
+  llega cada tick.
+- FPS: cuadros en el último segundo.
+
+Todo va a histogramas rodantes (últimas N muestras en cubetas logarítmicas),
+así que los percentiles cuestan lo mismo con una sesión de horas. Con
+`--profile-overlay` se muestran en una capa sobre la ventana.
+"""
+import math
+import time
+import logging
+from collections import deque
+from typing import Dict, List
+
+from PySide6.QtCore import QObject, QEvent, QTimer, Qt, QRect
+from PySide6.QtGui import QPainter, QColor, QFont, QFontMetrics
+from PySide6.QtWidgets import QWidget
+
+from src.reloj_animacion import obtener_reloj
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_RETRASO_MS = 16       # Sonda del bucle de eventos (un cuadro a 60 FPS)
+INTERVALO_RESUMEN_S = 30.0      # Cada cuánto se escribe el resumen en el log
+INTERVALO_CAPA_MS = 500
+
+
+# ============== HISTOGRAMA ==============
+class HistogramaRodante:
+    """Últimas muestras en cubetas logarítmicas: percentiles sin ordenar nada"""
+    CUBETAS_POR_DECADA = 20       # ~12 % de resolución
+    MINIMO_MS = 0.01
+    DECADAS = 6                   # 0.01 ms … 10 s
+
+    def __init__(self, capacidad: int = 2000):
+        self.capacidad = capacidad
+        self._cubetas = [0] * (self.CUBETAS_POR_DECADA * self.DECADAS + 1)
+        self._muestras = deque()      # (valor, cubeta)
+        self._suma = 0.0
+        self.total = 0                # Muestras desde el inicio (no solo la ventana)
+
+    def _cubeta(self, valor: float) -> int:
+        if valor <= self.MINIMO_MS:
+            return 0
+        indice = int(math.log10(valor / self.MINIMO_MS) * self.CUBETAS_POR_DECADA) + 1
+        return min(indice, len(self._cubetas) - 1)
+
+    def agregar(self, valor_ms: float):
+        cubeta = self._cubeta(valor_ms)
+        self._muestras.append((valor_ms, cubeta))
+        self._cubetas[cubeta] += 1
+        self._suma += valor_ms
+        self.total += 1
+        if len(self._muestras) > self.capacidad:
+            viejo, cubeta_vieja = self._muestras.popleft()
+            self._cubetas[cubeta_vieja] -= 1
+            self._suma -= viejo
+
+    def __len__(self):
+        return len(self._muestras)
+
+    def percentil(self, p: float) -> float:
+        """
+        Args:
+            p: Percentil (0-100)
+
+        Returns:
+            float: Valor aproximado en ms (centro geométrico de la cubeta)
+        """
+        n = len(self._muestras)
+        if not n:
+            return 0.0
+        objetivo = max(1, math.ceil(n * p / 100))
+        acumulado = 0
+        for indice, cuenta in enumerate(self._cubetas):
+            acumulado += cuenta
+            if acumulado >= objetivo:
+                if indice == 0:
+                    return self.MINIMO_MS
+                return self.MINIMO_MS * 10 ** ((indice - 0.5) / self.CUBETAS_POR_DECADA)
+        return self.maximo()
+
+    def media(self) -> float:
+        return self._suma / len(self._muestras) if self._muestras else 0.0
+
+    def maximo(self) -> float:
+        return max(valor for valor, _ in self._muestras) if self._muestras else 0.0
+
+    def limpiar(self):
+        self._cubetas = [0] * len(self._cubetas)
+        self._muestras.clear()
+        self._suma = 0.0
+        self.total = 0
+
+    def resumen(self) -> Dict[str, float]:
+        return {
+            "n": len(self._muestras), "p50": self.percentil(50), "p99": self.percentil(99),
+            "media": self.media(), "max": self.maximo(),
+        }
+
+
+# ============== PERFIL ==============
+class PerfilUI(QObject):
+    """Mide cuadros, pintado por widget y retraso del bucle de eventos"""
+
+    def __init__(self, capacidad: int = 2000, parent=None):
+        super().__init__(parent)
+        self.capacidad = capacidad
+        self.cuadros = HistogramaRodante(capacidad)
+        self.retraso = HistogramaRodante(capacidad)
+        self.pintado: Dict[str, HistogramaRodante] = {}
+        self._marcas_cuadros = deque()       # Instantes de los cuadros del último segundo
+        self._capas: List["CapaPerfil"] = []
+        self._ultimo_tick = 0.0
+        self._sonda = QTimer(self)
+        self._sonda.setTimerType(Qt.TimerType.PreciseTimer)
+        self._sonda.timeout.connect(self._medir_retraso)
+        self._timer_resumen = QTimer(self)
+        self._timer_resumen.timeout.connect(self.registrar_resumen)
+        obtener_reloj().observador_pintado = self._registrar_pintado
+
+    def iniciar(self):
+        self._ultimo_tick = 0.0
+        self._sonda.start(INTERVALO_RETRASO_MS)
+        self._timer_resumen.start(int(INTERVALO_RESUMEN_S * 1000))
+        logger.info("⏱️ Perfilado de la interfaz activo")
+
+    def detener(self):
+        self._sonda.stop()
+        self._timer_resumen.stop()
+        if obtener_reloj().observador_pintado == self._registrar_pintado:
+            obtener_reloj().observador_pintado = None
+
+    def observar(self, ventana: QWidget, capa: bool = False):
+        """
+        Cronometra los cuadros de una ventana
+
+        Args:
+            ventana: Ventana de primer nivel
+            capa: Mostrar las métricas sobre la ventana
+        """
+        ventana.installEventFilter(self)
+        if capa:
+            self._capas.append(CapaPerfil(self, ventana))
+
+    def limpiar(self):
+        """Vacía los histogramas (entre escenarios de un benchmark)"""
+        self.cuadros.limpiar()
+        self.retraso.limpiar()
+        self.pintado.clear()
+        self._marcas_cuadros.clear()
+        self._ultimo_tick = 0.0
+
+    # ---------- medición ----------
+    def eventFilter(self, objeto, evento):
+        if evento.type() == QEvent.Type.UpdateRequest:
+            # Qt sincroniza aquí la ventana: repinta todo lo pendiente y lo vuelca
+            inicio = time.perf_counter()
+            objeto.event(evento)
+            fin = time.perf_counter()
+            self.cuadros.agregar((fin - inicio) * 1000)
+            self._marcas_cuadros.append(fin)
+            return True
+        return False
+
+    def _registrar_pintado(self, widget, segundos):
+        nombre = type(widget).__name__ if widget is not None else "?"
+        histograma = self.pintado.get(nombre)
+        if histograma is None:
+            histograma = self.pintado[nombre] = HistogramaRodante(self.capacidad)
+        histograma.agregar(segundos * 1000)
+
+    def _medir_retraso(self):
+        ahora = time.perf_counter()
+        if self._ultimo_tick:
+            self.retraso.agregar(max(0.0, (ahora - self._ultimo_tick) * 1000 - INTERVALO_RETRASO_MS))
+        self._ultimo_tick = ahora
+
+    def fps(self) -> float:
+        """Cuadros en el último segundo"""
+        limite = time.perf_counter() - 1.0
+        while self._marcas_cuadros and self._marcas_cuadros[0] < limite:
+            self._marcas_cuadros.popleft()
+        return float(len(self._marcas_cuadros))
+
+    # ---------- resultados ----------
+    def resumen(self) -> Dict:
+        """
+        Returns:
+            dict: fps, cuadro_ms y retraso_ms ({n, p50, p99, media, max}) y
+                pintado_ms por clase de widget
+        """
+        return {
+            "fps": self.fps(),
+            "cuadro_ms": self.cuadros.resumen(),
+            "retraso_ms": self.retraso.resumen(),
+            "pintado_ms": {nombre: h.resumen() for nombre, h in self.pintado.items()},
+        }
+
+    def widgets_mas_lentos(self, n: int = 3):
+        """[(clase, p99 ms)] de los widgets con el pintado más caro"""
+        ranking = sorted(((h.percentil(99), nombre) for nombre, h in self.pintado.items() if len(h)), reverse=True)
+        return [(nombre, p99) for p99, nombre in ranking[:n]]
+
+    def registrar_resumen(self):
+        datos = self.resumen()
+        cuadro, retraso = datos["cuadro_ms"], datos["retraso_ms"]
+        lentos = ", ".join(f"{nombre} {p99:.2f}" for nombre, p99 in self.widgets_mas_lentos())
+        logger.info(
+            f"⏱️ Interfaz: {datos['fps']:.0f} FPS, cuadro p50 {cuadro['p50']:.2f} / p99 {cuadro['p99']:.2f} ms, "
+            f"retraso del bucle p99 {retraso['p99']:.1f} ms, pintado p99: {lentos or '-'}"
+        )
+
+
+# ============== CAPA EN PANTALLA ==============
+class CapaPerfil(QWidget):
+    """Métricas del perfil arriba en el centro (los títulos van a la izquierda y VOLVER a la derecha)"""
+    ANCHO = 300
+
+    def __init__(self, perfil: PerfilUI, ventana: QWidget):
+        super().__init__(ventana)
+        self.perfil = perfil
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.fuente = QFont("Monospace", 8)
+        self.fuente.setStyleHint(QFont.StyleHint.TypeWriter)
+        self.alto_linea = QFontMetrics(self.fuente).height()
+        self.lineas: List[str] = []
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.actualizar)
+        self._timer.start(INTERVALO_CAPA_MS)
+        ventana.installEventFilter(self)
+        self._colocar()
+
+    def _colocar(self):
+        ventana = self.parentWidget()
+        alto = self.alto_linea * max(len(self.lineas), 1) + 12
+        self.setGeometry((ventana.width() - self.ANCHO) // 2, 8, self.ANCHO, alto)
+        # Las pantallas del selector se crean encima: volver a ponerse delante
+        self.raise_()
+
+    def eventFilter(self, objeto, evento):
+        if evento.type() == QEvent.Type.Resize:
+            self._colocar()
+        return False
+
+    def actualizar(self):
+        datos = self.perfil.resumen()
+        cuadro, retraso = datos["cuadro_ms"], datos["retraso_ms"]
+        self.lineas = [
+            f"FPS {datos['fps']:5.0f}",
+            f"cuadro  p50 {cuadro['p50']:6.2f}  p99 {cuadro['p99']:6.2f} ms",
+            f"retraso p50 {retraso['p50']:6.2f}  p99 {retraso['p99']:6.2f} ms",
+        ] + [f"{nombre[:20]:20} p99 {p99:6.2f} ms" for nombre, p99 in self.perfil.widgets_mas_lentos()]
+        self._colocar()
+        self.show()
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(0, 0, 0, 170))
+        painter.setFont(self.fuente)
+        painter.setPen(QColor("#00ff9c"))
+        for i, linea in enumerate(self.lineas):
+            painter.drawText(QRect(6, 6 + i * self.alto_linea, self.ANCHO - 12, self.alto_linea),
+                             int(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter), linea)
+
+
+# ============== TEST ==============
+if __name__ == "__main__":
+    import random
+
+    histograma = HistogramaRodante(capacidad=1000)
+    valores = [random.lognormvariate(0, 0.8) for _ in range(5000)]
+    for valor in valores:
+        histograma.agregar(valor)
+    ventana = sorted(valores[-1000:])
+    print("=" * 60)
+    print("⏱️ HISTOGRAMA RODANTE")
+    print("=" * 60)
+    for p in (50, 90, 99):
+        exacto = ventana[math.ceil(len(ventana) * p / 100) - 1]
+        print(f"   p{p}: {histograma.percentil(p):.3f} ms (exacto {exacto:.3f} ms)")
+    inicio = time.perf_counter()
+    for valor in valores * 20:
+        histograma.agregar(valor)
+    print(f"   agregar: {(time.perf_counter() - inicio) * 1e6 / (len(valores) * 20):.2f} µs por muestra")
+    inicio = time.perf_counter()
+    for _ in range(1000):
+        histograma.percentil(99)
+    print(f"   percentil: {(time.perf_counter() - inicio) * 1000:.3f} µs por consulta")
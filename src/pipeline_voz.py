@@ -0,0 +1,514 @@
+"""
+Pipeline de voz - Etapas concurrentes conectadas por colas
+
+captura → reconocimiento → procesamiento → síntesis → reproducción
+
+Cada etapa corre en su propio hilo, de modo que la siguiente frase se
+puede capturar y reconocer mientras la respuesta anterior todavía se
+genera o se reproduce. Cada etapa expone la profundidad de su cola y su
+latencia media.
+"""
+import os
+import time
+import logging
+import tempfile
+import threading
+import subprocess
+from collections import deque
+from pathlib import Path
+from queue import Queue, Empty, Full
+from typing import Any, Callable, Dict, Optional
+
+from config.settings import (
+    PIPELINE_COLA_MAX, PIPELINE_ESCUCHA_DURANTE_REPRODUCCION, ESPECULACION_ACTIVA,
+    BARGE_IN_ACTIVO
+)
+from src.main import (
+    crear_reconocedor, capturar_audio, reconocer_audio,
+    sintetizar_voz, comando_reproductor, limpiar_para_tts
+)
+from src.especulacion import EjecutorEspeculativo
+from src.clasificador_intenciones import metricas_clasificador
+from src.fuentes_audio import (
+    FuenteAudio, fuente_por_defecto_en_vivo, obtener_fuente_por_defecto
+)
+from src.barge_in import (
+    barge_in_disponible, decodificar_audio, reproducir_con_referencia,
+    ReferenciaReproduccion, MonitorBargeIn
+)
+
+logger = logging.getLogger(__name__)
+
+# Centinela para terminar el hilo de una etapa
+_FIN = object()
+
+# Orden de las etapas (también es el orden en que se muestran las métricas)
+ETAPAS = ("captura", "reconocimiento", "procesamiento", "sintesis", "reproduccion")
+
+
+# ============== ETAPA GENÉRICA ==============
+class EtapaPipeline:
+    """Etapa del pipeline: un hilo que consume su cola y alimenta la siguiente"""
+
+    def __init__(self, nombre: str, funcion: Callable[[Any], Any], tam_cola: int = PIPELINE_COLA_MAX):
+        """
+        Args:
+            nombre: Nombre de la etapa (para métricas y logs)
+            funcion: Procesa un elemento; si retorna None no se propaga nada
+            tam_cola: Tamaño máximo de la cola de entrada
+        """
+        self.nombre = nombre
+        self.funcion = funcion
+        self.siguiente: Optional["EtapaPipeline"] = None
+        self.cola = Queue(maxsize=tam_cola)
+        self._activa = threading.Event()
+        self._hilo = None
+        self._ocupada = False
+        self._procesados = 0
+        self._latencias = deque(maxlen=50)  # segundos dentro de funcion()
+        self._esperas = deque(maxlen=50)    # segundos en la cola
+
+    def iniciar(self):
+        self._activa.set()
+        self._hilo = threading.Thread(target=self._bucle, name=f"voz-{self.nombre}", daemon=True)
+        self._hilo.start()
+
+    def enviar(self, item) -> bool:
+        """
+        Encola un elemento; bloquea mientras la cola esté llena
+
+        Returns:
+            bool: False si la etapa se detuvo antes de poder encolar
+        """
+        while self._activa.is_set():
+            try:
+                self.cola.put((time.perf_counter(), item), timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def vaciar(self) -> list:
+        """Descarta los elementos pendientes y los retorna"""
+        descartados = []
+        while True:
+            try:
+                _, item = self.cola.get_nowait()
+            except Empty:
+                return descartados
+            if item is not _FIN:
+                descartados.append(item)
+
+    def detener(self, timeout: float = 1.0):
+        self._activa.clear()
+        try:
+            self.cola.put_nowait((time.perf_counter(), _FIN))
+        except Full:
+            pass
+        if self._hilo and self._hilo is not threading.current_thread():
+            self._hilo.join(timeout)
+
+    def _bucle(self):
+        while self._activa.is_set():
+            try:
+                encolado, item = self.cola.get(timeout=0.1)
+            except Empty:
+                continue
+            if item is _FIN:
+                break
+            self._ejecutar(item, encolado)
+
+    def _ejecutar(self, item, encolado):
+        inicio = time.perf_counter()
+        self._ocupada = True
+        try:
+            resultado = self.funcion(item)
+        except Exception as e:
+            logger.exception(f"Error en etapa '{self.nombre}': {e}")
+            resultado = None
+        finally:
+            self._ocupada = False
+        self._esperas.append(inicio - encolado)
+        self._latencias.append(time.perf_counter() - inicio)
+        self._procesados += 1
+        if resultado is not None and self.siguiente is not None:
+            self.siguiente.enviar(resultado)
+
+    def metricas(self) -> Dict[str, Any]:
+        """
+        Returns:
+            dict: cola, ocupada, procesados, latencia_ms y espera_ms medias
+        """
+        latencias = list(self._latencias)
+        esperas = list(self._esperas)
+        return {
+            "cola": self.cola.qsize(),
+            "ocupada": self._ocupada,
+            "procesados": self._procesados,
+            "latencia_ms": 1000 * sum(latencias) / len(latencias) if latencias else 0.0,
+            "espera_ms": 1000 * sum(esperas) / len(esperas) if esperas else 0.0,
+        }
+
+
+class EtapaCaptura(EtapaPipeline):
+    """Etapa productora: captura frases del micrófono sin cola de entrada"""
+
+    def __init__(self, funcion: Callable[[], Any], pausada: Callable[[], bool]):
+        super().__init__("captura", funcion)
+        self.pausada = pausada
+
+    def _bucle(self):
+        while self._activa.is_set():
+            if self.pausada():
+                time.sleep(0.05)
+                continue
+            self._ejecutar(None, time.perf_counter())
+
+
+# ============== PIPELINE ==============
+class PipelineVoz:
+    """Sesión de voz continua con etapas concurrentes"""
+
+    def __init__(
+        self,
+        procesar: Callable[[str], tuple],
+        limpiar: Callable[[str], str] = limpiar_para_tts,
+        pausar_captura: Callable[[], bool] = lambda: False,
+        on_transcripcion: Callable[[str], None] = lambda texto: None,
+        on_respuesta: Callable[[str], None] = lambda texto: None,
+        on_estado: Callable[[str], None] = lambda texto: None,
+        on_error: Callable[[str], None] = lambda texto: None,
+        on_fin: Callable[[], None] = lambda: None,
+        escuchar_durante_reproduccion: bool = PIPELINE_ESCUCHA_DURANTE_REPRODUCCION,
+        especular: bool = ESPECULACION_ACTIVA,
+        barge_in: bool = BARGE_IN_ACTIVO,
+        fuente: Optional[FuenteAudio] = None,
+    ):
+        """
+        Args:
+            procesar: Función comando → (respuesta, continuar), p. ej. procesar_comando
+            limpiar: Limpieza del texto antes de sintetizarlo
+            pausar_captura: Condición externa para no escuchar (p. ej. saludo en curso)
+            on_transcripcion: Se llama con cada frase reconocida
+            on_respuesta: Se llama con cada respuesta generada
+            on_estado: Se llama con mensajes de estado para la interfaz
+            on_error: Se llama si el micrófono o el reconocimiento fallan
+            on_fin: Se llama cuando termina de reproducirse la despedida
+            escuchar_durante_reproduccion: Mantener la captura activa mientras Aurora habla
+            especular: Procesar por adelantado las transcripciones parciales estables
+            barge_in: Escuchar durante la reproducción con supresión de eco y
+                cortarla en cuanto el usuario hable (solo con micrófono físico)
+            fuente: Fuente de audio de la captura; None = la fuente por defecto
+        """
+        self.procesar = procesar
+        self.limpiar = limpiar
+        self.pausar_captura = pausar_captura
+        self.on_transcripcion = on_transcripcion
+        self.on_respuesta = on_respuesta
+        self.on_estado = on_estado
+        self.on_error = on_error
+        self.on_fin = on_fin
+        self.escuchar_durante_reproduccion = escuchar_durante_reproduccion
+        self.fuente = fuente
+
+        self.activo = False
+        self._recognizer = crear_reconocedor()
+        self._calibrado = False
+        self.especulador = EjecutorEspeculativo() if especular else None
+        en_vivo = fuente.en_vivo if fuente is not None else fuente_por_defecto_en_vivo()
+        self.barge_in = barge_in and en_vivo and barge_in_disponible()
+        if barge_in and en_vivo and not self.barge_in:
+            logger.warning("Barge-in no disponible: requiere numpy, pyaudio y ffmpeg o mpg123")
+        self._monitor = None
+        self._barge_ins = 0
+        self._reproduciendo = threading.Event()
+        self._detener_reproduccion = threading.Event()
+        self._proceso = None
+        self._lock = threading.Lock()
+        # Frases en curso entre la captura y el fin de su reproducción; sin
+        # escucha durante la reproducción no se vuelve a escuchar hasta que
+        # llegue a 0 (si no, el micrófono grabaría la respuesta de Aurora)
+        self._turnos = 0
+
+        self.etapas = {
+            "captura": EtapaCaptura(self._capturar, self._captura_pausada),
+            "reconocimiento": EtapaPipeline("reconocimiento", self._en_turno(self._reconocer)),
+            "procesamiento": EtapaPipeline("procesamiento", self._en_turno(self._procesar)),
+            "sintesis": EtapaPipeline("sintesis", self._en_turno(self._sintetizar)),
+            "reproduccion": EtapaPipeline("reproduccion", self._en_turno(self._reproducir)),
+        }
+        for actual, siguiente in zip(ETAPAS, ETAPAS[1:]):
+            self.etapas[actual].siguiente = self.etapas[siguiente]
+
+    # ---------- ciclo de vida ----------
+    def iniciar(self):
+        self.activo = True
+        for nombre in reversed(ETAPAS):
+            self.etapas[nombre].iniciar()
+        logger.info("Pipeline de voz iniciado")
+
+    def detener(self):
+        """Detiene todas las etapas y corta la reproducción en curso"""
+        self.activo = False
+        self.interrumpir()
+        for nombre in ETAPAS:
+            etapa = self.etapas[nombre]
+            # La captura puede estar bloqueada en listen(); no se espera por ella
+            etapa.detener(timeout=0 if nombre == "captura" else 1.0)
+        for ruta, *_ in self.etapas["reproduccion"].vaciar():
+            _borrar(ruta)
+        with self._lock:
+            self._turnos = 0
+        if self._monitor:
+            self._monitor.detener()
+        if self.especulador:
+            self.especulador.cerrar()
+        logger.info("Pipeline de voz detenido")
+
+    def interrumpir(self):
+        """Corta la respuesta en reproducción y descarta el audio pendiente"""
+        for ruta, *_ in self.etapas["reproduccion"].vaciar():
+            _borrar(ruta)
+            self._terminar_turno()
+        self._detener_reproduccion.set()
+        with self._lock:
+            if self._proceso and self._proceso.poll() is None:
+                try:
+                    self._proceso.terminate()
+                except Exception:
+                    pass
+
+    def reproduciendo(self) -> bool:
+        return self._reproduciendo.is_set()
+
+    def metricas(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns:
+            dict: Métricas por etapa en orden de pipeline, más "especulacion",
+                "barge_in" y "clasificador" si están activos
+        """
+        metricas = {nombre: self.etapas[nombre].metricas() for nombre in ETAPAS}
+        if self.especulador:
+            metricas["especulacion"] = self.especulador.metricas()
+        if self.barge_in:
+            metricas["barge_in"] = {"interrupciones": self._barge_ins}
+        clasificador = metricas_clasificador()
+        if clasificador:
+            metricas["clasificador"] = clasificador
+        return metricas
+
+    # ---------- turnos ----------
+    def _empezar_turno(self):
+        with self._lock:
+            self._turnos += 1
+
+    def _terminar_turno(self):
+        with self._lock:
+            self._turnos = max(0, self._turnos - 1)
+
+    def _en_turno(self, funcion):
+        """La frase termina su turno en la etapa que no pasa nada a la siguiente (descarte, error o fin)"""
+        def etapa(item):
+            resultado = None
+            try:
+                resultado = funcion(item)
+                return resultado
+            finally:
+                if resultado is None:
+                    self._terminar_turno()
+        return etapa
+
+    # ---------- etapas ----------
+    def _captura_pausada(self) -> bool:
+        if self.pausar_captura():
+            return True
+        if self._turnos and not self.escuchar_durante_reproduccion:
+            # Una frase aún se reconoce, procesa o reproduce
+            return True
+        if self._monitor and self._monitor.is_alive():
+            # El monitor de barge-in tiene el micrófono
+            return True
+        return self.reproduciendo() and not self.escuchar_durante_reproduccion
+
+    def _capturar(self, _):
+        if not self.activo:
+            time.sleep(0.1)
+            return None
+        if self.fuente is None:
+            # Una sola fuente para toda la sesión: conserva el estado del preprocesado
+            try:
+                self.fuente = obtener_fuente_por_defecto()
+            except Exception as e:
+                logger.error(f"No se pudo abrir la fuente de audio: {e}")
+                self._fallo("❌ Error de micrófono")
+                return None
+        self.on_estado("🎤 Escuchando...")
+        frase = self.especulador.nueva_frase() if self.especulador else None
+        audio = capturar_audio(
+            self._recognizer,
+            fuente=self.fuente,
+            calibrar=not self._calibrado,
+            detener_tts=False,
+            on_parcial=frase.enviar_audio_parcial if frase else None
+        )
+        self._calibrado = True
+        if audio == "ERROR_MIC":
+            self._fallo("❌ Error de micrófono")
+            return None
+        if audio is None:
+            if frase:
+                frase.cancelar()
+            return None
+        self._empezar_turno()
+        return audio, frase
+
+    def _reconocer(self, item):
+        audio, frase = item
+        comando = reconocer_audio(audio, self._recognizer)
+        especulada = frase.confirmar(comando) if frase else None
+        if comando == "ERROR_MIC":
+            self._fallo("❌ Error de reconocimiento")
+            return None
+        if not comando:
+            return None
+        # Una frase nueva deja obsoleta la respuesta que se está diciendo
+        if self.reproduciendo():
+            self.interrumpir()
+        self.on_transcripcion(comando)
+        return comando, especulada
+
+    def _procesar(self, item):
+        comando, especulada = item
+        self.on_estado("🧠 Procesando...")
+        # La consulta adelantada se espera aquí, no en el reconocimiento
+        respuesta = especulada.result() if especulada is not None else None
+        if respuesta is not None:
+            continuar = True
+        else:
+            respuesta, continuar = self.procesar(comando)
+        if not respuesta:
+            return None
+        self.on_respuesta(respuesta)
+        return respuesta, continuar
+
+    def _sintetizar(self, item):
+        respuesta, continuar = item
+        descriptor, ruta = tempfile.mkstemp(prefix="aura_", suffix=".mp3")
+        os.close(descriptor)
+        try:
+            sintetizar_voz(self.limpiar(respuesta), ruta)
+        except Exception:
+            _borrar(ruta)
+            raise
+        # Con barge-in se decodifica aquí para tener la señal de referencia lista
+        pcm = decodificar_audio(ruta) if self.barge_in else None
+        return Path(ruta), continuar, pcm
+
+    def _reproducir(self, item):
+        ruta, continuar, pcm = item
+        self._detener_reproduccion.clear()
+        self._reproduciendo.set()
+        self.on_estado("💬 Respondiendo...")
+        try:
+            if pcm is not None:
+                self._reproducir_con_barge_in(pcm)
+            else:
+                self._reproducir_archivo(ruta)
+        finally:
+            self._reproduciendo.clear()
+            _borrar(ruta)
+        if not continuar:
+            self.activo = False
+            self.on_fin()
+        return None
+
+    def _reproducir_archivo(self, ruta):
+        cmd = comando_reproductor(ruta)
+        if cmd is None:
+            logger.error("No audio player found")
+            return
+        try:
+            with self._lock:
+                self._proceso = subprocess.Popen(
+                    cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                )
+            while self._proceso.poll() is None:
+                if self._detener_reproduccion.wait(0.05):
+                    break
+        finally:
+            with self._lock:
+                if self._proceso and self._proceso.poll() is None:
+                    self._proceso.terminate()
+                self._proceso = None
+
+    def _reproducir_con_barge_in(self, pcm):
+        referencia = ReferenciaReproduccion(pcm)
+        self._monitor = MonitorBargeIn(
+            referencia,
+            on_interrupcion=self._interrupcion_detectada,
+            on_frase=self._frase_interruptora,
+        )
+        self._monitor.start()
+        try:
+            reproducir_con_referencia(pcm, referencia, self._detener_reproduccion)
+        except Exception as e:
+            logger.error(f"Error reproduciendo con barge-in: {e}")
+        finally:
+            # Si nadie interrumpió, el monitor ya no hace falta
+            self._monitor.detener()
+
+    def _interrupcion_detectada(self):
+        self._barge_ins += 1
+        self.interrumpir()
+        self.on_estado("🎤 Te escucho...")
+
+    def _frase_interruptora(self, audio):
+        # La frase va directa a reconocimiento, sin pasar por la captura
+        self._empezar_turno()
+        if not self.etapas["reconocimiento"].enviar((audio, None)):
+            self._terminar_turno()
+
+    def _fallo(self, mensaje):
+        self.activo = False
+        self.on_estado(mensaje)
+        self.on_error(mensaje)
+
+
+# ============== UTILIDADES ==============
+def _borrar(ruta):
+    try:
+        Path(ruta).unlink()
+    except Exception:
+        pass
+
+
+def formatear_metricas(metricas: Dict[str, Dict[str, Any]]) -> str:
+    """
+    Resume las métricas del pipeline en una línea legible
+
+    Args:
+        metricas: Resultado de PipelineVoz.metricas()
+
+    Returns:
+        str: Ej. "captura 0 · reconocimiento 1 (820 ms) · ..."
+    """
+    partes = []
+    for nombre, datos in metricas.items():
+        if nombre == "barge_in":
+            partes.append(f"barge-in {datos['interrupciones']}")
+            continue
+        if nombre == "clasificador":
+            if datos["consultas"]:
+                partes.append(f"local {datos['tasa_desvio']:.0%}")
+            continue
+        if nombre == "especulacion":
+            partes.append(
+                f"especulación {datos['aciertos']}/{datos['aciertos'] + datos['fallos']}"
+                f" (-{datos['ahorro_medio_ms']:.0f} ms)"
+            )
+            continue
+        texto = f"{nombre} {datos['cola']}"
+        if datos["procesados"]:
+            texto += f" ({datos['latencia_ms']:.0f} ms)"
+        partes.append(texto)
+    return " · ".join(partes)
@@ -0,0 +1,262 @@
+"""
+Pool de navegadores - Drivers de Selenium reutilizables
+
+Arrancar un driver cuesta segundos (resolver geckodriver, lanzar Firefox),
+así que se arrancan solo cuando hacen falta y se reutilizan: cada URL nueva
+se abre en la pestaña en blanco o en una pestaña nueva del mismo navegador.
+Antes de reutilizar un driver que llevaba tiempo inactivo se comprueba que
+el navegador sigue vivo (el usuario pudo cerrarlo); al salir se cierran
+todos.
+"""
+import time
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+from config.settings import SELENIUM_POOL_TAMANO, SELENIUM_CHEQUEO_INACTIVO
+
+logger = logging.getLogger(__name__)
+
+
+class _Entrada:
+    __slots__ = ("driver", "libre_desde", "usos")
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.libre_desde = time.monotonic()
+        self.usos = 0
+
+
+# ============== POOL ==============
+class PoolDrivers:
+    """Conjunto pequeño de drivers arrancados bajo demanda"""
+
+    def __init__(self, crear: Callable[[], object], tamano: int = SELENIUM_POOL_TAMANO,
+                 chequeo_inactivo: float = SELENIUM_CHEQUEO_INACTIVO):
+        """
+        Args:
+            crear: Función que arranca un driver (None si falla)
+            tamano: Máximo de drivers vivos a la vez
+            chequeo_inactivo: Segundos de inactividad tras los que se
+                comprueba que el driver sigue vivo antes de usarlo
+        """
+        self.crear = crear
+        self.tamano = max(1, tamano)
+        self.chequeo_inactivo = chequeo_inactivo
+        self._libres: List[_Entrada] = []
+        self._vivos = 0
+        self._condicion = threading.Condition()
+        self._cerrado = False
+        self.estadisticas = {"arranques": 0, "reutilizados": 0, "descartados": 0, "arranque_ms": 0.0}
+
+    @staticmethod
+    def sano(driver) -> bool:
+        """True si el navegador responde; se cambia a otra pestaña si cerraron la actual"""
+        try:
+            pestanas = driver.window_handles
+            if not pestanas:
+                return False
+            try:
+                if driver.current_window_handle in pestanas:
+                    return True
+            except Exception:
+                pass
+            driver.switch_to.window(pestanas[-1])
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _cerrar_driver(driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.debug(f"Error al cerrar un driver: {e}")
+
+    def _tomar(self, espera: float) -> Optional[_Entrada]:
+        limite = time.monotonic() + espera
+        while True:
+            with self._condicion:
+                while True:
+                    if self._cerrado:
+                        return None
+                    if self._libres:
+                        entrada = self._libres.pop()
+                        break
+                    if self._vivos < self.tamano:
+                        self._vivos += 1
+                        entrada = None
+                        break
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        return None
+                    self._condicion.wait(restante)
+            if entrada is None:
+                break
+            # El chequeo habla con el navegador: fuera del lock
+            inactivo = time.monotonic() - entrada.libre_desde
+            if inactivo < self.chequeo_inactivo or self.sano(entrada.driver):
+                with self._condicion:
+                    self.estadisticas["reutilizados"] += 1
+                return entrada
+            # Navegador cerrado por el usuario o colgado
+            logger.info("🧹 Driver inactivo sin respuesta, se descarta")
+            self._descartar(entrada)
+        # Arrancar fuera del lock: tarda segundos
+        inicio = time.perf_counter()
+        driver = None
+        try:
+            driver = self.crear()
+        finally:
+            if driver is None:
+                with self._condicion:
+                    self._vivos -= 1
+                    self._condicion.notify()
+        if driver is None:
+            return None
+        self.estadisticas["arranques"] += 1
+        self.estadisticas["arranque_ms"] = (time.perf_counter() - inicio) * 1000
+        logger.info(f"🚀 Driver arrancado en {self.estadisticas['arranque_ms']:.0f} ms")
+        return _Entrada(driver)
+
+    def _devolver(self, entrada: _Entrada, valido: bool):
+        with self._condicion:
+            if valido and not self._cerrado:
+                entrada.libre_desde = time.monotonic()
+                entrada.usos += 1
+                self._libres.append(entrada)
+                self._condicion.notify()
+                return
+        self._descartar(entrada)
+
+    def _descartar(self, entrada: _Entrada):
+        # Se libera el hueco bajo el lock; quit() (puede tardar segundos) fuera de él
+        with self._condicion:
+            self._vivos -= 1
+            self.estadisticas["descartados"] += 1
+            self._condicion.notify()
+        self._cerrar_driver(entrada.driver)
+
+    @contextmanager
+    def driver(self, espera: float = 30.0):
+        """
+        Presta un driver (None si no se pudo arrancar ni liberar uno a tiempo)
+
+        Si el bloque lanza una excepción el driver se descarta.
+        """
+        entrada = self._tomar(espera)
+        if entrada is None:
+            yield None
+            return
+        valido = False
+        try:
+            yield entrada.driver
+            valido = True
+        finally:
+            self._devolver(entrada, valido)
+
+    def abrir(self, url: str) -> bool:
+        """
+        Abre la URL en la pestaña en blanco o en una pestaña nueva
+
+        Returns:
+            bool: True si se abrió con un driver del pool
+        """
+        for _ in range(2):  # Un reintento si el navegador murió entre el chequeo y el uso
+            try:
+                with self.driver() as driver:
+                    if driver is None:
+                        return False
+                    if driver.current_url not in ("about:blank", "about:home", "about:newtab"):
+                        driver.switch_to.new_window("tab")
+                    driver.get(url)
+                    return True
+            except Exception as e:
+                logger.warning(f"El driver falló al abrir {url}: {e}")
+        return False
+
+    def cerrar(self):
+        """Cierra todos los drivers libres; los prestados se cierran al devolverse"""
+        with self._condicion:
+            self._cerrado = True
+            libres, self._libres = self._libres, []
+            self._vivos -= len(libres)
+            self._condicion.notify_all()
+        for entrada in libres:
+            self._cerrar_driver(entrada.driver)
+        if libres:
+            logger.info(f"🛑 {len(libres)} drivers de Selenium cerrados")
+
+
+_pool = None
+_lock = threading.Lock()
+
+
+def obtener_pool(crear: Callable[[], object]) -> PoolDrivers:
+    """Pool compartido; se cierra automáticamente al salir del programa"""
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = PoolDrivers(crear)
+            atexit.register(_pool.cerrar)
+    return _pool
+
+
+# ============== TEST ==============
+if __name__ == "__main__":
+    class DriverFalso:
+        """Simula un driver: arrancar tarda y a veces el usuario cierra el navegador"""
+
+        def __init__(self):
+            time.sleep(0.5)
+            self.pestanas = ["p0"]
+            self.current_url = "about:blank"
+            self.vivo = True
+
+        @property
+        def window_handles(self):
+            if not self.vivo:
+                raise RuntimeError("navegador cerrado")
+            return self.pestanas
+
+        @property
+        def current_window_handle(self):
+            return self.window_handles[-1]
+
+        @property
+        def switch_to(self):
+            driver = self
+
+            class Cambio:
+                def new_window(self, tipo):
+                    driver.pestanas.append(f"p{len(driver.pestanas)}")
+
+                def window(self, pestana):
+                    pass
+            return Cambio()
+
+        def get(self, url):
+            if not self.vivo:
+                raise RuntimeError("navegador cerrado")
+            self.current_url = url
+
+        def quit(self):
+            self.vivo = False
+
+    logging.basicConfig(level=logging.INFO)
+    pool = PoolDrivers(DriverFalso, tamano=1, chequeo_inactivo=0)
+
+    print("=" * 60)
+    print("🧪 POOL DE DRIVERS (driver simulado, 0.5 s por arranque)")
+    print("=" * 60)
+    for i in range(5):
+        inicio = time.perf_counter()
+        pool.abrir(f"https://ejemplo.com/{i}")
+        print(f"   URL {i}: {(time.perf_counter() - inicio) * 1000:.0f} ms")
+        if i == 2:
+            pool._libres[0].driver.vivo = False  # El usuario cerró el navegador
+            print("   (navegador cerrado por el usuario)")
+    pool.cerrar()
+    print(f"\n📊 {pool.estadisticas}")
@@ -0,0 +1,306 @@
+"""
+Pool de tareas de la interfaz - Trabajo en segundo plano con límites
+
+La interfaz creaba un QThread por mensaje del chat y hilos sueltos para
+escuchar el micrófono o reproducir la voz, sin límite ni forma de pararlos
+al cerrar. Aquí todo va a un pool con carriles separados:
+
+- red:   consultas a la IA (esperan a la red, varias a la vez)
+- audio: micrófono y reproducción (de una en una: no se graba mientras se habla)
+- cpu:   cálculo local (búsquedas, preparación de datos)
+
+Cada carril es un ThreadPoolExecutor con su límite de hilos, así una
+consulta lenta no bloquea al micrófono. Los resultados, errores y avances
+llegan al hilo de la interfaz por una señal de Qt. Cada tarea devuelve un
+manejador para cancelarla: si aún está en cola no llega a ejecutarse; si
+ya corre, la función ve tarea.cancelada y sus callbacks se descartan.
+"""
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+from PySide6.QtCore import QObject, Signal
+
+from config.settings import POOL_HILOS_RED, POOL_HILOS_AUDIO, POOL_HILOS_CPU
+
+logger = logging.getLogger(__name__)
+
+CARRILES = {"red": POOL_HILOS_RED, "audio": POOL_HILOS_AUDIO, "cpu": POOL_HILOS_CPU}
+
+
+class Tarea:
+    """Manejador de una tarea lanzada en el pool"""
+
+    def __init__(self, pool, carril: str, nombre: str, al_terminar, al_fallar, al_avanzar):
+        self._pool = pool
+        self.carril = carril
+        self.nombre = nombre
+        self.futuro = None
+        self._cancelada = threading.Event()
+        self._al_terminar = al_terminar
+        self._al_fallar = al_fallar
+        self._al_avanzar = al_avanzar
+        self.encolada = time.perf_counter()
+
+    @property
+    def cancelada(self) -> bool:
+        return self._cancelada.is_set()
+
+    def cancelar(self):
+        """Si está en cola no se ejecuta; si ya corre, se descartan sus callbacks"""
+        if self._cancelada.is_set():
+            return
+        self._cancelada.set()
+        if self.futuro is not None and self.futuro.cancel():
+            self._pool._contar_cancelada(self, en_cola=True)
+
+    def avanzar(self, valor: Any):
+        """Desde la función de la tarea: envía un resultado parcial a la interfaz"""
+        if not self._cancelada.is_set() and self._al_avanzar is not None:
+            self._pool._puente.avance.emit(self, valor)
+
+    def terminada(self) -> bool:
+        return self.futuro is not None and self.futuro.done()
+
+
+class _Carril:
+    """Un ThreadPoolExecutor y sus contadores"""
+
+    def __init__(self, nombre: str, hilos: int):
+        self.nombre = nombre
+        self.hilos = max(1, hilos)
+        self.ejecutor = ThreadPoolExecutor(max_workers=self.hilos, thread_name_prefix=f"tarea-{nombre}")
+        self.activas = set()
+        self.estadisticas = {
+            "en_cola": 0, "max_en_cola": 0, "ejecutando": 0, "iniciadas": 0, "completadas": 0,
+            "errores": 0, "canceladas": 0, "espera_ms": 0.0, "duracion_ms": 0.0,
+        }
+
+
+class _Puente(QObject):
+    """Lleva resultados y avances de los hilos del pool al hilo de la interfaz"""
+    resultado = Signal(object, object, object)   # tarea, valor, error
+    avance = Signal(object, object)               # tarea, valor
+
+
+# ============== POOL ==============
+class PoolTareas:
+    """Ejecutor con carriles para el trabajo en segundo plano de la interfaz"""
+
+    def __init__(self, carriles: Dict[str, int] = CARRILES):
+        """
+        Args:
+            carriles: nombre del carril → número máximo de hilos
+        """
+        self._carriles = {nombre: _Carril(nombre, hilos) for nombre, hilos in carriles.items()}
+        self._lock = threading.Lock()
+        self._cerrado = False
+        # Creado en el hilo de la interfaz: las señales emitidas desde los hilos
+        # del pool se entregan en cola en ese hilo
+        self._puente = _Puente()
+        self._puente.resultado.connect(self._entregar)
+        self._puente.avance.connect(self._entregar_avance)
+
+    def lanzar(
+        self,
+        carril: str,
+        funcion: Callable[..., Any],
+        *args,
+        al_terminar: Optional[Callable[[Any], None]] = None,
+        al_fallar: Optional[Callable[[Exception], None]] = None,
+        al_avanzar: Optional[Callable[[Any], None]] = None,
+        nombre: str = "",
+    ) -> Tarea:
+        """
+        Ejecuta funcion(tarea, *args) en un hilo del carril
+
+        Args:
+            carril: "red", "audio" o "cpu"
+            funcion: Recibe el manejador de la tarea (para tarea.cancelada y
+                tarea.avanzar()) y los argumentos
+            al_terminar: Callback en el hilo de la interfaz con el resultado
+            al_fallar: Callback en el hilo de la interfaz con la excepción
+            al_avanzar: Callback en el hilo de la interfaz por cada tarea.avanzar()
+            nombre: Nombre para los logs
+
+        Returns:
+            Tarea: Manejador para cancelarla
+        """
+        datos = self._carriles[carril]
+        tarea = Tarea(self, carril, nombre or getattr(funcion, "__name__", "tarea"),
+                      al_terminar, al_fallar, al_avanzar)
+        with self._lock:
+            if self._cerrado:
+                tarea._cancelada.set()
+                return tarea
+            datos.estadisticas["en_cola"] += 1
+            datos.estadisticas["max_en_cola"] = max(datos.estadisticas["max_en_cola"], datos.estadisticas["en_cola"])
+            tarea.futuro = datos.ejecutor.submit(self._ejecutar, datos, tarea, funcion, args)
+        return tarea
+
+    def _ejecutar(self, datos: _Carril, tarea: Tarea, funcion, args):
+        inicio = time.perf_counter()
+        with self._lock:
+            estadisticas = datos.estadisticas
+            estadisticas["en_cola"] -= 1
+            estadisticas["ejecutando"] += 1
+            estadisticas["iniciadas"] += 1
+            estadisticas["espera_ms"] += (inicio - tarea.encolada) * 1000
+            datos.activas.add(tarea)
+        valor, error = None, None
+        try:
+            if not tarea.cancelada:
+                valor = funcion(tarea, *args)
+        except Exception as e:
+            logger.error(f"❌ Error en la tarea {tarea.nombre} ({datos.nombre}): {e}")
+            error = e
+        finally:
+            with self._lock:
+                estadisticas["ejecutando"] -= 1
+                estadisticas["duracion_ms"] += (time.perf_counter() - inicio) * 1000
+                if tarea.cancelada:
+                    estadisticas["canceladas"] += 1
+                elif error is not None:
+                    estadisticas["errores"] += 1
+                else:
+                    estadisticas["completadas"] += 1
+                datos.activas.discard(tarea)
+        if not tarea.cancelada and not self._cerrado:
+            self._puente.resultado.emit(tarea, valor, error)
+        return valor
+
+    def _contar_cancelada(self, tarea: Tarea, en_cola: bool):
+        with self._lock:
+            estadisticas = self._carriles[tarea.carril].estadisticas
+            estadisticas["canceladas"] += 1
+            if en_cola:
+                estadisticas["en_cola"] -= 1
+
+    # ---------- hilo de la interfaz ----------
+    def _entregar(self, tarea: Tarea, valor, error):
+        # Cancelada mientras la señal esperaba en la cola de eventos
+        if tarea.cancelada:
+            return
+        try:
+            if error is None:
+                if tarea._al_terminar is not None:
+                    tarea._al_terminar(valor)
+            elif tarea._al_fallar is not None:
+                tarea._al_fallar(error)
+        except Exception as e:
+            logger.error(f"❌ Error en el callback de {tarea.nombre}: {e}")
+
+    def _entregar_avance(self, tarea: Tarea, valor):
+        if tarea.cancelada:
+            return
+        try:
+            tarea._al_avanzar(valor)
+        except Exception as e:
+            logger.error(f"❌ Error en el callback de {tarea.nombre}: {e}")
+
+    # ---------- métricas y cierre ----------
+    def metricas(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns:
+            dict: por carril, hilos, en_cola, max_en_cola, ejecutando, iniciadas,
+                completadas, errores, canceladas y espera/duración media en ms
+        """
+        with self._lock:
+            metricas = {}
+            for nombre, datos in self._carriles.items():
+                estadisticas = dict(datos.estadisticas)
+                iniciadas = estadisticas["iniciadas"]
+                terminadas = iniciadas - estadisticas["ejecutando"]
+                espera, duracion = estadisticas.pop("espera_ms"), estadisticas.pop("duracion_ms")
+                estadisticas["hilos"] = datos.hilos
+                estadisticas["espera_media_ms"] = espera / iniciadas if iniciadas else 0.0
+                estadisticas["duracion_media_ms"] = duracion / terminadas if terminadas else 0.0
+                metricas[nombre] = estadisticas
+        return metricas
+
+    def cerrar(self, espera: float = 2.0) -> bool:
+        """
+        Cancela lo pendiente, avisa a lo que corre y espera a que termine
+
+        Args:
+            espera: Segundos máximos de espera para las tareas en curso
+
+        Returns:
+            bool: True si no quedó ninguna tarea corriendo
+        """
+        with self._lock:
+            if self._cerrado:
+                return True
+            self._cerrado = True
+            activas = [tarea for datos in self._carriles.values() for tarea in datos.activas]
+        for tarea in activas:
+            tarea._cancelada.set()
+        for datos in self._carriles.values():
+            datos.ejecutor.shutdown(wait=False, cancel_futures=True)
+        _, pendientes = wait([tarea.futuro for tarea in activas], timeout=espera)
+        if pendientes:
+            nombres = ", ".join(t.nombre for t in activas if t.futuro in pendientes)
+            logger.warning(f"⚠️ Tareas aún en curso al cerrar: {nombres}")
+        else:
+            logger.info("🧵 Pool de tareas cerrado")
+        return not pendientes
+
+
+_pool = None
+
+
+def obtener_pool_tareas() -> PoolTareas:
+    """Pool compartido (crearlo desde el hilo de la interfaz)"""
+    global _pool
+    if _pool is None:
+        _pool = PoolTareas()
+    return _pool
+
+
+# ============== TEST ==============
+if __name__ == "__main__":
+    import sys
+    from PySide6.QtCore import QCoreApplication
+
+    app = QCoreApplication(sys.argv)
+    logging.basicConfig(level=logging.INFO)
+    pool = PoolTareas({"red": 2, "audio": 1, "cpu": 2})
+    recibido = []
+
+    def consulta(tarea, n):
+        for i in range(5):
+            if tarea.cancelada:
+                return None
+            tarea.avanzar(f"{n}.{i}")
+            time.sleep(0.02)
+        return n
+
+    def esperar(segundos):
+        fin = time.monotonic() + segundos
+        while time.monotonic() < fin:
+            app.processEvents()
+            time.sleep(0.005)
+
+    print("=" * 60)
+    print("🧵 POOL DE TAREAS")
+    print("=" * 60)
+    tareas = [pool.lanzar("red", consulta, n, al_terminar=recibido.append, al_avanzar=lambda _: None)
+              for n in range(6)]
+    tareas[5].cancelar()      # Aún en cola: no llega a ejecutarse
+    esperar(0.03)
+    tareas[0].cancelar()      # Ya en marcha: se detiene y no entrega resultado
+    pool.lanzar("audio", lambda tarea: time.sleep(0.05), al_terminar=lambda _: recibido.append("audio"))
+    pool.lanzar("cpu", lambda tarea: 1 / 0, al_fallar=lambda e: recibido.append(type(e).__name__))
+    esperar(0.5)
+    print(f"\n   Resultados: {recibido}")
+    for carril, datos in pool.metricas().items():
+        print(f"   {carril}: {datos['completadas']} completadas, {datos['canceladas']} canceladas, "
+              f"{datos['errores']} errores, cola máx {datos['max_en_cola']}, "
+              f"espera {datos['espera_media_ms']:.1f} ms, duración {datos['duracion_media_ms']:.1f} ms")
+    pool.lanzar("audio", lambda tarea: [time.sleep(0.01) for _ in range(300) if not tarea.cancelada],
+                nombre="grabacion")
+    esperar(0.05)
+    inicio = time.perf_counter()
+    print(f"\n   Cierre limpio: {pool.cerrar()} en {(time.perf_counter() - inicio) * 1000:.0f} ms")
@@ -0,0 +1,287 @@
+"""
+Preprocesado de audio - Acondiciona la captura antes del reconocimiento
+
+Cada bloque leído del micrófono pasa por eliminación de continua,
+compuerta de ruido, control automático de ganancia y remuestreo a 16 kHz
+mono, todo vectorizado con NumPy. La frase se codifica a FLAC a medida que
+llega, de modo que al terminar de hablar el cuerpo de la petición ya está
+listo (y es más pequeño que a la frecuencia nativa del dispositivo).
+"""
+import logging
+import threading
+import subprocess
+from typing import Optional
+
+import speech_recognition as sr
+
+from config.settings import (
+    AUDIO_FRECUENCIA_RECONOCIMIENTO, AUDIO_AGC_RMS_OBJETIVO, AUDIO_COMPUERTA_NIVEL_MIN
+)
+from src.fuentes_audio import FuenteAudio
+
+logger = logging.getLogger(__name__)
+
+# Importaciones opcionales
+NUMPY_AVAILABLE = False
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    logger.debug("NumPy no disponible, preprocesado desactivado")
+
+
+# ============== ETAPAS ==============
+class _Remuestreador:
+    """Filtro antialias FIR + interpolación lineal, con estado entre bloques"""
+
+    def __init__(self, entrada: int, salida: int, taps: int = 63):
+        self.paso = entrada / salida
+        self.h = None
+        if salida < entrada:
+            # Paso bajo en-ventana a 0.45 * salida para evitar aliasing
+            corte = 0.45 * salida / entrada
+            n = np.arange(taps) - (taps - 1) / 2
+            h = 2 * corte * np.sinc(2 * corte * n) * np.hamming(taps)
+            self.h = (h / h.sum()).astype(np.float32)
+            self._historial = np.zeros(taps - 1, dtype=np.float32)
+        self._previa = np.zeros(1, dtype=np.float32)
+        self._fase = 1.0
+
+    def procesar(self, x):
+        if self.h is not None:
+            extendida = np.concatenate([self._historial, x])
+            x = np.convolve(extendida, self.h, mode="valid").astype(np.float32)
+            self._historial = extendida[-(len(self.h) - 1):]
+        if self.paso == 1.0:
+            return x
+        y = np.concatenate([self._previa, x])
+        ultima = len(y) - 1
+        posiciones = np.arange(self._fase, ultima + 1e-9, self.paso)
+        salida = np.interp(posiciones, np.arange(len(y)), y).astype(np.float32)
+        siguiente = posiciones[-1] + self.paso if len(posiciones) else self._fase
+        self._fase = siguiente - ultima
+        self._previa = y[-1:]
+        return salida
+
+
+class PreprocesadorAudio:
+    """DC, compuerta de ruido, AGC y remuestreo de bloques PCM"""
+
+    def __init__(
+        self,
+        frecuencia_entrada: int,
+        ancho_entrada: int = 2,
+        frecuencia_salida: int = AUDIO_FRECUENCIA_RECONOCIMIENTO,
+        rms_objetivo: float = AUDIO_AGC_RMS_OBJETIVO,
+        ganancia_max: float = 8.0,
+        margen_compuerta: float = 2.0,
+        nivel_minimo: float = AUDIO_COMPUERTA_NIVEL_MIN,
+        atenuacion_compuerta: float = 0.1,
+    ):
+        """
+        Args:
+            frecuencia_entrada: Frecuencia de la fuente (Hz)
+            ancho_entrada: Bytes por muestra de la fuente
+            frecuencia_salida: Frecuencia entregada al reconocedor
+            rms_objetivo: Nivel RMS (unidades int16) al que el AGC lleva la voz
+            ganancia_max: Límite de amplificación del AGC
+            margen_compuerta: Veces sobre el piso de ruido para abrir la compuerta
+            nivel_minimo: RMS absoluto por debajo del cual la compuerta no abre
+            atenuacion_compuerta: Ganancia aplicada con la compuerta cerrada
+        """
+        self.ancho_entrada = ancho_entrada
+        self.frecuencia_salida = frecuencia_salida
+        self.rms_objetivo = rms_objetivo
+        self.ganancia_max = ganancia_max
+        self.margen_compuerta = margen_compuerta
+        self.nivel_minimo = nivel_minimo
+        self.atenuacion_compuerta = atenuacion_compuerta
+        self._remuestreador = _Remuestreador(frecuencia_entrada, frecuencia_salida)
+        self._dc = None
+        # Punto de partida conservador: la calibración de ruido ambiente lo ajusta
+        self._ruido = nivel_minimo
+        self._agc = 1.0
+        self._ganancia = 1.0
+        self._escala = float(2 ** (8 * ancho_entrada - 1)) / 32768.0
+
+    def procesar(self, datos: bytes) -> bytes:
+        """
+        Args:
+            datos: PCM mono de la fuente
+
+        Returns:
+            bytes: PCM int16 mono a frecuencia_salida
+        """
+        if not datos:
+            return b""
+        x = self._a_float(datos)
+
+        # 1. Componente continua: media móvil por bloques
+        media = float(x.mean())
+        self._dc = media if self._dc is None else 0.9 * self._dc + 0.1 * media
+        x = x - self._dc
+
+        # 2. Remuestreo (antes de medir niveles, para trabajar siempre a 16 kHz)
+        x = self._remuestreador.procesar(x)
+        if not len(x):
+            return b""
+
+        # 3. Piso de ruido: baja rápido, sube despacio
+        rms = float(np.sqrt(np.mean(x * x))) + 1e-6
+        if rms < self._ruido:
+            self._ruido = 0.5 * self._ruido + 0.5 * rms
+        else:
+            self._ruido *= 1.01
+
+        # 4. Compuerta + AGC
+        abierta = rms > max(self.margen_compuerta * self._ruido, self.nivel_minimo)
+        if abierta:
+            objetivo = min(self.rms_objetivo / rms, self.ganancia_max)
+            self._agc += 0.3 * (objetivo - self._agc)
+            ganancia = self._agc
+        else:
+            ganancia = self.atenuacion_compuerta
+        # Rampa de ganancia a lo largo del bloque para no producir clics
+        rampa = np.linspace(self._ganancia, ganancia, len(x), dtype=np.float32)
+        self._ganancia = ganancia
+        y = np.clip(x * rampa, -32768, 32767)
+        return y.astype(np.int16).tobytes()
+
+    def _a_float(self, datos: bytes):
+        if self.ancho_entrada == 2:
+            return np.frombuffer(datos, dtype=np.int16).astype(np.float32)
+        if self.ancho_entrada == 4:
+            return np.frombuffer(datos, dtype=np.int32).astype(np.float32) / self._escala
+        if self.ancho_entrada == 1:
+            return (np.frombuffer(datos, dtype=np.uint8).astype(np.float32) - 128.0) * 256.0
+        # 24 bits: se rellena a 32 y se reutiliza la ruta de int32
+        crudo = np.frombuffer(datos, dtype=np.uint8).reshape(-1, 3)
+        relleno = np.zeros((len(crudo), 4), dtype=np.uint8)
+        relleno[:, 1:] = crudo
+        return relleno.view(np.int32).ravel().astype(np.float32) / float(2 ** 31) * 32768.0
+
+
+# ============== FUENTE PREPROCESADA ==============
+class _StreamPreprocesado:
+    def __init__(self, fuente: "FuentePreprocesada"):
+        self.fuente = fuente
+
+    def read(self, size: int) -> bytes:
+        interna = self.fuente.interna
+        # Se lee hasta tener salida; b"" solo cuando la fuente se agota
+        while True:
+            datos = interna.stream.read(interna.CHUNK)
+            if not datos:
+                return b""
+            salida = self.fuente.preprocesador.procesar(datos)
+            if salida:
+                return salida
+
+
+class FuentePreprocesada(FuenteAudio):
+    """Envuelve una fuente y entrega audio acondicionado a 16 kHz mono"""
+
+    def __init__(self, interna: FuenteAudio):
+        super().__init__()
+        self.interna = interna
+        self.en_vivo = interna.en_vivo
+        self.preprocesador = None
+        self.SAMPLE_RATE = AUDIO_FRECUENCIA_RECONOCIMIENTO
+        self.SAMPLE_WIDTH = 2
+
+    @property
+    def agotada(self) -> bool:
+        return self.interna.agotada
+
+    def __enter__(self):
+        self.interna.__enter__()
+        if self.preprocesador is None:
+            self.preprocesador = PreprocesadorAudio(
+                self.interna.SAMPLE_RATE, self.interna.SAMPLE_WIDTH
+            )
+        self.CHUNK = max(1, round(self.interna.CHUNK * self.SAMPLE_RATE / self.interna.SAMPLE_RATE))
+        self.stream = _StreamPreprocesado(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stream = None
+        return self.interna.__exit__(exc_type, exc_value, traceback)
+
+
+def preprocesar_fuente(fuente: FuenteAudio) -> FuenteAudio:
+    """
+    Retorna la versión preprocesada de una fuente (cacheada para conservar
+    el piso de ruido y la ganancia entre frases)
+    """
+    if not NUMPY_AVAILABLE or isinstance(fuente, FuentePreprocesada):
+        return fuente
+    envuelta = getattr(fuente, "_preprocesada", None)
+    if envuelta is None:
+        envuelta = FuentePreprocesada(fuente)
+        fuente._preprocesada = envuelta
+    return envuelta
+
+
+# ============== CODIFICACIÓN INCREMENTAL ==============
+class CodificadorFlacIncremental:
+    """Proceso `flac` que codifica PCM crudo a medida que se le entrega"""
+
+    def __init__(self, frecuencia: int, ancho: int = 2):
+        self._partes = []
+        self._proceso = subprocess.Popen(
+            [
+                sr.get_flac_converter(), "--stdout", "--totally-silent", "--best",
+                "--force-raw-format", "--endian=little", "--sign=signed", "--channels=1",
+                f"--bps={8 * ancho}", f"--sample-rate={frecuencia}", "-",
+            ],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        # La salida se drena en paralelo para que stdin nunca se bloquee
+        self._lector = threading.Thread(target=self._leer, daemon=True)
+        self._lector.start()
+
+    def _leer(self):
+        for parte in iter(lambda: self._proceso.stdout.read(4096), b""):
+            self._partes.append(parte)
+
+    def alimentar(self, datos: bytes):
+        self._proceso.stdin.write(datos)
+
+    def terminar(self, timeout: float = 5.0) -> bytes:
+        """Cierra la entrada y retorna el FLAC completo"""
+        self._proceso.stdin.close()
+        if self._proceso.wait(timeout) != 0:
+            raise RuntimeError(f"flac terminó con código {self._proceso.returncode}")
+        self._lector.join(timeout)
+        return b"".join(self._partes)
+
+    def cancelar(self):
+        try:
+            self._proceso.kill()
+        except Exception:
+            pass
+
+
+class AudioDataCodificada(sr.AudioData):
+    """AudioData que ya trae su FLAC; recognize_google lo usa sin reconvertir"""
+
+    def __init__(self, frame_data: bytes, sample_rate: int, sample_width: int, flac: Optional[bytes]):
+        super().__init__(frame_data, sample_rate, sample_width)
+        self.flac = flac
+
+    def get_flac_data(self, convert_rate=None, convert_width=None):
+        if (
+            self.flac
+            and convert_rate in (None, self.sample_rate)
+            and convert_width in (None, self.sample_width)
+        ):
+            return self.flac
+        return super().get_flac_data(convert_rate, convert_width)
+
+
+def codificador_disponible() -> bool:
+    try:
+        sr.get_flac_converter()
+        return True
+    except OSError:
+        return False
@@ -0,0 +1,425 @@
+"""
+Registro de habilidades - Declaración, enrutado y métricas de cada habilidad
+
+Cada habilidad declara sus disparadores, su prioridad, si tiene efectos
+laterales y la función que la ejecuta como "modulo:funcion". Registrar una
+habilidad recompila el motor de intenciones; el módulo que la implementa
+solo se importa la primera vez que se ejecuta, así el arranque no depende
+de cuántas habilidades haya.
+"""
+import re
+import time
+import logging
+import importlib
+import threading
+from typing import Callable, Optional, Tuple, Dict, Any, Union
+
+from config.settings import (
+    EXIT_COMMANDS, WEB_SHORTCUTS, PALABRAS_BUSQUEDA, PALABRAS_REMOVER_BUSQUEDA,
+    PALABRAS_YOUTUBE, VERBOS_APERTURA, get_programas_for_os
+)
+from src.intenciones import MotorIntenciones, Coincidencia, MODOS, limpiar_termino
+from src.indice_difuso import obtener_indice
+
+logger = logging.getLogger(__name__)
+
+
+# ============== HABILIDAD ==============
+class Habilidad:
+    """Declaración de una habilidad"""
+
+    def __init__(
+        self,
+        nombre: str,
+        disparadores,
+        funcion: Union[str, Callable, None],
+        prioridad: int = 50,
+        efectos: bool = True,
+        modo: str = "subcadena",
+        extraer: Optional[Callable[[Coincidencia], Optional[Dict[str, Any]]]] = None,
+        recurso: Union[str, Callable[[Dict[str, Any]], Optional[str]], None] = None,
+    ):
+        """
+        Args:
+            nombre: Nombre único (es la ruta que devuelve enrutar_comando)
+            disparadores: Lista, dict {disparador: valor} o función que los retorna
+                (se vuelve a leer si la configuración cambia)
+            funcion: "modulo:funcion" (carga diferida), callable o None si la
+                atiende quien procesa el comando
+            prioridad: Mayor = se comprueba antes
+            efectos: True si actúa sobre el sistema (no se ejecuta por adelantado)
+            modo: "subcadena", "palabra" (palabra completa) o "regex"
+            extraer: Convierte la coincidencia en argumentos de la función;
+                None descarta la coincidencia
+            recurso: Lo que la habilidad modifica ("navegador", "volumen") o
+                función slots → recurso; dos acciones con el mismo recurso
+                no se ejecutan a la vez en un comando con varias intenciones
+        """
+        if modo not in MODOS:
+            raise ValueError(f"Modo de disparador no válido: {modo}")
+        self.nombre = nombre
+        self.disparadores = disparadores
+        self.funcion = funcion
+        self.prioridad = prioridad
+        self.efectos = efectos
+        self.modo = modo
+        self._extraer = extraer
+        self.recurso = recurso
+        self._callable = funcion if callable(funcion) else None
+
+    def fuente_disparadores(self):
+        return self.disparadores() if callable(self.disparadores) else self.disparadores
+
+    def tabla_disparadores(self) -> Dict[str, Any]:
+        fuente = self.fuente_disparadores()
+        if isinstance(fuente, dict):
+            return {str(d).lower() if self.modo != "regex" else d: v for d, v in fuente.items()}
+        return {str(d).lower() if self.modo != "regex" else d: None for d in fuente}
+
+    def extraer(self, coincidencia: Coincidencia) -> Optional[Dict[str, Any]]:
+        return self._extraer(coincidencia) if self._extraer else {}
+
+    def recurso_de(self, slots: Dict[str, Any]) -> Optional[str]:
+        return self.recurso(slots) if callable(self.recurso) else self.recurso
+
+    @property
+    def cargada(self) -> bool:
+        return self._callable is not None or self.funcion is None
+
+    def cargar(self) -> Optional[Callable]:
+        """Importa el módulo de la habilidad (solo la primera vez)"""
+        if self._callable is None and self.funcion:
+            modulo, nombre = self.funcion.split(":")
+            self._callable = getattr(importlib.import_module(modulo), nombre)
+        return self._callable
+
+    def __repr__(self):
+        return f"Habilidad({self.nombre!r}, prioridad={self.prioridad})"
+
+
+# ============== REGISTRO ==============
+class RegistroHabilidades:
+    """Habilidades registradas, motor compilado y tiempos por habilidad"""
+
+    def __init__(self):
+        self._habilidades: Dict[str, Habilidad] = {}
+        self._motor = None
+        self._firma = None
+        self._lock = threading.RLock()
+        self._metricas: Dict[str, Dict[str, float]] = {}
+
+    def registrar(self, habilidad: Habilidad) -> Habilidad:
+        """Añade (o reemplaza) una habilidad; el motor se recompila en la próxima detección"""
+        with self._lock:
+            if habilidad.nombre in self._habilidades:
+                logger.debug(f"Reemplazando la habilidad {habilidad.nombre}")
+            self._habilidades[habilidad.nombre] = habilidad
+            self._metricas.setdefault(habilidad.nombre, _metricas_vacias())
+            self._motor = None
+        return habilidad
+
+    def eliminar(self, nombre: str):
+        with self._lock:
+            if self._habilidades.pop(nombre, None):
+                self._motor = None
+
+    def obtener(self, nombre: str) -> Optional[Habilidad]:
+        return self._habilidades.get(nombre)
+
+    def habilidades(self):
+        """Habilidades en orden de prioridad"""
+        return sorted(self._habilidades.values(), key=lambda h: -h.prioridad)
+
+    def recargar(self):
+        """Fuerza la recompilación (p. ej. tras editar un alias existente en caliente)"""
+        with self._lock:
+            self._motor = None
+
+    def _firma_configuracion(self):
+        # Identidad y tamaño de cada fuente de disparadores: barato de comprobar
+        return tuple(
+            (h.nombre, id(f), len(f))
+            for h in self._habilidades.values()
+            for f in (h.fuente_disparadores(),)
+        )
+
+    def motor(self) -> MotorIntenciones:
+        """Motor compilado con las habilidades y la configuración actuales"""
+        firma = self._firma_configuracion()
+        motor = self._motor
+        if motor is None or firma != self._firma:
+            with self._lock:
+                if self._motor is None or firma != self._firma:
+                    inicio = time.perf_counter()
+                    self._motor = MotorIntenciones(list(self._habilidades.values()))
+                    self._firma = firma
+                    logger.debug(
+                        f"Motor de intenciones compilado: {self._motor.total_disparadores} disparadores, "
+                        f"{len(self._habilidades)} habilidades en {(time.perf_counter() - inicio) * 1000:.1f} ms"
+                    )
+                motor = self._motor
+        return motor
+
+    # ---------- enrutado y ejecución ----------
+    def detectar(self, comando: str, contar: bool = True) -> Optional[Tuple[Habilidad, Dict[str, Any]]]:
+        """
+        Args:
+            comando: Comando del usuario
+            contar: Registrar la detección en las métricas
+
+        Returns:
+            tuple: (Habilidad, slots) o None si no coincide ninguna
+        """
+        motor = self.motor()
+        inicio = time.perf_counter()
+        resultado = motor.detectar(comando)
+        duracion = time.perf_counter() - inicio
+        if not contar:
+            return resultado
+        with self._lock:
+            datos = self._metricas.setdefault(
+                resultado[0].nombre if resultado else "IA", _metricas_vacias()
+            )
+            datos["coincidencias"] += 1
+            datos["deteccion_s"] += duracion
+        return resultado
+
+    def ejecutar(self, habilidad: Habilidad, slots: Dict[str, Any]) -> str:
+        """
+        Ejecuta la habilidad con sus slots, cargando su módulo si hace falta
+
+        Returns:
+            str: Respuesta de la habilidad ("" si falló; el error queda en el log)
+        """
+        datos = self._metricas[habilidad.nombre]
+        try:
+            if not habilidad.cargada:
+                inicio = time.perf_counter()
+                habilidad.cargar()
+                datos["carga_s"] = time.perf_counter() - inicio
+                logger.debug(f"Habilidad {habilidad.nombre} cargada en {datos['carga_s'] * 1000:.1f} ms")
+            inicio = time.perf_counter()
+            respuesta = habilidad.cargar()(**slots)
+        except Exception as e:
+            logger.exception(f"Error en la habilidad {habilidad.nombre}: {e}")
+            with self._lock:
+                datos["errores"] += 1
+            return ""
+        duracion = time.perf_counter() - inicio
+        with self._lock:
+            datos["ejecuciones"] += 1
+            datos["ejecucion_s"] += duracion
+            datos["ejecucion_max_s"] = max(datos["ejecucion_max_s"], duracion)
+        return respuesta
+
+    def metricas(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns:
+            dict: Por habilidad (y "IA"): coincidencias, tiempo medio de
+                detección, ejecuciones, errores, tiempo medio/máximo de
+                ejecución y tiempo de carga del módulo, en ms
+        """
+        with self._lock:
+            resultado = {}
+            for nombre, d in self._metricas.items():
+                resultado[nombre] = {
+                    "coincidencias": int(d["coincidencias"]),
+                    "deteccion_ms": 1000 * d["deteccion_s"] / d["coincidencias"] if d["coincidencias"] else 0.0,
+                    "ejecuciones": int(d["ejecuciones"]),
+                    "errores": int(d["errores"]),
+                    "ejecucion_ms": 1000 * d["ejecucion_s"] / d["ejecuciones"] if d["ejecuciones"] else 0.0,
+                    "ejecucion_max_ms": 1000 * d["ejecucion_max_s"],
+                    "carga_ms": 1000 * d["carga_s"],
+                }
+            return resultado
+
+
+def _metricas_vacias():
+    return {
+        "coincidencias": 0, "deteccion_s": 0.0, "ejecuciones": 0, "errores": 0,
+        "ejecucion_s": 0.0, "ejecucion_max_s": 0.0, "carga_s": 0.0,
+    }
+
+
+registro = RegistroHabilidades()
+
+
+def registrar_habilidad(nombre, disparadores, funcion, **opciones) -> Habilidad:
+    """Atajo para registro.registrar(Habilidad(...)); ver Habilidad para las opciones"""
+    return registro.registrar(Habilidad(nombre, disparadores, funcion, **opciones))
+
+
+def detectar_intencion(comando: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Args:
+        comando: Comando del usuario
+
+    Returns:
+        tuple: (nombre de la habilidad, slots) o None si lo atiende la IA
+    """
+    resultado = registro.detectar(comando)
+    return (resultado[0].nombre, resultado[1]) if resultado else None
+
+
+# ============== HABILIDADES INTEGRADAS ==============
+def _slots_programa(c):
+    return {"nombre": c.disparador, "ejecutable": c.valor}
+
+
+def _slots_volumen(c):
+    # Sin número ("súbele al volumen") decide el clasificador local
+    numero = re.search(r"\d+", c.texto)
+    return {"porcentaje": int(numero.group())} if numero else None
+
+
+def _slots_youtube(c):
+    termino = limpiar_termino(c.resto, PALABRAS_REMOVER_BUSQUEDA)
+    return {"termino": termino} if termino else None
+
+
+def _slots_clima(c):
+    # "googlea el clima de mañana": una búsqueda pedida explícitamente no es el pronóstico
+    if _patron_busqueda.search(c.texto[:c.inicio]):
+        return None
+    lugar = re.search(r"\ben\s+(.+)$", c.resto)
+    return {"lugar": limpiar_termino(lugar.group(1), PALABRAS_REMOVER_BUSQUEDA) if lugar else None}
+
+
+_patron_busqueda = re.compile(r"\b(?:" + "|".join(re.escape(p) for p in PALABRAS_BUSQUEDA) + r")\b")
+
+
+def _slots_web(c):
+    # "google" dentro de "googlea" no es el atajo (los atajos se buscan como subcadena)
+    if c.texto[c.fin:c.fin + 1].isalnum() and c.disparador[-1:].isalnum():
+        return None
+    return {"url": c.valor, "nombre": c.disparador}
+
+
+def _slots_url(c):
+    # La URL conserva las mayúsculas del comando original
+    mismo_largo = len(c.texto) == len(c.comando)
+    return {"url": c.comando[c.inicio:c.fin] if mismo_largo else c.disparador, "nombre": "página web"}
+
+
+def _slots_difusos(c):
+    # Alias aproximado en lo que sigue al verbo ("abre fire fox")
+    resultados = obtener_indice().buscar(c.resto)
+    if not resultados:
+        return None
+    _, alias, valor, origen = resultados[0]
+    return {"origen": origen, "valor": valor, "nombre": alias}
+
+
+def _abrir_alias(origen, valor, nombre):
+    if origen == "web":
+        from src.habilidades_web import abrir_url
+        return abrir_url(valor, nombre)
+    from src.habilidades_sistema import ejecutar_programa
+    return ejecutar_programa(nombre, valor)
+
+
+_ORDINALES = {"uno": 1, "primero": 1, "primer": 1, "dos": 2, "segundo": 2, "tres": 3, "tercero": 3, "tercer": 3,
+              "cuatro": 4, "cuarto": 4, "cinco": 5, "quinto": 5}
+
+
+def _slots_abrir_archivo(c):
+    # "abre el segundo archivo" / "abre el archivo 2" → posición en la última búsqueda
+    for palabra in c.disparador.split():
+        if palabra in _ORDINALES:
+            return {"numero": _ORDINALES[palabra]}
+    resto = limpiar_termino(c.resto, PALABRAS_REMOVER_BUSQUEDA)
+    if not resto:
+        return None
+    numero = re.fullmatch(r"(?:(?:el\s+)?n[uú]mero\s+)?(\w+)", resto)
+    if numero and numero.group(1).isdigit():
+        return {"numero": int(numero.group(1))}
+    if numero and numero.group(1) in _ORDINALES:
+        return {"numero": _ORDINALES[numero.group(1)]}
+    # "abre el archivo informe.pdf" → por nombre
+    return {"nombre": resto}
+
+
+_NAVEGADORES = ("firefox", "chrome", "chromium", "msedge", "safari")
+
+
+def _recurso_programa(slots):
+    # Abrir un navegador y luego una página: en ese orden
+    ejecutable = str(slots.get("ejecutable") or slots.get("valor", "")).lower()
+    if slots.get("origen") == "web" or any(n in ejecutable for n in _NAVEGADORES):
+        return "navegador"
+    return None
+
+
+def _slots_busqueda(c):
+    termino = limpiar_termino(c.resto, PALABRAS_REMOVER_BUSQUEDA)
+    return {"termino": termino} if termino else None
+
+
+# Palabras completas: "quit" no debe cerrar la sesión dentro de "quita el sonido"
+registrar_habilidad("Salida", lambda: EXIT_COMMANDS, None, prioridad=100, modo="palabra", efectos=False)
+registrar_habilidad("AbrirArchivo", ["abre el archivo", "abrir el archivo", "abre el primer archivo",
+                                     "abre el segundo archivo", "abre el tercer archivo"],
+                    "src.habilidades_sistema:abrir_archivo_encontrado", prioridad=90, extraer=_slots_abrir_archivo,
+                    recurso="archivos")
+registrar_habilidad("Archivos", ["busca el archivo", "buscar el archivo", "encuentra el archivo",
+                                 "dónde está el archivo", "busca mi archivo"],
+                    "src.habilidades_sistema:buscar_archivos", prioridad=90, efectos=False,
+                    extraer=_slots_busqueda, recurso="archivos")
+registrar_habilidad("Volumen", ["volumen"], "src.habilidades_sistema:ajustar_volumen",
+                    prioridad=85, modo="palabra", extraer=_slots_volumen, recurso="volumen")
+registrar_habilidad("Sistema", get_programas_for_os, "src.habilidades_sistema:ejecutar_programa",
+                    prioridad=80, modo="palabra", extraer=_slots_programa, recurso=_recurso_programa)
+registrar_habilidad("YouTube", lambda: PALABRAS_YOUTUBE, "src.habilidades_web:buscar_en_youtube",
+                    prioridad=70, extraer=_slots_youtube, recurso="navegador")
+registrar_habilidad("Clima", ["clima", "pronóstico del tiempo"], "src.habilidades_web:buscar_clima",
+                    prioridad=65, modo="palabra", extraer=_slots_clima, recurso="navegador")
+registrar_habilidad("Web", lambda: WEB_SHORTCUTS, "src.habilidades_web:abrir_url",
+                    prioridad=60, extraer=_slots_web, recurso="navegador")
+registrar_habilidad("URL", [r"(?<!\S)https?://\S+"], "src.habilidades_web:abrir_url",
+                    prioridad=55, modo="regex", extraer=_slots_url, recurso="navegador")
+registrar_habilidad("AliasDifuso", lambda: VERBOS_APERTURA, _abrir_alias,
+                    prioridad=50, modo="palabra", extraer=_slots_difusos, recurso=_recurso_programa)
+registrar_habilidad("Búsqueda", lambda: PALABRAS_BUSQUEDA, "src.habilidades_web:realizar_busqueda",
+                    prioridad=20, extraer=_slots_busqueda, recurso="navegador")
+
+
+# ============== TEST ==============
+if __name__ == "__main__":
+    import sys
+
+    # Frases de ejemplo de cada habilidad integrada → habilidad esperada (None = IA)
+    frases = {
+        "adiós aurora": "Salida",
+        "eso es todo": "Salida",
+        "quita el sonido": None,
+        "abre el archivo 2": "AbrirArchivo",
+        "abre el segundo archivo": "AbrirArchivo",
+        "abre el archivo informe.pdf": "AbrirArchivo",
+        "abre el archivo informe 2024.pdf": "AbrirArchivo",
+        "busca el archivo informe de ventas": "Archivos",
+        "pon el volumen al 30": "Volumen",
+        "abre firefox": "Sistema",
+        "abre la calculadora por favor": "Sistema",
+        "busca en youtube música relajante": "YouTube",
+        "cómo está el clima en madrid": "Clima",
+        "googlea el clima de mañana": "Búsqueda",
+        "abre youtube": "Web",
+        "abre https://example.com": "URL",
+        "abre fire fox": "AliasDifuso",
+        "busca recetas de pasta": "Búsqueda",
+        "cuál es la capital de francia": None,
+    }
+
+    print("=" * 60)
+    print("🧩 HABILIDADES INTEGRADAS")
+    print("=" * 60)
+    fallos = 0
+    for frase, esperada in frases.items():
+        resultado = registro.detectar(frase, contar=False)
+        obtenida = resultado[0].nombre if resultado else None
+        fallos += obtenida != esperada
+        marca = "✅" if obtenida == esperada else "❌"
+        print(f"   {marca} {frase:38s} → {obtenida or 'IA'} {resultado[1] if resultado else ''}"
+              + ("" if obtenida == esperada else f" (esperada: {esperada or 'IA'})"))
+    print(f"\n{len(frases) - fallos}/{len(frases)} frases bien enrutadas")
+    sys.exit(1 if fallos else 0)
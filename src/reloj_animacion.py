@@ -0,0 +1,319 @@
+"""
+Reloj de animaciones - Un solo temporizador para todos los widgets animados
+
+Cada widget animado tenía su propio QTimer (30-150 ms) corriendo siempre,
+aunque la ventana estuviera minimizada u oculta. Aquí los widgets se
+suscriben a un reloj compartido que:
+
+- Solo llama a los widgets visibles y expuestos (ventana no minimizada,
+  no tapada según la plataforma, aplicación no suspendida); si ninguno lo
+  está, el reloj baja a una comprobación cada 500 ms.
+- Divide los FPS (x2, x4) cuando los ticks llegan tarde o el pintado se
+  come el presupuesto del cuadro, y en batería si el ahorro está activo.
+- Cuenta cuadros pintados y tiempo dentro de paintEvent.
+
+Las animaciones reciben cuántos intervalos pasaron desde la última llamada,
+así que al bajar los FPS avanzan igual de rápido, solo con menos cuadros.
+"""
+import sys
+import time
+import logging
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Dict
+
+from PySide6.QtCore import QObject, QTimer, QEvent, Qt
+from PySide6.QtGui import QGuiApplication
+
+from config.settings import ANIMACION_AHORRO_BATERIA, ANIMACION_DIVISOR_MAXIMO
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_REPOSO_MS = 500      # Comprobación de visibilidad sin nada que animar
+INTERVALO_CARGA_S = 1.0        # Ventana para medir retraso y coste de pintado
+INTERVALO_BATERIA_S = 30.0
+
+
+def en_bateria() -> bool:
+    """True si el equipo funciona con batería (False si no se puede saber)"""
+    if PSUTIL_AVAILABLE:
+        try:
+            bateria = psutil.sensors_battery()
+            return bool(bateria and not bateria.power_plugged)
+        except Exception:
+            return False
+    if sys.platform.startswith("linux"):
+        try:
+            fuentes = list(Path("/sys/class/power_supply").iterdir())
+        except OSError:
+            return False
+        hay_bateria = False
+        for fuente in fuentes:
+            try:
+                tipo = (fuente / "type").read_text().strip()
+                if tipo == "Mains" and (fuente / "online").read_text().strip() == "1":
+                    return False
+                hay_bateria = hay_bateria or tipo == "Battery"
+            except OSError:
+                continue
+        return hay_bateria
+    return False
+
+
+class _Suscripcion:
+    __slots__ = ("widget", "callback", "intervalo", "ultimo")
+
+    def __init__(self, widget, callback, intervalo):
+        self.widget = widget
+        self.callback = callback
+        self.intervalo = intervalo / 1000
+        self.ultimo = time.monotonic()
+
+
+# ============== RELOJ ==============
+class RelojAnimacion(QObject):
+    """Temporizador compartido por todos los widgets animados"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._suscripciones: Dict[int, _Suscripcion] = {}
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._tick)
+        self._base_ms = 0
+        self.divisor = 1
+        self._divisor_carga = 1
+        self._bateria = False
+        self._suspendida = False
+        self._ultimo_tick = 0.0
+        self._ventana_inicio = time.monotonic()
+        self._ventana_retraso = 0.0
+        self._ventana_ticks = 0
+        self._ventana_pintado = 0.0
+        self._ventana_holgada = 0
+        self._proxima_bateria = 0.0
+        self.estadisticas = {
+            "cuadros": 0, "pintado_ms": 0.0, "ticks": 0, "ticks_en_reposo": 0,
+            "llamadas": 0, "divisor": 1,
+        }
+        # callback(widget, segundos) por cada paintEvent medido (perfilado de la interfaz)
+        self.observador_pintado = None
+        app = QGuiApplication.instance()
+        if app is not None:
+            app.applicationStateChanged.connect(self._estado_aplicacion)
+
+    # ---------- suscripciones ----------
+    def suscribir(self, widget, callback: Callable[[int], None], intervalo_ms: int):
+        """
+        Anima un widget desde el reloj compartido
+
+        Args:
+            widget: Widget animado (se da de baja solo al destruirse)
+            callback: callback(pasos) con los intervalos transcurridos (≥ 1)
+            intervalo_ms: Intervalo deseado entre cuadros
+        """
+        clave = id(widget)
+        self._suscripciones[clave] = _Suscripcion(widget, callback, intervalo_ms)
+        widget.destroyed.connect(lambda *_, c=clave: self.desuscribir(c))
+        widget.installEventFilter(self)
+        self._recalcular()
+
+    def desuscribir(self, widget_o_clave):
+        clave = widget_o_clave if isinstance(widget_o_clave, int) else id(widget_o_clave)
+        if self._suscripciones.pop(clave, None) is not None:
+            self._recalcular()
+
+    def _recalcular(self):
+        if not self._suscripciones:
+            self._base_ms = 0
+            self._timer.stop()
+            return
+        self._base_ms = int(min(s.intervalo for s in self._suscripciones.values()) * 1000)
+        self._programar(self._base_ms * self.divisor)
+
+    def _programar(self, intervalo_ms):
+        if self._timer.interval() != intervalo_ms or not self._timer.isActive():
+            self._timer.start(intervalo_ms)
+
+    # ---------- visibilidad ----------
+    def eventFilter(self, objeto, evento):
+        # Un widget que vuelve a mostrarse despierta al reloj sin esperar al reposo
+        if evento.type() == QEvent.Type.Show and self._base_ms:
+            self._programar(self._base_ms * self.divisor)
+        return False
+
+    def _estado_aplicacion(self, estado):
+        self._suspendida = estado in (
+            Qt.ApplicationState.ApplicationHidden, Qt.ApplicationState.ApplicationSuspended
+        )
+        if not self._suspendida and self._base_ms:
+            self._programar(self._base_ms * self.divisor)
+
+    @staticmethod
+    def visible(widget) -> bool:
+        """Visible, con la ventana expuesta y no minimizada, y no tapado por completo"""
+        if not widget.isVisible():
+            return False
+        ventana = widget.window()
+        if ventana.isMinimized():
+            return False
+        handle = ventana.windowHandle()
+        if handle is not None and not handle.isExposed():
+            return False
+        return not widget.visibleRegion().isEmpty()
+
+    # ---------- tick ----------
+    def _tick(self):
+        ahora = time.monotonic()
+        self.estadisticas["ticks"] += 1
+        if self._ultimo_tick:
+            esperado = self._timer.interval() / 1000
+            self._ventana_retraso += max(0.0, (ahora - self._ultimo_tick) - esperado)
+            self._ventana_ticks += 1
+        self._ultimo_tick = ahora
+
+        activas = 0
+        tick = self._timer.interval() / 1000
+        if not self._suspendida:
+            for suscripcion in list(self._suscripciones.values()):
+                if not self.visible(suscripcion.widget):
+                    suscripcion.ultimo = ahora  # Al volver no recupera el tiempo oculto
+                    continue
+                activas += 1
+                transcurrido = ahora - suscripcion.ultimo
+                # Margen de medio tick: el timer no es exacto
+                if transcurrido + tick * 0.5 < suscripcion.intervalo:
+                    continue
+                pasos = max(1, round(transcurrido / suscripcion.intervalo))
+                suscripcion.ultimo = ahora
+                self.estadisticas["llamadas"] += 1
+                try:
+                    suscripcion.callback(pasos)
+                except Exception as e:
+                    logger.error(f"Error en animación de {type(suscripcion.widget).__name__}: {e}")
+
+        if not activas:
+            self.estadisticas["ticks_en_reposo"] += 1
+            self._ultimo_tick = 0.0
+            self._programar(INTERVALO_REPOSO_MS)
+            return
+        self._ajustar_divisor(ahora)
+        self._programar(self._base_ms * self.divisor)
+
+    def _ajustar_divisor(self, ahora):
+        if ahora >= self._proxima_bateria:
+            self._proxima_bateria = ahora + INTERVALO_BATERIA_S
+            self._bateria = ANIMACION_AHORRO_BATERIA and en_bateria()
+        duracion = ahora - self._ventana_inicio
+        if duracion >= INTERVALO_CARGA_S and self._ventana_ticks:
+            presupuesto = self._base_ms * self._divisor_carga / 1000
+            retraso = self._ventana_retraso / self._ventana_ticks
+            pintado = self._ventana_pintado / self._ventana_ticks
+            if retraso > presupuesto * 0.5 or pintado > presupuesto * 0.4:
+                self._divisor_carga = min(self._divisor_carga * 2, ANIMACION_DIVISOR_MAXIMO)
+                self._ventana_holgada = 0
+            elif retraso < presupuesto * 0.1 and pintado < presupuesto * 0.1:
+                # Bajar el divisor solo tras varios segundos holgados seguidos
+                self._ventana_holgada += 1
+                if self._ventana_holgada >= 3 and self._divisor_carga > 1:
+                    self._divisor_carga //= 2
+                    self._ventana_holgada = 0
+            self._ventana_inicio = ahora
+            self._ventana_retraso = self._ventana_pintado = 0.0
+            self._ventana_ticks = 0
+        divisor = max(self._divisor_carga, 2 if self._bateria else 1)
+        divisor = min(divisor, ANIMACION_DIVISOR_MAXIMO)
+        if divisor != self.divisor:
+            logger.debug(f"🎞️ Animaciones a 1/{divisor} de FPS"
+                         f"{' (batería)' if self._bateria else ''}")
+            self.divisor = self.estadisticas["divisor"] = divisor
+
+    # ---------- contadores ----------
+    def registrar_pintado(self, segundos: float, widget=None):
+        self.estadisticas["cuadros"] += 1
+        self.estadisticas["pintado_ms"] += segundos * 1000
+        self._ventana_pintado += segundos
+        if self.observador_pintado is not None:
+            self.observador_pintado(widget, segundos)
+
+    def fps(self) -> float:
+        """FPS de la animación más rápida con el divisor actual"""
+        return 1000 / (self._base_ms * self.divisor) if self._base_ms else 0.0
+
+
+_reloj = None
+
+
+def obtener_reloj() -> RelojAnimacion:
+    """Reloj compartido (requiere una QApplication creada)"""
+    global _reloj
+    if _reloj is None:
+        _reloj = RelojAnimacion(QGuiApplication.instance())
+    return _reloj
+
+
+def medir_pintado(paint_event):
+    """Decorador para paintEvent: suma el cuadro y su duración al reloj"""
+    @wraps(paint_event)
+    def envoltura(self, event):
+        inicio = time.perf_counter()
+        try:
+            return paint_event(self, event)
+        finally:
+            obtener_reloj().registrar_pintado(time.perf_counter() - inicio, self)
+    return envoltura
+
+
+# ============== TEST ==============
+if __name__ == "__main__":
+    from PySide6.QtWidgets import QApplication, QWidget
+
+    app = QApplication(sys.argv)
+    logging.basicConfig(level=logging.INFO)
+
+    class Animado(QWidget):
+        def __init__(self, intervalo):
+            super().__init__()
+            self.llamadas = 0
+            self.pasos = 0
+            obtener_reloj().suscribir(self, self.animar, intervalo)
+
+        def animar(self, pasos):
+            self.llamadas += 1
+            self.pasos += pasos
+            self.update()
+
+        @medir_pintado
+        def paintEvent(self, event):
+            time.sleep(0.001)
+
+    def esperar(segundos):
+        fin = time.monotonic() + segundos
+        while time.monotonic() < fin:
+            app.processEvents()
+            time.sleep(0.002)
+
+    rapido, lento = Animado(30), Animado(150)
+    rapido.show()
+    lento.show()
+    print("=" * 60)
+    print("🎞️ RELOJ DE ANIMACIONES")
+    print("=" * 60)
+    esperar(1.5)
+    print(f"\n   Visibles 1.5 s: rápido {rapido.llamadas} llamadas, lento {lento.llamadas}")
+    rapido.hide()
+    lento.showMinimized()
+    antes = rapido.llamadas + lento.llamadas
+    esperar(1.5)
+    print(f"   Ocultos 1.5 s: {rapido.llamadas + lento.llamadas - antes} llamadas, "
+          f"timer a {obtener_reloj()._timer.interval()} ms")
+    rapido.show()
+    esperar(0.3)
+    print(f"   Tras mostrar de nuevo: timer a {obtener_reloj()._timer.interval()} ms")
+    print(f"\n📊 {obtener_reloj().estadisticas}")
@@ -0,0 +1,290 @@
+"""
+Markdown incremental - Respuestas de la IA como QTextDocument que crece
+
+Convertir toda la respuesta con setMarkdown() en cada fragmento recibido
+re-parsea y re-maqueta todo lo anterior: el coste total es cuadrático en la
+longitud de la respuesta. Aquí el texto se corta en bloques de markdown
+(párrafos separados por una línea en blanco, encabezados, bloques de
+código completos); cada bloque terminado se convierte una sola vez y se
+añade al final del documento, y solo el bloque en curso (la "cola") se
+vuelve a convertir con cada fragmento. QTextDocument solo re-maqueta los
+bloques que cambian, así que los párrafos terminados no se tocan.
+
+Las medidas (ancho ideal y alto) se cachean por ancho de texto.
+"""
+import re
+import time
+import logging
+from typing import Dict, Tuple
+
+from PySide6.QtCore import QPointF, QRectF
+from PySide6.QtGui import (
+    QGuiApplication, QTextDocument, QTextCursor, QTextDocumentFragment, QTextFormat,
+    QTextBlockFormat, QTextCharFormat, QAbstractTextDocumentLayout, QPalette, QColor, QFont
+)
+
+logger = logging.getLogger(__name__)
+
+COLOR_CODIGO = QColor(10, 14, 39)       # Fondo de los bloques de código
+COLOR_ENLACE = QColor("#00d9ff")
+
+# Cualquier rastro de sintaxis markdown; el resto se pinta como texto plano
+_MARKDOWN = re.compile(r"[*_`#>|~\[]|^\s*(?:[-+]|\d+[.)])\s", re.M)
+_VALLA = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+_ENCABEZADO = re.compile(r"^ {0,3}#{1,6}(\s|$)")
+
+
+def tiene_markdown(texto: str) -> bool:
+    """True si el texto puede llevar formato (si no, basta con pintarlo plano)"""
+    return bool(_MARKDOWN.search(texto))
+
+
+def _preparar_paleta():
+    # El importador de markdown de Qt colorea los enlaces con el color de la
+    # paleta de la aplicación; el azul por defecto no se lee sobre fondo oscuro
+    app = QGuiApplication.instance()
+    if app is None:
+        return
+    paleta = app.palette()
+    if paleta.color(QPalette.ColorRole.Link) != COLOR_ENLACE:
+        paleta.setColor(QPalette.ColorRole.Link, COLOR_ENLACE)
+        app.setPalette(paleta)
+
+
+# ============== DOCUMENTO INCREMENTAL ==============
+class MarkdownIncremental:
+    """Documento de una respuesta que se va completando por fragmentos"""
+
+    def __init__(self, fuente: QFont, texto: str = ""):
+        _preparar_paleta()
+        self.documento = QTextDocument()
+        self.documento.setDefaultFont(fuente)
+        self.documento.setDocumentMargin(0)
+        self.documento.setUndoRedoEnabled(False)
+        self.texto = ""
+        self._confirmado = 0      # Caracteres de self.texto ya convertidos en bloques definitivos
+        self._escaneado = 0       # Caracteres de self.texto leídos en líneas completas
+        self._valla = None        # Marcador de la valla de código abierta ("```", "~~~")
+        self._inicio_cola = 0     # Posición del documento donde empieza la cola provisional
+        self._medidas: Dict[int, Tuple[float, float]] = {}
+        self.estadisticas = {"bloques": 0, "conversiones_cola": 0, "caracteres_cola": 0}
+        if texto:
+            self.agregar(texto)
+
+    # ---------- entrada ----------
+    def agregar(self, fragmento: str):
+        """Añade texto al final (un fragmento del streaming o la respuesta entera)"""
+        if not fragmento:
+            return
+        self.texto += fragmento
+        corte = self._buscar_corte()
+        cursor = QTextCursor(self.documento)
+        self._quitar_cola(cursor)
+        if corte > self._confirmado:
+            self._insertar(cursor, self.texto[self._confirmado:corte])
+            self._confirmado = corte
+            self._inicio_cola = self.documento.characterCount() - 1
+        cola = self.texto[self._confirmado:]
+        if cola.strip():
+            if self._valla:
+                # Bloque de código sin cerrar: se muestra ya como código
+                cola += f"\n{self._valla}"
+            self.estadisticas["conversiones_cola"] += 1
+            self.estadisticas["caracteres_cola"] += len(cola)
+            self._insertar(cursor, cola, contar=False)
+        self._medidas.clear()
+
+    def terminar(self):
+        """La respuesta está completa: la cola pasa a ser definitiva"""
+        if self.texto.endswith("\n\n"):
+            return
+        self.agregar("\n\n")
+
+    def _buscar_corte(self) -> int:
+        """Lee las líneas completas nuevas y devuelve hasta dónde hay bloques terminados"""
+        corte = self._confirmado
+        fin_lineas = self.texto.rfind("\n") + 1
+        posicion = self._escaneado
+        while posicion < fin_lineas:
+            fin = self.texto.index("\n", posicion) + 1
+            linea = self.texto[posicion:fin - 1]
+            if self._valla:
+                if linea.strip().startswith(self._valla) and not linea.strip().strip(self._valla[0]):
+                    self._valla = None
+                    corte = fin
+            elif not linea.strip():
+                corte = fin
+            else:
+                valla = _VALLA.match(linea)
+                if valla:
+                    corte = posicion
+                    self._valla = valla.group(1)
+                elif _ENCABEZADO.match(linea):
+                    corte = fin
+            posicion = fin
+        self._escaneado = fin_lineas
+        return corte
+
+    # ---------- documento ----------
+    def _quitar_cola(self, cursor: QTextCursor):
+        cursor.setPosition(self._inicio_cola)
+        cursor.movePosition(QTextCursor.MoveOperation.End, QTextCursor.MoveMode.KeepAnchor)
+        cursor.removeSelectedText()
+
+    def _insertar(self, cursor: QTextCursor, texto: str, contar: bool = True):
+        """Convierte un trozo de markdown y copia sus bloques al final del documento"""
+        if not texto.strip():
+            return
+        origen = QTextDocument()
+        origen.setMarkdown(texto)
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        primero = self.documento.isEmpty()
+
+        if origen.rootFrame().childFrames():
+            # Tablas: se copia el fragmento entero (la copia por bloques las aplanaría).
+            # Sin insertBlock: el marco de la tabla ya va en su propio bloque y
+            # uno vacío delante sería un párrafo de más
+            cursor.insertFragment(QTextDocumentFragment(origen))
+            if contar:
+                self.estadisticas["bloques"] += origen.blockCount()
+            return
+
+        listas = {}
+        bloque = origen.begin()
+        while bloque.isValid():
+            formato = QTextBlockFormat(bloque.blockFormat())
+            # La pertenencia a una lista es un índice del documento de origen
+            formato.clearProperty(QTextFormat.Property.ObjectIndex)
+            if formato.hasProperty(QTextFormat.Property.BlockCodeFence):
+                formato.setBackground(COLOR_CODIGO)
+                formato.setLeftMargin(6)
+                formato.setRightMargin(6)
+            if primero:
+                lista_actual = cursor.currentList()
+                if lista_actual is not None:
+                    lista_actual.remove(cursor.block())
+                primero = False
+            else:
+                cursor.insertBlock(QTextBlockFormat(), QTextCharFormat())
+
+            cursor.setBlockFormat(formato)
+            # Contenido del bloque con sus formatos de carácter (negrita, código, enlaces);
+            # las posiciones de Qt son unidades UTF-16
+            texto16 = bloque.text().encode("utf-16-le")
+            for rango in bloque.textFormats():
+                trozo = texto16[rango.start * 2:(rango.start + rango.length) * 2].decode("utf-16-le")
+                cursor.insertText(trozo, rango.format)
+
+            lista = bloque.textList()
+            if lista is not None:
+                destino = listas.get(lista.objectIndex())
+                if destino is None:
+                    listas[lista.objectIndex()] = cursor.createList(lista.format())
+                else:
+                    destino.add(cursor.block())
+            if contar:
+                self.estadisticas["bloques"] += 1
+            bloque = bloque.next()
+
+    # ---------- medidas y pintado ----------
+    def medidas(self, ancho: int) -> Tuple[float, float]:
+        """
+        Args:
+            ancho: Ancho máximo del texto
+
+        Returns:
+            tuple: (ancho ideal, alto) del documento maquetado a ese ancho
+        """
+        medida = self._medidas.get(ancho)
+        if medida is None:
+            self._maquetar(ancho)
+            medida = self._medidas[ancho] = (self.documento.idealWidth(), self.documento.size().height())
+        return medida
+
+    def _maquetar(self, ancho: int):
+        if self.documento.textWidth() != ancho:
+            self.documento.setTextWidth(ancho)
+
+    def pintar(self, painter, origen: QPointF, ancho: int, color: QColor, recorte: QRectF = None):
+        """Pinta el documento con su esquina superior izquierda en origen"""
+        self._maquetar(ancho)
+        contexto = QAbstractTextDocumentLayout.PaintContext()
+        contexto.palette.setColor(QPalette.ColorRole.Text, color)
+        painter.save()
+        painter.translate(origen)
+        if recorte is not None:
+            contexto.clip = recorte.translated(-origen)
+            painter.setClipRect(contexto.clip)
+        self.documento.documentLayout().draw(painter, contexto)
+        painter.restore()
+
+
+# ============== BENCHMARK ==============
+if __name__ == "__main__":
+    import sys
+    import statistics
+    from PySide6.QtGui import QImage, QPainter
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication(sys.argv)
+    fuente = QFont("Segoe UI", 11)
+    seccion = (
+        "## Paso {n}\n\n"
+        "Primero configura el entorno con **cuidado** y revisa `config.py`; "
+        "después ejecuta el script y comprueba la salida antes de seguir.\n\n"
+        "```python\n"
+        "def paso_{n}(datos):\n"
+        "    resultado = [x * 2 for x in datos if x % 2]\n"
+        "    return sum(resultado)\n"
+        "```\n\n"
+        "- Punto uno del paso {n}\n- Punto dos con *énfasis*\n\n"
+    )
+    respuesta = "".join(seccion.format(n=n) for n in range(40))
+    trozos = [respuesta[i:i + 24] for i in range(0, len(respuesta), 24)]
+    lienzo = QImage(600, 20000, QImage.Format.Format_ARGB32_Premultiplied)
+
+    def streaming(actualizar):
+        tiempos = []
+        for trozo in trozos:
+            inicio = time.perf_counter()
+            actualizar(trozo)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        return tiempos
+
+    # Antes: setMarkdown() de todo lo recibido en cada fragmento
+    completo = QTextDocument()
+    completo.setDefaultFont(fuente)
+    recibido = []
+
+    def rehacer(trozo):
+        recibido.append(trozo)
+        completo.setMarkdown("".join(recibido))
+        completo.setTextWidth(560)
+        completo.size()
+
+    incremental = MarkdownIncremental(fuente)
+
+    def agregar(trozo):
+        incremental.agregar(trozo)
+        incremental.medidas(560)
+
+    print("=" * 60)
+    print(f"📝 MARKDOWN EN STREAMING ({len(respuesta)} caracteres, {len(trozos)} fragmentos)")
+    print("=" * 60)
+    for nombre, funcion in (("setMarkdown completo", rehacer), ("Incremental", agregar)):
+        tiempos = streaming(funcion)
+        ultimos = tiempos[-len(tiempos) // 10:]
+        print(f"\n   {nombre}:")
+        print(f"      total {sum(tiempos):.0f} ms, p50 {statistics.median(tiempos):.2f} ms, "
+              f"máx {max(tiempos):.2f} ms, último 10% p50 {statistics.median(ultimos):.2f} ms")
+    incremental.terminar()
+    print(f"\n📊 {incremental.estadisticas}")
+
+    painter = QPainter(lienzo)
+    inicio = time.perf_counter()
+    for _ in range(20):
+        incremental.pintar(painter, QPointF(0, 0), 560, QColor("#e0e6ff"), QRectF(0, 0, 560, 600))
+    painter.end()
+    print(f"   Pintar la parte visible: {(time.perf_counter() - inicio) * 1000 / 20:.2f} ms")
+    iguales = incremental.documento.toPlainText() == completo.toPlainText()
+    print(f"   Mismo texto que setMarkdown: {'✅' if iguales else '❌'}")
@@ -0,0 +1,224 @@
+"""
+Resolutor de ejecutables - Caché de PATH con detección de cambios
+
+shutil.which() recorre todos los directorios del PATH en cada llamada. Aquí
+cada directorio se lista una sola vez (en paralelo con el caché frío) y se
+guarda qué nombres contiene; una consulta es una búsqueda en diccionario.
+Un directorio solo se vuelve a listar cuando cambia su mtime, y los mtimes
+se revisan como mucho una vez por intervalo, así la latencia no depende de
+la longitud del PATH.
+"""
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config.settings import CURRENT_OS, RESOLUTOR_INTERVALO_REVALIDACION
+
+logger = logging.getLogger(__name__)
+
+ES_WINDOWS = CURRENT_OS == "Windows"
+
+
+def _extensiones_windows() -> List[str]:
+    return [e.lower() for e in os.environ.get("PATHEXT", ".COM;.EXE;.BAT;.CMD").split(";") if e]
+
+
+def _listar_directorio(directorio: str) -> Tuple[str, float, Optional[frozenset]]:
+    """
+    Returns:
+        tuple: (directorio, mtime, nombres) o nombres None si no existe
+    """
+    try:
+        mtime = os.stat(directorio).st_mtime
+        nombres = os.listdir(directorio)
+    except OSError:
+        return directorio, 0.0, None
+    if ES_WINDOWS:
+        nombres = [n.lower() for n in nombres]
+    return directorio, mtime, frozenset(nombres)
+
+
+# ============== RESOLUTOR ==============
+class ResolutorEjecutables:
+    """Índice de los directorios del PATH con invalidación por mtime"""
+
+    def __init__(self, intervalo: float = RESOLUTOR_INTERVALO_REVALIDACION, hilos: int = 8):
+        """
+        Args:
+            intervalo: Segundos mínimos entre revisiones de mtime del PATH
+            hilos: Hilos para listar directorios con el caché frío
+        """
+        self.intervalo = intervalo
+        self.hilos = hilos
+        self._lock = threading.Lock()
+        self._path = None
+        self._directorios: List[str] = []
+        self._contenido: Dict[str, Tuple[float, Optional[frozenset]]] = {}
+        self._resueltos: Dict[str, Optional[str]] = {}
+        self._revisado = 0.0
+        self.estadisticas = {"consultas": 0, "aciertos": 0, "listados": 0, "revisiones": 0}
+
+    # ---------- mantenimiento del índice ----------
+    def _listar(self, directorios: List[str]):
+        """Lista directorios (en paralelo si son varios) y guarda su contenido"""
+        if len(directorios) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.hilos, len(directorios))) as pool:
+                listados = list(pool.map(_listar_directorio, directorios))
+        else:
+            listados = [_listar_directorio(d) for d in directorios]
+        for directorio, mtime, nombres in listados:
+            self._contenido[directorio] = (mtime, nombres)
+        self.estadisticas["listados"] += len(directorios)
+
+    def _actualizar(self, forzar: bool = False):
+        path = os.environ.get("PATH", "")
+        ahora = time.monotonic()
+        if not forzar and path == self._path and ahora - self._revisado < self.intervalo:
+            return
+        with self._lock:
+            if path != self._path:
+                # PATH distinto: reindexar todo (sin duplicados, en orden)
+                self._directorios = list(dict.fromkeys(d for d in path.split(os.pathsep) if d))
+                self._contenido = {}
+                self._listar(self._directorios)
+                self._path = path
+                self._resueltos.clear()
+            else:
+                # Mismo PATH: solo los directorios cuyo mtime cambió
+                cambiados = []
+                for directorio in self._directorios:
+                    try:
+                        mtime = os.stat(directorio).st_mtime
+                    except OSError:
+                        mtime = 0.0
+                    if mtime != self._contenido.get(directorio, (None,))[0]:
+                        cambiados.append(directorio)
+                if cambiados:
+                    logger.debug(f"PATH: {len(cambiados)} directorios cambiaron, volviendo a listarlos")
+                    self._listar(cambiados)
+                    self._resueltos.clear()
+                self.estadisticas["revisiones"] += 1
+            self._revisado = ahora
+
+    def invalidar(self):
+        """Olvida todo; la próxima consulta vuelve a indexar el PATH"""
+        with self._lock:
+            self._path = None
+            self._resueltos.clear()
+
+    # ---------- consultas ----------
+    def _candidatos(self, nombre: str) -> List[str]:
+        if not ES_WINDOWS:
+            return [nombre]
+        nombre = nombre.lower()
+        if os.path.splitext(nombre)[1] in _extensiones_windows():
+            return [nombre]
+        return [nombre + e for e in _extensiones_windows()]
+
+    def _resolver_sin_cache(self, nombre: str) -> Optional[str]:
+        for directorio in self._directorios:
+            nombres = self._contenido.get(directorio, (0.0, None))[1]
+            if not nombres:
+                continue
+            for candidato in self._candidatos(nombre):
+                if candidato in nombres:
+                    ruta = os.path.join(directorio, candidato)
+                    # Un solo stat sobre el candidato, no sobre todo el PATH
+                    if os.path.isfile(ruta) and os.access(ruta, os.X_OK):
+                        return ruta
+        return None
+
+    def resolver(self, nombre: str) -> Optional[str]:
+        """
+        Equivalente a shutil.which() con caché
+
+        Args:
+            nombre: Nombre del ejecutable o ruta
+
+        Returns:
+            str: Ruta completa o None si no está disponible
+        """
+        if os.path.dirname(nombre):
+            # Ruta explícita: no depende del PATH
+            return nombre if os.path.isfile(nombre) and os.access(nombre, os.X_OK) else None
+        self._actualizar()
+        # Consulta y guardado bajo el lock: si _actualizar reindexara a la vez,
+        # se leería un índice a medio llenar y se guardaría un None falso
+        with self._lock:
+            self.estadisticas["consultas"] += 1
+            if nombre in self._resueltos:
+                self.estadisticas["aciertos"] += 1
+                return self._resueltos[nombre]
+            ruta = self._resolver_sin_cache(nombre)
+            self._resueltos[nombre] = ruta
+            return ruta
+
+    def disponibles(self, nombres: Iterable[str]) -> Dict[str, bool]:
+        """
+        Comprueba varios ejecutables de una vez
+
+        Con el caché frío el PATH se lista en paralelo una sola vez y después
+        todas las consultas se responden desde el índice.
+
+        Args:
+            nombres: Nombres de ejecutables
+
+        Returns:
+            dict: {nombre: disponible}
+        """
+        self._actualizar()
+        return {nombre: self.resolver(nombre) is not None for nombre in nombres}
+
+
+resolutor = ResolutorEjecutables()
+
+
+def resolver_ejecutable(nombre: str) -> Optional[str]:
+    """Atajo para resolutor.resolver(nombre)"""
+    return resolutor.resolver(nombre)
+
+
+def ejecutables_disponibles(nombres: Iterable[str]) -> Dict[str, bool]:
+    """Atajo para resolutor.disponibles(nombres)"""
+    return resolutor.disponibles(nombres)
+
+
+# ============== BENCHMARK ==============
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+    import timeit
+
+    nombres = ["python3", "ls", "firefox", "gnome-calculator", "code", "pactl", "amixer", "no-existe"]
+
+    def medir(funcion, repeticiones=2000):
+        return timeit.timeit(lambda: [funcion(n) for n in nombres], number=repeticiones) / (repeticiones * len(nombres)) * 1e6
+
+    print("=" * 60)
+    print("🔎 RESOLUTOR DE EJECUTABLES")
+    print("=" * 60)
+
+    inicio = time.perf_counter()
+    resultado = ejecutables_disponibles(nombres)
+    print(f"\n❄️  Caché frío (listado paralelo): {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    for nombre, disponible in resultado.items():
+        print(f"   {'✅' if disponible else '❌'} {nombre}")
+
+    original = os.environ["PATH"]
+    with tempfile.TemporaryDirectory() as temporal:
+        for largo in (1, 50, 200):
+            # PATH alargado con directorios vacíos al principio
+            extra = [os.path.join(temporal, str(i)) for i in range(largo)]
+            for d in extra:
+                os.makedirs(d, exist_ok=True)
+            os.environ["PATH"] = os.pathsep.join(extra + [original])
+            resolutor.invalidar()
+            resolver_ejecutable("ls")
+            print(f"\n📏 PATH con {largo + len(original.split(os.pathsep))} directorios:")
+            print(f"   shutil.which: {medir(shutil.which, 50):8.1f} µs por consulta")
+            print(f"   resolutor:    {medir(resolver_ejecutable):8.1f} µs por consulta")
+    os.environ["PATH"] = original
+    print(f"\n📊 {resolutor.estadisticas}")